@@ -0,0 +1,88 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+"""
+Compare the WHERE clause detection of `django_spanner.utils.add_dummy_where()`
+with parsing the statement with sqlparse, on UPDATE statements of 10 KB and
+more:
+
+    python benchmarks/where_clause.py
+"""
+
+import timeit
+
+import sqlparse
+
+from django_spanner.utils import _find_where_clause, has_where_clause
+
+
+HEADERS = ("sqlparse", "scan", "cached")
+
+
+def sqlparse_has_where_clause(sql):
+    return any(
+        isinstance(token, sqlparse.sql.Where)
+        for token in sqlparse.parse(sql)[0]
+    )
+
+
+def make_update(size, where):
+    """Return an UPDATE statement of about `size` bytes."""
+    assignments = []
+    length = 0
+    while length < size:
+        assignment = "col_%d = 'value (%d) WHERE'" % (
+            len(assignments),
+            len(assignments),
+        )
+        assignments.append(assignment)
+        length += len(assignment) + 2
+    sql = "UPDATE t SET " + ", ".join(assignments)
+    if where:
+        sql += " WHERE t.id IN (SELECT id FROM u WHERE u.x = @a0)"
+    return sql
+
+
+def time_call(function, sql, number=10):
+    """Return the mean duration of a call in milliseconds, or None if it
+    fails."""
+    try:
+        function(sql)
+    except sqlparse.exceptions.SQLParseError:
+        # Recent versions of sqlparse limit the tokens of a statement.
+        return None
+    return timeit.timeit(lambda: function(sql), number=number) / number * 1000
+
+
+def main():
+    functions = (
+        sqlparse_has_where_clause,
+        _find_where_clause,
+        has_where_clause,
+    )
+    print("%-6s %-6s %12s %12s %12s" % ("size", "where", *HEADERS))
+    for size in (10000, 20000, 50000, 100000):
+        for where in (False, True):
+            sql = make_update(size, where)
+            assert _find_where_clause(sql) == has_where_clause(sql) == where
+            timings = [time_call(function, sql) for function in functions]
+            print(
+                "%-6s %-6s %s"
+                % (
+                    "%dK" % (size // 1000),
+                    where,
+                    " ".join(
+                        "%10.3fms" % timing
+                        if timing is not None
+                        else "%12s" % "fails"
+                        for timing in timings
+                    ),
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
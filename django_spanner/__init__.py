@@ -6,21 +6,22 @@
 
 import datetime
 
-# Monkey-patch AutoField to generate a random value since Cloud Spanner can't
-# do that.
-from uuid import uuid4
-
 import pkg_resources
+from django.db.migrations import state
+from django.db.models import options
 from django.db.models.fields import AutoField, Field
 
 # Monkey-patch google.DatetimeWithNanoseconds's __eq__ compare against
 # datetime.datetime.
 from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from google.cloud.spanner_dbapi import parse_utils
 
 from .expressions import register_expressions
 from .functions import register_functions
+from .keygen import get_key_generator
 from .lookups import register_lookups
-from .utils import check_django_compatability
+from .query import register_query
+from .utils import add_dummy_where, check_django_compatability
 
 __version__ = pkg_resources.get_distribution("django-google-spanner").version
 
@@ -28,11 +29,14 @@ check_django_compatability()
 register_expressions()
 register_functions()
 register_lookups()
+register_query()
 
 
+# Monkey-patch AutoField to generate a random value since Cloud Spanner can't
+# do that.
 def gen_rand_int64():
-    # Credit to https://stackoverflow.com/a/3530326.
-    return uuid4().int & 0x7FFFFFFFFFFFFFFF
+    # Keys come from the generator configured by SPANNER_KEY_GENERATOR.
+    return get_key_generator().next_key()
 
 
 def autofield_init(self, *args, **kwargs):
@@ -43,6 +47,11 @@ def autofield_init(self, *args, **kwargs):
 
 AutoField.__init__ = autofield_init
 
+# Allow Spanner-specific options in models' Meta. The migrations state keeps
+# its own reference to the tuple.
+options.DEFAULT_NAMES += ("interleave_in_parent", "primary_key_fields")
+state.DEFAULT_NAMES = options.DEFAULT_NAMES
+
 old_datetimewithnanoseconds_eq = getattr(
     DatetimeWithNanoseconds, "__eq__", None
 )
@@ -66,6 +75,11 @@ def datetimewithnanoseconds_eq(self, other):
 
 DatetimeWithNanoseconds.__eq__ = datetimewithnanoseconds_eq
 
+# Monkey-patch the DB API driver, which adds a missing WHERE clause to UPDATE
+# and DELETE statements, to look for the clause without parsing the whole
+# statement with sqlparse.
+parse_utils.ensure_where_clause = add_dummy_where
+
 # Sanity check here since tests can't easily be run for this file:
 if __name__ == "__main__":
     from django.utils import timezone
@@ -5,10 +5,13 @@
 # https://developers.google.com/open-source/licenses/bsd
 
 import os
+import warnings
 
 from google.cloud import spanner
 
+from django.conf import settings
 from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.utils import DatabaseError
 from google.cloud import spanner_dbapi
 
 from .client import DatabaseClient
@@ -19,6 +22,9 @@ from .operations import DatabaseOperations
 from .schema import DatabaseSchemaEditor
 from .validation import DatabaseValidation
 
+# Spanner's limit of mutations per commit.
+DEFAULT_MUTATION_LIMIT = 80000
+
 
 class DatabaseWrapper(BaseDatabaseWrapper):
     vendor = "spanner"
@@ -34,7 +40,7 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         "CharField": "STRING(%(max_length)s)",
         "DateField": "DATE",
         "DateTimeField": "TIMESTAMP",
-        "DecimalField": "FLOAT64",
+        "DecimalField": "NUMERIC",
         "DurationField": "INT64",
         "EmailField": "STRING(%(max_length)s)",
         "FileField": "STRING(%(max_length)s)",
@@ -57,24 +63,21 @@ class DatabaseWrapper(BaseDatabaseWrapper):
     }
     operators = {
         "exact": "= %s",
-        "iexact": "REGEXP_CONTAINS(%s, %%%%s)",
-        # contains uses REGEXP_CONTAINS instead of LIKE to allow
-        # DatabaseOperations.prep_for_like_query() to do regular expression
-        # escaping. prep_for_like_query() is called for all the lookups that
-        # use REGEXP_CONTAINS except regex/iregex (see
-        # django.db.models.lookups.PatternLookup).
-        "contains": "REGEXP_CONTAINS(%s, %%%%s)",
-        "icontains": "REGEXP_CONTAINS(%s, %%%%s)",
+        # The text lookups are compiled by django_spanner.lookups: iexact
+        # compares LOWER() values, contains uses LIKE and startswith/endswith
+        # use STARTS_WITH/ENDS_WITH, which can be served by indexes. Only
+        # regex/iregex use REGEXP_CONTAINS.
+        "iexact": "= LOWER(%s)",
+        "contains": "LIKE %s",
+        "icontains": "LIKE LOWER(%s)",
         "gt": "> %s",
         "gte": ">= %s",
         "lt": "< %s",
         "lte": "<= %s",
-        # Using REGEXP_CONTAINS instead of STARTS_WITH and ENDS_WITH for the
-        # same reasoning as described above for 'contains'.
-        "startswith": "REGEXP_CONTAINS(%s, %%%%s)",
-        "endswith": "REGEXP_CONTAINS(%s, %%%%s)",
-        "istartswith": "REGEXP_CONTAINS(%s, %%%%s)",
-        "iendswith": "REGEXP_CONTAINS(%s, %%%%s)",
+        "startswith": "STARTS_WITH(%s, %%%%s)",
+        "endswith": "ENDS_WITH(%s, %%%%s)",
+        "istartswith": "STARTS_WITH(LOWER(%s), LOWER(%%%%s))",
+        "iendswith": "ENDS_WITH(LOWER(%s), LOWER(%%%%s))",
         "regex": "REGEXP_CONTAINS(%s, %%%%s)",
         "iregex": "REGEXP_CONTAINS(%s, %%%%s)",
     }
@@ -82,12 +85,10 @@ class DatabaseWrapper(BaseDatabaseWrapper):
     # pattern_esc is used to generate SQL pattern lookup clauses when the
     # right-hand side of the lookup isn't a raw string (it might be an
     # expression or the result of a bilateral transformation). In those cases,
-    # special characters for REGEXP_CONTAINS operators (e.g. \, *, _) must be
-    # escaped on database side.
+    # special characters for LIKE (\, %, _) must be escaped on database side.
     pattern_esc = r'REPLACE(REPLACE(REPLACE({}, "\\", "\\\\"), "%%", r"\%%"), "_", r"\_")'
 
-    # These are all no-ops in favor of using REGEXP_CONTAINS in the customized
-    # lookups.
+    # These are all no-ops in favor of the customized lookups.
     pattern_ops = {
         "contains": "",
         "icontains": "",
@@ -106,6 +107,12 @@ class DatabaseWrapper(BaseDatabaseWrapper):
     client_class = DatabaseClient
     validation_class = DatabaseValidation
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The estimated number of mutations of the current transaction.
+        self.mutation_count = 0
+        self._mutation_limit_warned = False
+
     @property
     def instance(self):
         """Reference to a Cloud Spanner Instance containing the Database.
@@ -211,3 +218,70 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         save points when autocommit is disabled by django.
         """
         self.connection.cursor().execute("SELECT 1")
+
+    @property
+    def mutation_limit(self):
+        """The number of mutations a transaction can make, from the
+        `SPANNER_MUTATION_LIMIT` setting (80,000 by default).
+
+        :rtype: int
+        :returns: The mutation limit.
+        """
+        return getattr(
+            settings, "SPANNER_MUTATION_LIMIT", DEFAULT_MUTATION_LIMIT
+        )
+
+    def check_mutations(self, count):
+        """Check that the current transaction can make the given number of
+        mutations more without exceeding the mutation limit.
+
+        A transaction that would exceed the limit raises an error if the
+        `SPANNER_MUTATION_LIMIT_EXCEEDED` setting is `"raise"`, or warns once
+        if it's `"warn"`, the default. In autocommit mode, every statement is
+        a transaction of its own.
+
+        :type count: int
+        :param count: The estimated number of mutations.
+
+        :raises: :class:`~django.db.utils.DatabaseError` if the transaction
+                 would exceed the limit.
+        """
+        if not self.autocommit:
+            count += self.mutation_count
+        limit = self.mutation_limit
+        if count <= limit:
+            return
+        message = (
+            "A transaction that makes about %d mutations exceeds Spanner's "
+            "limit of %d mutations per commit." % (count, limit)
+        )
+        action = getattr(settings, "SPANNER_MUTATION_LIMIT_EXCEEDED", "warn")
+        if action == "raise":
+            raise DatabaseError(message)
+        if not self._mutation_limit_warned:
+            warnings.warn(message, RuntimeWarning)
+            # Warn once per transaction.
+            self._mutation_limit_warned = not self.autocommit
+
+    def add_mutations(self, count):
+        """Check and count the estimated mutations of a statement towards
+        the current transaction. See :meth:`check_mutations`.
+
+        :type count: int
+        :param count: The estimated number of mutations.
+        """
+        self.check_mutations(count)
+        if not self.autocommit:
+            self.mutation_count += count
+
+    def _reset_mutation_count(self):
+        self.mutation_count = 0
+        self._mutation_limit_warned = False
+
+    def _commit(self):
+        self._reset_mutation_count()
+        return super()._commit()
+
+    def _rollback(self):
+        self._reset_mutation_count()
+        return super()._rollback()
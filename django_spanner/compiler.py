@@ -4,7 +4,11 @@
 # license that can be found in the LICENSE file or at
 # https://developers.google.com/open-source/licenses/bsd
 
+from django.conf import settings
 from django.core.exceptions import EmptyResultSet
+from django.core.signals import setting_changed
+from django.db.models.expressions import Col, Func, Value
+from django.db.models.lookups import Lookup
 from django.db.models.sql.compiler import (
     SQLAggregateCompiler as BaseSQLAggregateCompiler,
     SQLCompiler as BaseSQLCompiler,
@@ -12,7 +16,38 @@ from django.db.models.sql.compiler import (
     SQLInsertCompiler as BaseSQLInsertCompiler,
     SQLUpdateCompiler as BaseSQLUpdateCompiler,
 )
-from django.db.utils import DatabaseError
+from django.db.models.sql.constants import (
+    CURSOR,
+    GET_ITERATOR_CHUNK_SIZE,
+    MULTI,
+)
+from django.db.models.sql.datastructures import BaseTable, Join
+from django.db.models.sql.subqueries import DeleteQuery, UpdateQuery
+from django.db.models.sql.where import WhereNode
+from django.db.utils import DatabaseError, NotSupportedError
+from google.cloud.spanner_dbapi.parse_utils import (
+    get_param_types,
+    sql_pyformat_args_to_spanner,
+)
+from google.cloud.spanner_v1 import ExecuteSqlRequest, PlanNode
+
+from .utils import (
+    LRUCache,
+    check_key_fields_not_updated,
+    estimate_mutations,
+)
+
+DEFAULT_SQL_CACHE_SIZE = 512
+
+# The generated fields of each model, see _get_generated_fields().
+_generated_fields = {}
+
+# The execution statistics of plan nodes shown by explain(), by key.
+PLAN_NODE_STATS = (
+    ("rows", "rows"),
+    ("latency", "latency"),
+    ("scanned_rows", "scanned rows"),
+)
 
 
 class SQLCompiler(BaseSQLCompiler):
@@ -21,12 +56,516 @@ class SQLCompiler(BaseSQLCompiler):
     functionality.
     """
 
+    # Compile expressions that a GeneratedField stores to its column.
+    use_generated_columns = True
+    # Whether the query is a part of a UNION, INTERSECT or EXCEPT.
+    is_compound_part = False
+    # Whether IN lists are padded, and by how many values; see
+    # django_spanner.lookups.in_list().
+    pad_in_lists = True
+    in_list_padding = 0
+    # The conditions of the WHERE clause compiled for the cache key, by
+    # id(), which compile() hands out again once.
+    compiled_lookups = None
+
+    def as_sql(self, with_limits=True, with_col_aliases=False):
+        """Override the native Django method to cache the SQL of queries and
+        to add statement hints.
+
+        The SQL of a query is cached by the query's shape, which includes the
+        SQL of each condition of its WHERE clause, so that a query of the
+        same shape only has to compile its conditions for their parameters.
+        Only queries of a single table without annotations, extra SQL or
+        expressions outside of the WHERE clause are cached. See
+        :func:`get_sql_cache`.
+
+        Statement hints can only start a statement, so they're left out of
+        subqueries and parts of compound statements.
+
+        The conditions compiled for the cache key are reused when the query
+        isn't cached yet. If the padding of IN lists makes the statement
+        exceed the connection's `max_query_params`, it's compiled again
+        without padding.
+
+        :type with_limits: bool
+        :param with_limits: (Optional) Add LIMIT and OFFSET.
+
+        :type with_col_aliases: bool
+        :param with_col_aliases: (Optional) Alias every selected column.
+
+        :rtype: tuple
+        :returns: A tuple of the SQL and its parameters.
+        """
+        cache = get_sql_cache()
+        key = None
+        self.in_list_padding = 0
+        self.compiled_lookups = {}
+        try:
+            if cache is not None:
+                key, where_params = self._get_cache_key(
+                    with_limits, with_col_aliases
+                )
+            if key is not None:
+                entry = cache.get(key)
+                if entry is not None:
+                    # Restore what execute_sql() and the iterables read.
+                    (
+                        sql,
+                        self.select,
+                        self.klass_info,
+                        self.annotation_col_map,
+                        self.col_count,
+                        self.has_extra_select,
+                    ) = entry
+                    return sql, tuple(where_params)
+            sql, params = self._as_sql(with_limits, with_col_aliases)
+        finally:
+            self.compiled_lookups = None
+        if (
+            self.in_list_padding
+            and len(params) > self.connection.features.max_query_params
+        ):
+            self.pad_in_lists = False
+            try:
+                sql, params = self._as_sql(with_limits, with_col_aliases)
+            finally:
+                self.pad_in_lists = True
+        # Only cache statements whose parameters all come from the WHERE
+        # clause and the LIMIT/OFFSET clause, in the order they were
+        # collected.
+        if key is not None and list(params) == where_params:
+            cache[key] = (
+                sql,
+                self.select,
+                self.klass_info,
+                self.annotation_col_map,
+                self.col_count,
+                self.has_extra_select,
+            )
+        return sql, params
+
+    def _as_sql(self, with_limits, with_col_aliases):
+        """Compile the query and add its statement hints.
+
+        :type with_limits: bool
+        :param with_limits: Add LIMIT and OFFSET.
+
+        :type with_col_aliases: bool
+        :param with_col_aliases: Alias every selected column.
+
+        :rtype: tuple
+        :returns: A tuple of the SQL and its parameters.
+        """
+        sql, params = super().as_sql(with_limits, with_col_aliases)
+        # The LIMIT/OFFSET clause ends the statement; see
+        # DatabaseOperations.limit_offset_sql().
+        params = (*params, *self._get_limit_offset_params(with_limits))
+        if self._has_statement_hint():
+            sql = "@{USE_ADDITIONAL_PARALLELISM=%s} %s" % (
+                self.query.spanner_hints["USE_ADDITIONAL_PARALLELISM"],
+                sql,
+            )
+        return sql, params
+
+    def _has_statement_hint(self):
+        """Return whether the statement starts with a statement hint.
+
+        :rtype: bool
+        :returns: True if the query is compiled with a statement hint.
+        """
+        return (
+            "USE_ADDITIONAL_PARALLELISM"
+            in getattr(self.query, "spanner_hints", {})
+            and not self.query.subquery
+            and not self.is_compound_part
+            # UPDATE and DELETE queries copy the hints of their QuerySet.
+            and not isinstance(self.query, (UpdateQuery, DeleteQuery))
+        )
+
+    def execute_sql(
+        self,
+        result_type=MULTI,
+        chunked_fetch=False,
+        chunk_size=GET_ITERATOR_CHUNK_SIZE,
+    ):
+        """Override the native Django method to read statements that start
+        with a statement hint from a snapshot.
+
+        The DB API cursor doesn't recognize such a statement as a query, so
+        in autocommit mode it would run it in a read-write transaction, or
+        as a partitioned DML statement. The connection is made read-only for
+        the statement instead, which reads it from a single-use snapshot as
+        any other query.
+
+        :type result_type: str
+        :param result_type: (Optional) The type of the result.
+
+        :type chunked_fetch: bool
+        :param chunked_fetch: (Optional) Fetch the rows in chunks.
+
+        :type chunk_size: int
+        :param chunk_size: (Optional) The number of rows per chunk.
+
+        :raises: :class:`~django.db.utils.NotSupportedError` if a statement
+                 with a hint is sent in a transaction of a connection that
+                 runs statements as partitioned DML.
+
+        :returns: The result of the query, by `result_type`.
+        """
+        if not self._has_statement_hint():
+            return super().execute_sql(result_type, chunked_fetch, chunk_size)
+        autocommit = self.connection.get_autocommit()
+        connection = self.connection.connection
+        if not autocommit:
+            # The statement is read in the transaction, like other queries.
+            dml_mode = getattr(connection, "autocommit_dml_mode", None)
+            if getattr(dml_mode, "name", None) == "PARTITIONED_NON_ATOMIC":
+                raise NotSupportedError(
+                    "Statement hints aren't supported in a transaction of a "
+                    "connection in PARTITIONED_NON_ATOMIC mode."
+                )
+            return super().execute_sql(result_type, chunked_fetch, chunk_size)
+        read_only = connection.read_only
+        connection.read_only = True
+        try:
+            return super().execute_sql(result_type, chunked_fetch, chunk_size)
+        finally:
+            connection.read_only = read_only
+
+    def _get_cache_key(self, with_limits, with_col_aliases):
+        """Return the shape of the query and the parameters of its WHERE
+        clause.
+
+        :type with_limits: bool
+        :param with_limits: Add LIMIT and OFFSET.
+
+        :type with_col_aliases: bool
+        :param with_col_aliases: Alias every selected column.
+
+        :rtype: tuple
+        :returns: A tuple of the key, or None if the query can't be cached,
+                  and a list of the parameters.
+        """
+        query = self.query
+        where_params = []
+        if (
+            len(query.alias_map) > 1
+            or query.subquery
+            or query.combinator
+            or query.annotations
+            or query.extra
+            or query.extra_tables
+            or query.extra_order_by
+            or query.group_by is not None
+            or query.distinct_fields
+            or query.select_for_update
+            or query.select_related
+            or query.explain_query
+            or query._filtered_relations
+            or not all(isinstance(col, Col) for col in query.select)
+            or not all(isinstance(field, str) for field in query.order_by)
+        ):
+            return None, where_params
+        where = self._get_where_shape(query.where, where_params)
+        if where is None:
+            return None, where_params
+        limit_offset = self._get_limit_offset_params(with_limits)
+        where_params.extend(limit_offset)
+        key = (
+            self.connection.alias,
+            query.model,
+            with_limits,
+            with_col_aliases,
+            self.is_compound_part,
+            query.default_cols,
+            tuple((col.alias, col.target) for col in query.select),
+            tuple(query.values_select),
+            query.deferred_loading[1],
+            frozenset(query.deferred_loading[0]),
+            tuple(query.order_by),
+            query.default_ordering,
+            query.standard_ordering,
+            query.distinct,
+            # The limit and offset are parameters, only whether there are
+            # any is part of the SQL.
+            bool(query.low_mark),
+            len(limit_offset),
+            tuple(sorted(getattr(query, "spanner_hints", {}).items())),
+            where,
+        )
+        return key, where_params
+
+    def _get_limit_offset_params(self, with_limits):
+        """Return the parameters of the LIMIT/OFFSET clause.
+
+        :type with_limits: bool
+        :param with_limits: Add LIMIT and OFFSET.
+
+        :rtype: list
+        :returns: The limit, if any, followed by the offset, if any.
+        """
+        query = self.query
+        if not with_limits or (query.high_mark is None and not query.low_mark):
+            return []
+        return [
+            value
+            for value in self.connection.ops._get_limit_offset_params(
+                query.low_mark, query.high_mark
+            )
+            if value
+        ]
+
+    def _get_where_shape(self, node, params):
+        """Return the shape of a WHERE clause node and collect its
+        parameters.
+
+        The conditions are compiled, so their SQL is part of the shape. Only
+        conditions comparing a column, or a function of columns, to values
+        are supported.
+
+        :type node: :class:`~django.db.models.sql.where.WhereNode`
+        :param node: A WHERE clause node or condition.
+
+        :type params: list
+        :param params: The list to append the parameters to.
+
+        :rtype: tuple
+        :returns: The shape, or None if the node isn't supported.
+        """
+        if type(node) is WhereNode:
+            children = []
+            for child in node.children:
+                shape = self._get_where_shape(child, params)
+                if shape is None:
+                    return None
+                children.append(shape)
+            return node.connector, node.negated, tuple(children)
+        if (
+            not isinstance(node, Lookup)
+            or not _is_column_expression(node.lhs)
+            or hasattr(node.rhs, "resolve_expression")
+        ):
+            return None
+        try:
+            sql, lookup_params = self.compile(node)
+        except EmptyResultSet:
+            return None
+        if not sql:
+            return None
+        self.compiled_lookups[id(node)] = sql, lookup_params
+        params.extend(lookup_params)
+        return sql
+
+    def apply_converters(self, rows, converters):
+        """Override the native Django method to convert rows with converters
+        prepared once per query.
+
+        The converters of
+        :class:`~django_spanner.operations.DatabaseOperations` are replaced
+        by one-argument versions that look up settings once and aren't
+        called for NULLs. Columns are converted in place, row by row.
+
+        :type rows: iterable
+        :param rows: The rows of the query.
+
+        :type converters: dict
+        :param converters: The converters and expression of each converted
+                           column, by position.
+
+        :rtype: generator
+        :returns: The converted rows, as lists.
+        """
+        ops = self.connection.ops
+        fast = []
+        generic = []
+        for position, (convs, expression) in converters.items():
+            functions = [ops.get_value_converter(conv) for conv in convs]
+            if len(convs) == 1 and functions[0] is not None:
+                fast.append((position, functions[0]))
+            else:
+                generic.append(
+                    (
+                        position,
+                        _chain_converters(
+                            convs, functions, expression, self.connection
+                        ),
+                    )
+                )
+        for row in rows:
+            row = list(row)
+            for position, convert in fast:
+                value = row[position]
+                if value is not None:
+                    row[position] = convert(value)
+            for position, convert in generic:
+                row[position] = convert(row[position])
+            yield row
+
+    def get_from_clause(self):
+        """Override the native Django method to add table and join hints.
+
+        Copied from the base class except for adding the hints of
+        :func:`django_spanner.query.spanner_hints` to the clause of the
+        query's table and of its joins.
+
+        :rtype: tuple
+        :returns: A tuple of the list of FROM clauses and their parameters.
+        """
+        hints = getattr(self.query, "spanner_hints", {})
+        result = []
+        params = []
+        for alias in tuple(self.query.alias_map):
+            if not self.query.alias_refcount[alias]:
+                continue
+            try:
+                from_clause = self.query.alias_map[alias]
+            except KeyError:
+                # Extra tables can end up in self.tables, but not in the
+                # alias_map if they aren't in a join. That's OK. We skip them.
+                continue
+            clause_sql, clause_params = self.compile(from_clause)
+            if (
+                "FORCE_INDEX" in hints
+                and isinstance(from_clause, BaseTable)
+                and alias == self.query.base_table
+            ):
+                # The hint follows the table name, before its alias.
+                table = self.quote_name_unless_alias(from_clause.table_name)
+                clause_sql = "%s@{FORCE_INDEX=%s}%s" % (
+                    table,
+                    hints["FORCE_INDEX"],
+                    clause_sql[len(table):],
+                )
+            elif "JOIN_METHOD" in hints and isinstance(from_clause, Join):
+                clause_sql = "%s@{JOIN_METHOD=%s}%s" % (
+                    from_clause.join_type,
+                    hints["JOIN_METHOD"],
+                    clause_sql[len(from_clause.join_type):],
+                )
+            result.append(clause_sql)
+            params.extend(clause_params)
+        for t in self.query.extra_tables:
+            alias, _ = self.query.table_alias(t)
+            # Only add the alias if it's not already present (the
+            # table_alias() call increments the refcount, so an alias
+            # refcount of one means this is the only reference).
+            if (
+                alias not in self.query.alias_map
+                or self.query.alias_refcount[alias] == 1
+            ):
+                result.append(", %s" % self.quote_name_unless_alias(alias))
+        return result, params
+
+    def compile(self, node, select_format=False):
+        """Override the native Django method to read generated columns, and
+        to reuse the conditions compiled for the cache key of the query.
+
+        :type node: :class:`~django.db.models.expressions.BaseExpression`
+        :param node: The expression to compile.
+
+        :type select_format: bool
+        :param select_format: (Optional) Format the expression for SELECT.
+
+        :rtype: tuple
+        :returns: A tuple of the SQL and its parameters.
+        """
+        if self.compiled_lookups:
+            compiled = self.compiled_lookups.pop(id(node), None)
+            if compiled is not None:
+                return compiled
+        sql, params = super().compile(node, select_format)
+        if self.use_generated_columns and isinstance(node, Func):
+            column = self._generated_column(node, sql, params, select_format)
+            if column is not None:
+                return super().compile(column, select_format)
+        return sql, params
+
+    def _generated_column(self, node, sql, params, select_format):
+        """Return the generated column that stores the given expression.
+
+        :type node: :class:`~django.db.models.expressions.Func`
+        :param node: A resolved expression.
+
+        :type sql: str
+        :param sql: The compiled SQL of the expression.
+
+        :type params: list
+        :param params: The parameters of the compiled SQL.
+
+        :type select_format: bool
+        :param select_format: Whether the expression was formatted for
+                              SELECT.
+
+        :rtype: :class:`~django.db.models.expressions.Col`
+        :returns: The generated column, or None if there isn't one.
+        """
+        cols = _get_cols(node)
+        if not cols:
+            return None
+        alias, model = cols[0].alias, cols[0].target.model
+        generated_fields = [
+            field
+            for field in _get_generated_fields(model)
+            if type(field.resolved_expression) is type(node)
+        ]
+        if not generated_fields or any(
+            col.alias != alias or col.target.model is not model
+            for col in cols
+        ):
+            return None
+        # The top-level expressions are compiled the same way, so their SQL
+        # is equal if they're the same expression.
+        for field in generated_fields:
+            expression = field.resolved_expression.relabeled_clone(
+                {model._meta.db_table: alias}
+            )
+            field_sql, field_params = super().compile(
+                expression, select_format
+            )
+            if field_sql == sql and list(field_params) == list(params):
+                return field.get_col(alias)
+        return None
+
+    def explain_query(self):
+        """Override the native Django method to explain with a query mode.
+
+        Spanner doesn't have an EXPLAIN statement. Instead, the query is run
+        in a read-only snapshot in PLAN mode, which only plans it, or in
+        PROFILE mode with the `analyze` option, which also executes it and
+        collects the execution statistics of every operator.
+
+        :rtype: generator
+        :returns: The lines of the query plan.
+        """
+        sql, params = self.as_sql()
+        sql, params = sql_pyformat_args_to_spanner(sql.lstrip(), params)
+        options = self.query.explain_options
+        query_mode = (
+            ExecuteSqlRequest.QueryMode.PROFILE
+            if options.get("analyze")
+            else ExecuteSqlRequest.QueryMode.PLAN
+        )
+        self.connection.ensure_connection()
+        with self.connection.connection.database.snapshot() as snapshot:
+            results = snapshot.execute_sql(
+                sql,
+                params=params,
+                param_types=get_param_types(params),
+                query_mode=query_mode,
+            )
+            # The statistics are only available once the rows are consumed.
+            for _ in results:
+                pass
+            stats = results.stats
+        yield from _format_plan(stats)
+
     def get_combinator_sql(self, combinator, all):
         """Override the native Django method.
 
         Copied from the base class except for:
             combinator_sql += ' ALL' if all else ' DISTINCT'
-        Cloud Spanner requires ALL or DISTINCT.
+        Cloud Spanner requires ALL or DISTINCT. The parts are also flagged
+        so that they're compiled without statement hints.
 
         :type combinator: str
         :param combinator: A type of the combinator for the operation.
@@ -58,6 +597,7 @@ class SQLCompiler(BaseSQLCompiler):
                     )
         parts = ()
         for compiler in compilers:
+            compiler.is_compound_part = True
             try:
                 # If the columns list is limited, then all combined queries
                 # must have the same columns list. Set the selects defined on
@@ -110,22 +650,337 @@ class SQLCompiler(BaseSQLCompiler):
         return result, params
 
 
+_sql_cache = None
+
+
+def get_sql_cache():
+    """
+    Return the process-wide cache of compiled SELECT statements, which keeps
+    `SPANNER_SQL_CACHE_SIZE` statements (512 by default). A size of 0
+    disables the cache. Use `cache_info()` to read its hits and misses.
+
+    :rtype: :class:`~django_spanner.utils.LRUCache`
+    :returns: The cache, or None if it's disabled.
+    """
+    global _sql_cache
+    if _sql_cache is None:
+        size = getattr(
+            settings, "SPANNER_SQL_CACHE_SIZE", DEFAULT_SQL_CACHE_SIZE
+        )
+        if not size:
+            return None
+        _sql_cache = LRUCache(size)
+    return _sql_cache
+
+
+def reset_sql_cache(**kwargs):
+    """
+    Drop the cache of compiled statements so that it's recreated on next
+    use. Settings can change the SQL of a query, so this runs on every
+    setting change.
+    """
+    global _sql_cache
+    _sql_cache = None
+
+
+setting_changed.connect(reset_sql_cache)
+
+
+def _format_plan(stats):
+    """Render a query plan as an indented tree of its relational operators.
+
+    :type stats: :class:`~google.cloud.spanner_v1.ResultSetStats`
+    :param stats: The statistics of a query run in PLAN or PROFILE mode.
+
+    :rtype: list
+    :returns: The lines of the plan, followed by the query statistics in
+              PROFILE mode.
+    """
+    nodes = stats.query_plan.plan_nodes
+    lines = []
+
+    def add_node(node, depth):
+        line = node.display_name
+        # Unset metadata and statistics are None.
+        scan_target = (node.metadata or {}).get("scan_target")
+        if scan_target:
+            line += ": %s" % scan_target
+        node_stats = []
+        for key, name in PLAN_NODE_STATS:
+            value = (node.execution_stats or {}).get(key)
+            if value is None:
+                continue
+            unit = value.get("unit")
+            node_stats.append(
+                "%s: %s%s"
+                % (name, value["total"], " " + unit if unit != "rows" else "")
+            )
+        if node_stats:
+            line += " (%s)" % ", ".join(node_stats)
+        lines.append("  " * depth + line)
+        for link in node.child_links:
+            child = nodes[link.child_index]
+            if child.kind == PlanNode.Kind.RELATIONAL:
+                add_node(child, depth + 1)
+
+    if nodes:
+        add_node(nodes[0], 0)
+    query_stats = stats.query_stats or {}
+    lines.extend(
+        "%s: %s" % (key, query_stats[key]) for key in sorted(query_stats)
+    )
+    return lines
+
+
+def _chain_converters(converters, functions, expression, connection):
+    """Return a function applying the converters of a column in order.
+
+    :type converters: list
+    :param converters: The converters of the column.
+
+    :type functions: list
+    :param functions: The one-argument version of each converter, or None.
+
+    :type expression: :class:`~django.db.models.expressions.BaseExpression`
+    :param expression: The expression of the column.
+
+    :type connection: :class:`~django_spanner.base.DatabaseWrapper`
+    :param connection: The connection of the query.
+
+    :rtype: callable
+    :returns: A function converting a value.
+    """
+
+    def convert(value):
+        for converter, function in zip(converters, functions):
+            if function is None:
+                value = converter(value, expression, connection)
+            elif value is not None:
+                value = function(value)
+        return value
+
+    return convert
+
+
+def _is_column_expression(expression):
+    """Return whether an expression only consists of functions, columns and
+    values.
+
+    :type expression: :class:`~django.db.models.expressions.BaseExpression`
+    :param expression: A resolved expression.
+
+    :rtype: bool
+    :returns: True if the expression is a column or a function of columns.
+    """
+    if isinstance(expression, (Col, Value)):
+        return True
+    return isinstance(expression, Func) and all(
+        _is_column_expression(source)
+        for source in expression.get_source_expressions()
+    )
+
+
+def _get_generated_fields(model):
+    """Return the generated fields of a model, see
+    :class:`~django_spanner.fields.GeneratedField`.
+
+    :type model: :class:`~django.db.models.Model`
+    :param model: A model.
+
+    :rtype: list
+    :returns: The fields, which are looked up once per model.
+    """
+    try:
+        return _generated_fields[model]
+    except KeyError:
+        fields = _generated_fields[model] = [
+            field
+            for field in model._meta.concrete_fields
+            if getattr(field, "generated", False)
+        ]
+        return fields
+
+
+def _get_cols(expression):
+    """Return the columns referenced by an expression.
+
+    :type expression: :class:`~django.db.models.expressions.BaseExpression`
+    :param expression: A resolved expression.
+
+    :rtype: list
+    :returns: A list of :class:`~django.db.models.expressions.Col`.
+    """
+    if isinstance(expression, Col):
+        return [expression]
+    if not hasattr(expression, "get_source_expressions"):
+        return []
+    return [
+        col
+        for source in expression.get_source_expressions()
+        if source is not None
+        for col in _get_cols(source)
+    ]
+
+
 class SQLInsertCompiler(BaseSQLInsertCompiler, SQLCompiler):
     """A wrapper class for compatibility with Django specifications."""
 
-    pass
+    def as_sql(self):
+        """Override the native Django method to support upserts.
+
+        Queries flagged with `upsert` (see
+        :func:`django_spanner.query.register_query`) are turned into
+        `INSERT OR UPDATE` statements so that rows which already exist are
+        overwritten instead of raising a conflict.
+
+        :rtype: list
+        :returns: A list of (SQL statement, parameters) tuples.
+        """
+        sql_list = super().as_sql()
+        if not getattr(self.query, "upsert", False):
+            return sql_list
+        ops = self.connection.ops
+        prefix_length = len(ops.insert_statement())
+        return [
+            (ops.upsert_statement() + sql[prefix_length:], params)
+            for sql, params in sql_list
+        ]
+
+    def execute_sql(self, return_id=False):
+        """Override the native Django method to count the mutations of the
+        inserted rows before they're sent, unless `bulk_create()` already
+        counted them. See
+        :meth:`~django_spanner.base.DatabaseWrapper.add_mutations`.
+
+        :type return_id: bool
+        :param return_id: (Optional) Return the ID of the inserted row.
+
+        :rtype: int
+        :returns: The ID of the inserted row, if requested.
+        """
+        if not getattr(self.query, "mutations_counted", False):
+            field_names = [field.name for field in self.query.fields] or [
+                self.query.get_meta().pk.name
+            ]
+            self.connection.add_mutations(
+                len(self.query.objs)
+                * estimate_mutations(self.query.model, field_names)
+            )
+        return super().execute_sql(return_id)
+
+
+class RequiredWhereMixin:
+    """
+    Cloud Spanner requires a WHERE clause on UPDATE and DELETE statements.
+    Add `WHERE true` to statements whose WHERE clause compiled to nothing,
+    so that they don't have to be parsed to find out.
+    """
+
+    def compile(self, node, select_format=False):
+        sql, params = super().compile(node, select_format)
+        if node is self.query.where:
+            self.has_where = bool(sql)
+        return sql, params
+
+    def as_sql(self):
+        """Add the WHERE clause of :func:`add_dummy_where` without parsing."""
+        self.has_where = False
+        sql, params = super().as_sql()
+        if sql and not self.has_where:
+            sql += " WHERE true"
+        return sql, params
 
 
-class SQLDeleteCompiler(BaseSQLDeleteCompiler, SQLCompiler):
+def _rowcount(cursor):
+    """Return the number of rows a DML statement changed, 0 if unknown."""
+    return max(cursor.rowcount or 0, 0)
+
+
+class SQLDeleteCompiler(
+    RequiredWhereMixin, BaseSQLDeleteCompiler, SQLCompiler
+):
     """A wrapper class for compatibility with Django specifications."""
 
-    pass
+    def execute_sql(
+        self,
+        result_type=MULTI,
+        chunked_fetch=False,
+        chunk_size=GET_ITERATOR_CHUNK_SIZE,
+    ):
+        """Override the native Django method to count the mutations of the
+        deleted rows towards the current transaction. Rows of interleaved
+        tables deleted by `ON DELETE CASCADE` aren't counted. In autocommit
+        mode the statement has already been committed, so it isn't checked.
+
+        :type result_type: str
+        :param result_type: (Optional) The type of the result.
+
+        :type chunked_fetch: bool
+        :param chunked_fetch: (Optional) Fetch the rows in chunks.
+
+        :type chunk_size: int
+        :param chunk_size: (Optional) The number of rows per chunk.
+
+        :rtype: :class:`~google.cloud.spanner_dbapi.cursor.Cursor`
+        :returns: The cursor of the statement, for a `CURSOR` result type.
+        """
+        cursor = super().execute_sql(result_type, chunked_fetch, chunk_size)
+        if (
+            result_type == CURSOR
+            and cursor is not None
+            and not self.connection.autocommit
+        ):
+            self.connection.add_mutations(
+                _rowcount(cursor) * estimate_mutations(self.query.model)
+            )
+        return cursor
 
 
-class SQLUpdateCompiler(BaseSQLUpdateCompiler, SQLCompiler):
+class SQLUpdateCompiler(
+    RequiredWhereMixin, BaseSQLUpdateCompiler, SQLCompiler
+):
     """A wrapper class for compatibility with Django specifications."""
 
-    pass
+    def as_sql(self):
+        """Override the native Django method to reject updates of primary
+        key columns, including the columns of composite and interleaved keys,
+        which Spanner doesn't allow.
+
+        :raises: :class:`~django.db.utils.NotSupportedError` if a primary
+                 key column is updated.
+
+        :rtype: tuple
+        :returns: A tuple of SQL statement and its parameters.
+        """
+        check_key_fields_not_updated(
+            self.query.model, [field for field, _, _ in self.query.values]
+        )
+        return super().as_sql()
+
+    def execute_sql(self, result_type):
+        """Override the native Django method to count the mutations of the
+        updated rows towards the current transaction, unless
+        `bulk_update()` already counted them. In autocommit mode the
+        statement has already been committed, so it isn't checked.
+
+        :type result_type: str
+        :param result_type: The type of the result.
+
+        :rtype: int
+        :returns: The number of updated rows.
+        """
+        rows = super().execute_sql(result_type)
+        if (
+            rows
+            and rows > 0
+            and not self.connection.autocommit
+            and not getattr(self.query, "mutations_counted", False)
+        ):
+            field_names = [field.name for field, _, _ in self.query.values]
+            self.connection.add_mutations(
+                rows * estimate_mutations(self.query.model, field_names)
+            )
+        return rows
 
 
 class SQLAggregateCompiler(BaseSQLAggregateCompiler, SQLCompiler):
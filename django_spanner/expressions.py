@@ -4,7 +4,24 @@
 # license that can be found in the LICENSE file or at
 # https://developers.google.com/open-source/licenses/bsd
 
-from django.db.models.expressions import OrderBy
+from django.db.models.expressions import Col, OrderBy
+from django.db.models.sql.constants import LOUTER
+
+from .functions import IsNull
+
+
+def _is_nullable(expression, compiler):
+    """
+    Return whether an expression can be NULL. Only columns are known not to
+    be NULL: those that are NOT NULL and not on the nullable side of an
+    outer join.
+    """
+    if not isinstance(expression, Col):
+        return True
+    if expression.target.null:
+        return True
+    join = compiler.query.alias_map.get(expression.alias)
+    return getattr(join, "join_type", None) == LOUTER
 
 
 def order_by(self, compiler, connection, **extra_context):
@@ -12,20 +29,37 @@ def order_by(self, compiler, connection, **extra_context):
     Order expressions in the SQL query and generate a new query using
     Spanner-specific templates.
 
+    Spanner sorts NULLs before other values, so NULLS FIRST ascending and
+    NULLS LAST descending are the native orderings. Otherwise, NULLs are
+    moved by sorting on `expression IS NULL` first, unless the expression
+    can't be NULL. A generated column storing
+    :class:`~django_spanner.functions.IsNull` of the expression is used for
+    that sort key if there is one, so that an index on it and the
+    expression can serve the ordering.
+
     :rtype: str
     :returns: A SQL query.
     """
     # TODO: In Django 3.1, this can be replaced with
     #  DatabaseFeatures.supports_order_by_nulls_modifier = False.
     #  Also, consider making this a class method.
-    template = None
-    if self.nulls_last:
-        template = "%(expression)s IS NULL, %(expression)s %(ordering)s"
-    elif self.nulls_first:
-        template = "%(expression)s IS NOT NULL, %(expression)s %(ordering)s"
-    return self.as_sql(
-        compiler, connection, template=template, **extra_context
+    sql, params = self.as_sql(
+        compiler, connection, template=self.template, **extra_context
     )
+    native_nulls_first = not self.descending
+    if (
+        (self.nulls_first or self.nulls_last)
+        and self.nulls_first != native_nulls_first
+        and _is_nullable(self.expression, compiler)
+    ):
+        is_null_sql, is_null_params = compiler.compile(IsNull(self.expression))
+        sql = "%s %s, %s" % (
+            is_null_sql,
+            "DESC" if self.nulls_first else "ASC",
+            sql,
+        )
+        params = [*is_null_params, *params]
+    return sql, params
 
 
 def register_expressions():
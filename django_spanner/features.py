@@ -22,8 +22,13 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     has_case_insensitive_like = False
     # https://cloud.google.com/spanner/quotas#query_limits
     max_query_params = 900
+    # explain() runs the query in PLAN or PROFILE query mode.
+    supports_explaining_query_execution = True
+    supported_explain_formats = {"TEXT"}
     supports_foreign_keys = False
-    supports_ignore_conflicts = False
+    # INSERT OR IGNORE / INSERT OR UPDATE resolve primary key conflicts only.
+    supports_ignore_conflicts = True
+    supports_update_conflicts = True
     supports_partial_indexes = False
     supports_regex_backreferencing = False
     supports_select_for_update_with_limit = False
@@ -0,0 +1,271 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+"""Spanner-specific model fields."""
+
+import ipaddress
+import uuid
+from base64 import b64encode
+from binascii import a2b_base64
+
+from django.db.models import (
+    BinaryField,
+    DateTimeField,
+    Field,
+    GenericIPAddressField,
+    UUIDField,
+)
+from django.db.models.sql import Query
+from django.utils.functional import cached_property
+
+from .functions import PendingCommitTimestamp
+
+__all__ = [
+    "CommitTimestampField",
+    "CompactGenericIPAddressField",
+    "CompactUUIDField",
+    "GeneratedField",
+    "LazyBinaryField",
+    "LazyBytes",
+]
+
+
+class CommitTimestampField(DateTimeField):
+    """
+    A DateTimeField stored in a `TIMESTAMP` column created with
+    `allow_commit_timestamp=true`.
+
+    With `auto_now` or `auto_now_add` the value isn't generated on the
+    client: the column is set to the commit timestamp of the transaction by
+    `PENDING_COMMIT_TIMESTAMP()`. Commit timestamps increase with every
+    transaction, so they can be used to track changed rows.
+
+    The timestamp is only known once the transaction commits. After a save,
+    an `auto_now_add` field is deferred and loaded from the database on next
+    access, while an `auto_now` field holds the expression, which is written
+    again by the next save, until the instance is reloaded. Spanner doesn't
+    allow reading the column in the transaction that wrote it.
+    """
+
+    def db_type_suffix(self, connection):
+        return "OPTIONS (allow_commit_timestamp=true)"
+
+    def pre_save(self, model_instance, add):
+        if self.auto_now or (self.auto_now_add and add):
+            value = PendingCommitTimestamp()
+            if self.auto_now:
+                setattr(model_instance, self.attname, value)
+            else:
+                # A deferred field is also left out of later updates.
+                model_instance.__dict__.pop(self.attname, None)
+            return value
+        return super().pre_save(model_instance, add)
+
+
+class GeneratedField(Field):
+    """
+    A read-only field stored in a generated column, `AS (expression) STORED`,
+    which Spanner computes from other columns of the row. It can be indexed
+    like any other column.
+
+    Queries that use the same expression on the same model, for example
+    `annotate(email_lower=Lower("email")).filter(email_lower=...)`, are
+    compiled to read the generated column instead, so they can be served by
+    its index.
+
+    :type expression: :class:`~django.db.models.expressions.Expression`
+    :param expression: The expression computing the value from the fields of
+                       the model.
+
+    :type output_field: :class:`~django.db.models.Field`
+    :param output_field: A field describing the column's type.
+    """
+
+    generated = True
+
+    def __init__(self, *, expression, output_field, **kwargs):
+        self.expression = expression
+        self.output_field = output_field
+        kwargs["editable"] = False
+        kwargs["blank"] = True
+        super().__init__(**kwargs)
+
+    @cached_property
+    def resolved_expression(self):
+        """
+        The expression resolved against the model's table, aliased by the
+        table name.
+        """
+        return self.expression.resolve_expression(
+            Query(self.model), allow_joins=False
+        )
+
+    def db_type(self, connection):
+        return self.output_field.db_type(connection)
+
+    def db_parameters(self, connection):
+        return self.output_field.db_parameters(connection)
+
+    def get_internal_type(self):
+        return self.output_field.get_internal_type()
+
+    def get_db_converters(self, connection):
+        return self.output_field.get_db_converters(connection)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs["editable"]
+        del kwargs["blank"]
+        kwargs["expression"] = self.expression
+        kwargs["output_field"] = self.output_field
+        return name, path, args, kwargs
+
+
+class LazyBytes:
+    """
+    A `BYTES` value as read from Spanner, base64-encoded, which is only
+    decoded when it's used: by `bytes()`, `memoryview()`, `len()`,
+    comparisons, iteration or indexing. The decoded value is kept.
+
+    :type encoded: bytes
+    :param encoded: The base64-encoded value.
+    """
+
+    __slots__ = ("encoded", "_decoded")
+
+    def __init__(self, encoded):
+        self.encoded = encoded
+        self._decoded = None
+
+    @property
+    def decoded(self):
+        """Whether the value was decoded."""
+        return self._decoded is not None
+
+    def tobytes(self):
+        """Return the decoded value.
+
+        :rtype: bytes
+        :returns: The decoded value.
+        """
+        if self._decoded is None:
+            self._decoded = a2b_base64(self.encoded)
+            self.encoded = None
+        return self._decoded
+
+    __bytes__ = tobytes
+
+    def __len__(self):
+        return len(self.tobytes())
+
+    def __iter__(self):
+        return iter(self.tobytes())
+
+    def __getitem__(self, key):
+        return self.tobytes()[key]
+
+    def __eq__(self, other):
+        if isinstance(other, LazyBytes):
+            other = other.tobytes()
+        return self.tobytes() == other
+
+    def __hash__(self):
+        return hash(self.tobytes())
+
+    def __repr__(self):
+        if self._decoded is None:
+            return "<LazyBytes: %d encoded bytes>" % len(self.encoded)
+        return "<LazyBytes: %r>" % self._decoded
+
+
+class LazyBinaryField(BinaryField):
+    """
+    A BinaryField whose values are read as :class:`LazyBytes`, so that
+    queries which don't use the bytes of large values, such as thumbnails or
+    serialized blobs, don't decode them. A value that wasn't decoded is
+    written back without being decoded either.
+    """
+
+    lazy_decoding = True
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return LazyBytes(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if isinstance(value, LazyBytes):
+            if not value.decoded:
+                # The database driver would encode the value again.
+                return value.encoded
+            value = value.tobytes()
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        if isinstance(value, LazyBytes):
+            if not value.decoded:
+                return value.encoded.decode("ascii")
+            value = value.tobytes()
+        return b64encode(value).decode("ascii")
+
+
+class CompactUUIDField(UUIDField):
+    """
+    A UUIDField stored in a `BYTES(16)` column, half the size of the
+    `STRING(32)` column of a UUIDField, which makes keys and indexes on it
+    smaller. Values compare in the same order as their hex strings.
+    """
+
+    def db_type(self, connection):
+        return "BYTES(16)"
+
+    def get_internal_type(self):
+        # Read and write the values like other BYTES values.
+        return "BinaryField"
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = self.to_python(value)
+        return connection.Database.Binary(value.bytes)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return uuid.UUID(bytes=bytes(value))
+
+
+class CompactGenericIPAddressField(GenericIPAddressField):
+    """
+    A GenericIPAddressField stored in a `BYTES(16)` column instead of a
+    `STRING(39)` column. IPv4 addresses are stored as IPv4-mapped IPv6
+    addresses, so IPv4-mapped addresses are read as IPv4 addresses.
+    """
+
+    def db_type(self, connection):
+        return "BYTES(16)"
+
+    def get_internal_type(self):
+        # Read and write the values like other BYTES values.
+        return "BinaryField"
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if not value:
+            return None
+        address = ipaddress.ip_address(value)
+        if address.version == 4:
+            address = ipaddress.IPv6Address("::ffff:%s" % address)
+        return connection.Database.Binary(address.packed)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        address = ipaddress.IPv6Address(bytes(value))
+        return str(address.ipv4_mapped or address)
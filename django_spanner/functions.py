@@ -8,6 +8,7 @@
 
 import math
 
+from django.db.models import BooleanField, DateTimeField
 from django.db.models.expressions import Func, Value
 from django.db.models.functions import (
     Cast,
@@ -32,6 +33,28 @@ class IfNull(Func):
     arity = 2
 
 
+class IsNull(Func):
+    """
+    Represent SQL `IS NULL` operator. A generated column storing it can be
+    indexed to serve NULLS FIRST/LAST orderings.
+    """
+    template = "%(expressions)s IS NULL"
+    arity = 1
+    output_field = BooleanField()
+
+
+class PendingCommitTimestamp(Func):
+    """
+    Represent SQL `PENDING_COMMIT_TIMESTAMP` function, which writes the
+    commit timestamp of the transaction to a column created with
+    `allow_commit_timestamp=true`.
+    """
+    function = "PENDING_COMMIT_TIMESTAMP"
+    template = "%(function)s()"
+    arity = 0
+    output_field = DateTimeField()
+
+
 def cast(self, compiler, connection, **extra_context):
     """
     A method to extend Django Cast class. Cast SQL query for given
@@ -0,0 +1,73 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+"""Spanner-specific model indexes."""
+
+from django.db.models import Index
+
+__all__ = ["SpannerIndex"]
+
+
+class SpannerIndex(Index):
+    """
+    A model index with Spanner-specific options. It can only be created on
+    a Spanner database.
+
+    :type storing: list
+    :param storing: (Optional) The names of non-key fields whose values are
+                    copied into the index (`STORING (...)`), so that queries
+                    which only read those fields are served from the index
+                    without joining back to the table.
+
+    :type null_filtered: bool
+    :param null_filtered: (Optional) Leave rows where any key field is NULL
+                          out of the index (`CREATE NULL_FILTERED INDEX`),
+                          which keeps indexes on sparse columns small.
+    """
+
+    def __init__(self, *, storing=(), null_filtered=False, **kwargs):
+        if not isinstance(storing, (list, tuple)):
+            raise ValueError("SpannerIndex.storing must be a list or tuple.")
+        super().__init__(**kwargs)
+        self.storing = list(storing)
+        self.null_filtered = null_filtered
+        key_names = {field_name for field_name, _ in self.fields_orders}
+        if key_names.intersection(self.storing):
+            raise ValueError(
+                "SpannerIndex.storing can't include the fields of the index "
+                "key."
+            )
+
+    def create_sql(self, model, schema_editor, using=""):
+        fields = [
+            model._meta.get_field(field_name)
+            for field_name, _ in self.fields_orders
+        ]
+        col_suffixes = [order[1] for order in self.fields_orders]
+        condition = self._get_condition_sql(model, schema_editor)
+        return schema_editor._create_index_sql(
+            model,
+            fields,
+            name=self.name,
+            using=using,
+            db_tablespace=self.db_tablespace,
+            col_suffixes=col_suffixes,
+            opclasses=self.opclasses,
+            condition=condition,
+            storing=[
+                model._meta.get_field(field_name)
+                for field_name in self.storing
+            ],
+            null_filtered=self.null_filtered,
+        )
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        if self.storing:
+            kwargs["storing"] = self.storing
+        if self.null_filtered:
+            kwargs["null_filtered"] = True
+        return path, args, kwargs
@@ -21,10 +21,16 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         TypeCode.DATE: "DateField",
         TypeCode.FLOAT64: "FloatField",
         TypeCode.INT64: "IntegerField",
+        TypeCode.NUMERIC: "DecimalField",
         TypeCode.STRING: "CharField",
         TypeCode.TIMESTAMP: "DateTimeField",
     }
 
+    def __init__(self, connection):
+        super().__init__(connection)
+        # The names of the secondary indexes found per table.
+        self._index_names = {}
+
     def get_field_type(self, data_type, description):
         """A hook for a Spanner database to use the cursor description to
         match a Django field type to the database column.
@@ -152,6 +158,21 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         :rtype: str
         :returns: The name of the PK column.
         """
+        columns = self.get_primary_key_columns(cursor, table_name)
+        return columns[0] if columns else None
+
+    def get_primary_key_columns(self, cursor, table_name):
+        """Return the Primary Key columns in key order.
+
+        :type cursor: :class:`~google.cloud.spanner_dbapi.cursor.Cursor`
+        :param cursor: A reference to a Spanner Database cursor.
+
+        :type table_name: str
+        :param table_name: The name of the table.
+
+        :rtype: list
+        :returns: The names of the PK columns.
+        """
         results = cursor.run_sql_in_snapshot(
             """
             SELECT
@@ -164,10 +185,87 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                 ccu ON tc.CONSTRAINT_NAME = ccu.CONSTRAINT_NAME
             WHERE
                 tc.TABLE_NAME="%s" AND tc.CONSTRAINT_TYPE='PRIMARY KEY' AND tc.TABLE_SCHEMA=''
+            ORDER BY
+                ccu.ORDINAL_POSITION
+            """
+            % self.connection.ops.quote_name(table_name)
+        )
+        return [row[0] for row in results]
+
+    def get_parent_table(self, cursor, table_name):
+        """Return the parent of an interleaved table.
+
+        :type cursor: :class:`~google.cloud.spanner_dbapi.cursor.Cursor`
+        :param cursor: A reference to a Spanner Database cursor.
+
+        :type table_name: str
+        :param table_name: The name of the table.
+
+        :rtype: tuple
+        :returns: A (parent table name, on delete action) tuple, or None if
+                  the table isn't interleaved.
+        """
+        results = cursor.run_sql_in_snapshot(
+            """
+            SELECT
+                PARENT_TABLE_NAME, ON_DELETE_ACTION
+            FROM
+                INFORMATION_SCHEMA.TABLES
+            WHERE
+                TABLE_NAME="%s" AND TABLE_SCHEMA=''
+            """
+            % self.connection.ops.quote_name(table_name)
+        )
+        if not results or results[0][0] is None:
+            return None
+        return tuple(results[0])
+
+    def get_index_names(self, cursor, table_name):
+        """Return the names of the secondary indexes of a table.
+
+        :type cursor: :class:`~google.cloud.spanner_dbapi.cursor.Cursor`
+        :param cursor: A reference to a Spanner Database cursor.
+
+        :type table_name: str
+        :param table_name: The name of the table.
+
+        :rtype: set
+        :returns: A set of index names.
+        """
+        results = cursor.run_sql_in_snapshot(
+            """
+            SELECT
+                INDEX_NAME
+            FROM
+                INFORMATION_SCHEMA.INDEXES
+            WHERE
+                TABLE_NAME="%s" AND TABLE_SCHEMA='' AND INDEX_TYPE="INDEX"
             """
             % self.connection.ops.quote_name(table_name)
         )
-        return results[0][0] if results else None
+        return {row[0] for row in results}
+
+    def index_exists(self, table_name, index_name):
+        """Return whether a table has a secondary index.
+
+        The indexes found are remembered, so the database is only queried
+        again for an index that wasn't found.
+
+        :type table_name: str
+        :param table_name: The name of the table.
+
+        :type index_name: str
+        :param index_name: The name of the index.
+
+        :rtype: bool
+        :returns: True if the index exists.
+        """
+        if index_name not in self._index_names.get(table_name, ()):
+            with self.connection.cursor() as cursor:
+                self._index_names[table_name] = self.get_index_names(
+                    cursor, table_name
+                )
+        return index_name in self._index_names[table_name]
 
     def get_constraints(self, cursor, table_name):
         """Retrieve the Spanner Table column constraints.
@@ -255,7 +353,7 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         indexes = cursor.run_sql_in_snapshot(
             """
             SELECT
-                idx.INDEX_NAME, idx_col.COLUMN_NAME, idx_col.COLUMN_ORDERING, idx.INDEX_TYPE, idx.IS_UNIQUE
+                idx.INDEX_NAME, idx_col.COLUMN_NAME, idx_col.COLUMN_ORDERING, idx_col.ORDINAL_POSITION, idx.INDEX_TYPE, idx.IS_UNIQUE, idx.IS_NULL_FILTERED
             FROM
                 INFORMATION_SCHEMA.INDEXES AS idx
             RIGHT JOIN
@@ -274,8 +372,10 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
             index_name,
             column_name,
             ordering,
+            ordinal_position,
             index_type,
             is_unique,
+            is_null_filtered,
         ) in indexes:
             if index_name not in constraints:
                 constraints[index_name] = {
@@ -288,10 +388,15 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                     "type": None,
                     "unique": False,
                 }
+            constraints[index_name].setdefault("storing", [])
 
-            constraints[index_name]["columns"].append(column_name)
+            # Columns in the STORING clause aren't part of the index key.
+            if ordinal_position is None:
+                constraints[index_name]["storing"].append(column_name)
+            else:
+                constraints[index_name]["columns"].append(column_name)
+                constraints[index_name]["orders"].append(ordering)
             constraints[index_name]["index"] = True
-            constraints[index_name]["orders"].append(ordering)
             # Index_type for PRIMARY KEY is 'PRIMARY_KEY' and NOT 'PRIMARY KEY'
             is_primary_key = index_type == "PRIMARY_KEY"
             constraints[index_name]["primary_key"] = is_primary_key
@@ -299,5 +404,6 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                 index_type if is_primary_key else Index.suffix
             )
             constraints[index_name]["unique"] = is_unique
+            constraints[index_name]["null_filtered"] = is_null_filtered
 
         return constraints
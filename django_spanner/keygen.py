@@ -0,0 +1,198 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+"""Primary key generators used by the monkey-patched AutoField."""
+
+import itertools
+import os
+import random
+import struct
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+
+from .utils import GeneratedKey
+
+# Keys are positive INT64 values.
+KEY_BITS = 63
+KEY_MASK = (1 << KEY_BITS) - 1
+
+DEFAULT_KEY_GENERATOR = "django_spanner.keygen.RandomKeyGenerator"
+
+# Each byte value with its bits reversed, for bytes.translate().
+REVERSED_BYTES = bytes(
+    sum(((byte >> bit) & 1) << (7 - bit) for bit in range(8))
+    for byte in range(256)
+)
+
+
+class KeyGenerator:
+    """
+    Base class of primary key generators. Keys are handed out from blocks of
+    `block_size` keys that are allocated at once by `allocate()`.
+
+    Keys must be spread uniformly over the INT64 range so that inserts don't
+    hotspot on a single split.
+
+    :type block_size: int
+    :param block_size: (Optional) The number of keys to pre-allocate.
+    """
+
+    def __init__(self, block_size=64):
+        if block_size < 1:
+            raise ValueError("block_size must be a positive integer.")
+        self.block_size = block_size
+        self._block = []
+        self._lock = threading.Lock()
+
+    def next_key(self):
+        """Return a new primary key.
+
+        :rtype: :class:`~django_spanner.utils.GeneratedKey`
+        :returns: A key that hasn't been handed out before.
+        """
+        try:
+            return self._block.pop()
+        except IndexError:
+            with self._lock:
+                if not self._block:
+                    self._block = self.allocate(self.block_size)
+            return self.next_key()
+
+    def allocate(self, count):
+        """Allocate a block of new primary keys.
+
+        :type count: int
+        :param count: The number of keys to allocate.
+
+        :rtype: list
+        :returns: A list of :class:`~django_spanner.utils.GeneratedKey`.
+        """
+        raise NotImplementedError
+
+
+class RandomKeyGenerator(KeyGenerator):
+    """
+    Generate uniformly random keys from the operating system's CSPRNG, so
+    that keys can't be predicted from earlier ones. A whole block is sliced
+    from a single `os.urandom()` call instead of a call per key.
+    """
+
+    def allocate(self, count):
+        return [
+            GeneratedKey(value & KEY_MASK)
+            for value in struct.unpack("<%dQ" % count, os.urandom(8 * count))
+        ]
+
+
+class BitReversedKeyGenerator(KeyGenerator):
+    """
+    Generate keys from a per-process counter prefixed with a node id, with
+    the bits reversed. The fastest changing bits of the counter become the
+    most significant bits of the key, so consecutive keys land on different
+    splits (like Spanner's bit-reversed sequences).
+
+    :type block_size: int
+    :param block_size: (Optional) The number of keys to pre-allocate.
+
+    :type node_id: int
+    :param node_id: (Optional) An id that is unique to this process. A random
+                    one is picked if it's not given.
+
+    :type node_bits: int
+    :param node_bits: (Optional) The number of key bits used by the node id.
+    """
+
+    def __init__(self, block_size=64, node_id=None, node_bits=16):
+        super().__init__(block_size=block_size)
+        if not 0 < node_bits < KEY_BITS:
+            raise ValueError("node_bits must be between 1 and 62.")
+        rand = random.SystemRandom()
+        if node_id is None:
+            node_id = rand.getrandbits(node_bits)
+        if not 0 <= node_id < 1 << node_bits:
+            raise ValueError("node_id must fit in %d bits." % node_bits)
+        counter_bits = KEY_BITS - node_bits
+        self._prefix = node_id << counter_bits
+        # Start at a random point so that processes that share a node id
+        # are unlikely to generate the same keys.
+        self._counter = itertools.count(
+            rand.randrange(1, 1 << (counter_bits - 1))
+        )
+
+    def allocate(self, count):
+        prefix, counter = self._prefix, self._counter
+        # Reversing the bits of each byte of a little-endian value and
+        # reading it as big-endian reverses all of its 64 bits. Keys have 63
+        # bits, so the result is shifted by one.
+        data = struct.pack(
+            "<%dQ" % count, *[prefix | next(counter) for _ in range(count)]
+        ).translate(REVERSED_BYTES)
+        return [
+            GeneratedKey(value >> 1)
+            for value in struct.unpack(">%dQ" % count, data)
+        ]
+
+
+_key_generator = None
+_key_generator_lock = threading.Lock()
+
+
+def get_key_generator():
+    """
+    Return the process-wide key generator configured by the
+    `SPANNER_KEY_GENERATOR` (dotted path) and
+    `SPANNER_KEY_GENERATOR_OPTIONS` (keyword arguments) settings.
+
+    :rtype: :class:`KeyGenerator`
+    :returns: The configured key generator.
+    """
+    global _key_generator
+    if _key_generator is None:
+        with _key_generator_lock:
+            if _key_generator is None:
+                generator_class = import_string(
+                    getattr(
+                        settings,
+                        "SPANNER_KEY_GENERATOR",
+                        DEFAULT_KEY_GENERATOR,
+                    )
+                )
+                _key_generator = generator_class(
+                    **getattr(settings, "SPANNER_KEY_GENERATOR_OPTIONS", {})
+                )
+    return _key_generator
+
+
+def reset_key_generator(**kwargs):
+    """
+    Drop the key generator so that it's recreated on next use. Pre-allocated
+    keys must not be shared with forked processes.
+    """
+    global _key_generator
+    if kwargs.get("setting") in (
+        None,
+        "SPANNER_KEY_GENERATOR",
+        "SPANNER_KEY_GENERATOR_OPTIONS",
+    ):
+        _key_generator = None
+
+
+def _reset_after_fork():
+    """
+    Drop the key generator in a forked child. The lock is recreated since
+    another thread of the parent may have held it at the time of the fork.
+    """
+    global _key_generator_lock
+    _key_generator_lock = threading.Lock()
+    reset_key_generator()
+
+
+setting_changed.connect(reset_key_generator)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
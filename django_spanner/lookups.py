@@ -4,7 +4,13 @@
 # license that can be found in the LICENSE file or at
 # https://developers.google.com/open-source/licenses/bsd
 
-from django.db.models import DecimalField
+import datetime
+
+import pytz
+from django.conf import settings
+from django.db.models import DateField, DateTimeField
+from django.db.models.functions import Extract, Lower, TruncDate
+from django.db.models.functions.datetime import TruncBase
 from django.db.models.lookups import (
     Contains,
     EndsWith,
@@ -15,16 +21,86 @@ from django.db.models.lookups import (
     IEndsWith,
     IExact,
     IRegex,
+    In,
     IStartsWith,
     LessThan,
     LessThanOrEqual,
+    Lookup,
     Regex,
     StartsWith,
+    YearGt,
+    YearGte,
+    YearLt,
+    YearLte,
 )
+from django.utils import timezone
+from django.utils.datastructures import OrderedSet
+
+
+def _process_text_lhs(lookup, compiler, connection, lower=False):
+    """Compile the left-hand side of a text lookup.
+
+    String columns are compiled without a cast so that an index on the
+    column, or on a generated `LOWER()` column, can serve the lookup.
+
+    :type lookup: :class:`~django.db.models.lookups.Lookup`
+    :param lookup: A text lookup.
+
+    :type compiler: :class:`~django_spanner.compiler.SQLCompilerst`
+    :param compiler: The query compiler responsible for generating the query.
+
+    :type connection: :class:`~google.cloud.spanner_dbapi.connection.Connection`
+    :param connection: The Spanner database connection used for the current
+                       query.
+
+    :type lower: bool
+    :param lower: (Optional) Lowercase the value.
+
+    :rtype: tuple[str, list]
+    :returns: A tuple of the SQL and parameters.
+    """
+    if (lookup.lhs.output_field.db_type(connection) or "").startswith(
+        "STRING"
+    ):
+        sql, params = compiler.compile(
+            Lower(lookup.lhs) if lower else lookup.lhs
+        )
+        return sql, list(params)
+    # process_lhs() casts the value to a string.
+    sql, params = lookup.process_lhs(compiler, connection)
+    if lower:
+        sql = "LOWER(%s)" % sql
+    return sql, list(params)
+
+
+def _process_text_rhs(lookup, compiler, connection):
+    """Compile the right-hand side of a text lookup as a plain string,
+    skipping the pattern escaping of Django's lookups.
+
+    :type lookup: :class:`~django.db.models.lookups.Lookup`
+    :param lookup: A text lookup.
+
+    :type compiler: :class:`~django_spanner.compiler.SQLCompilerst`
+    :param compiler: The query compiler responsible for generating the query.
+
+    :type connection: :class:`~google.cloud.spanner_dbapi.connection.Connection`
+    :param connection: The Spanner database connection used for the current
+                       query.
+
+    :rtype: tuple[str, list]
+    :returns: A tuple of the SQL and parameters.
+    """
+    sql, params = Lookup.process_rhs(lookup, compiler, connection)
+    if lookup.rhs_is_direct_value() and not lookup.bilateral_transforms:
+        # Match the string cast of the column, e.g. for integer__iexact=1.
+        params = [str(param) for param in params]
+    return sql, list(params)
 
 
 def contains(self, compiler, connection):
-    """A method to extend Django Contains and IContains classes.
+    """A method to extend Django Contains and IContains classes. Compiled to
+    `LIKE` with the pattern escaped by
+    :meth:`~django_spanner.operations.DatabaseOperations.prep_for_like_query`.
 
     :type self: :class:`~django.db.models.lookups.Contains` or
                 :class:`~django.db.models.lookups.IContains`
@@ -43,36 +119,29 @@ def contains(self, compiler, connection):
     :rtype: tuple[str, str]
     :returns: A tuple of the SQL request and parameters.
     """
-    lhs_sql, params = self.process_lhs(compiler, connection)
+    is_icontains = self.lookup_name.startswith("i")
+    lhs_sql, params = _process_text_lhs(
+        self, compiler, connection, lower=is_icontains
+    )
     rhs_sql, rhs_params = self.process_rhs(compiler, connection)
     params.extend(rhs_params)
-    is_icontains = self.lookup_name.startswith("i")
-    if self.rhs_is_direct_value() and params and not self.bilateral_transforms:
-        rhs_sql = self.get_rhs_op(connection, rhs_sql)
-        # Chop the leading and trailing percent signs that Django adds to the
-        # param since this isn't a LIKE query as Django expects.
-        params[0] = params[0][1:-1]
-        # Add the case insensitive flag for icontains.
-        if is_icontains:
-            params[0] = "(?i)" + params[0]
-        # rhs_sql is REGEXP_CONTAINS(%s, %%s), and lhs_sql is the column name.
-        return rhs_sql % lhs_sql, params
-    else:
-        # rhs_sql is the expression/column to use as the base of the regular
-        # expression.
-        if is_icontains:
-            rhs_sql = "CONCAT('(?i)', " + rhs_sql + ")"
-        return (
-            "REGEXP_CONTAINS(%s, %s)"
-            % (lhs_sql, connection.pattern_esc.format(rhs_sql)),
-            params,
+    if not self.rhs_is_direct_value() or self.bilateral_transforms:
+        # rhs_sql is the expression/column to search for. Escape it on the
+        # database side.
+        rhs_sql = "CONCAT('%%%%', %s, '%%%%')" % connection.pattern_esc.format(
+            rhs_sql
         )
+    if is_icontains:
+        rhs_sql = "LOWER(%s)" % rhs_sql
+    return "%s LIKE %s" % (lhs_sql, rhs_sql), params
 
 
 def iexact(self, compiler, connection):
-    """A method to extend Django IExact class. Case-insensitive exact match.
-    If the value provided for comparison is None, it will be interpreted as
-    an SQL NULL.
+    """A method to extend Django IExact class. Case-insensitive exact match,
+    compiled to `LOWER(lhs) = LOWER(rhs)` so that it can be served by an
+    index on a generated `LOWER()` column (see
+    :class:`~django_spanner.fields.GeneratedField`). If the value provided
+    for comparison is None, it will be interpreted as an SQL NULL.
 
     :type self: :class:`~django.db.models.lookups.IExact`
     :param self: the instance of the class that owns this method.
@@ -90,20 +159,10 @@ def iexact(self, compiler, connection):
     :rtype: tuple[str, str]
     :returns: A tuple of the SQL request and parameters.
     """
-    lhs_sql, params = self.process_lhs(compiler, connection)
-    rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+    lhs_sql, params = _process_text_lhs(self, compiler, connection, lower=True)
+    rhs_sql, rhs_params = _process_text_rhs(self, compiler, connection)
     params.extend(rhs_params)
-    rhs_sql = self.get_rhs_op(connection, rhs_sql)
-    # Wrap the parameter in ^ and $ to restrict the regex to an exact match.
-    if self.rhs_is_direct_value() and params and not self.bilateral_transforms:
-        params[0] = "^(?i)%s$" % params[0]
-    else:
-        # lhs_sql is the expression/column to use as the regular expression.
-        # Use concat to make the value case-insensitive.
-        lhs_sql = "CONCAT('^(?i)', " + lhs_sql + ", '$')"
-        rhs_sql = rhs_sql.replace("%%s", "%s")
-    # rhs_sql is REGEXP_CONTAINS(%s, %%s), and lhs_sql is the column name.
-    return rhs_sql % lhs_sql, params
+    return "%s = LOWER(%s)" % (lhs_sql, rhs_sql), params
 
 
 def regex(self, compiler, connection):
@@ -148,7 +207,8 @@ def regex(self, compiler, connection):
 
 def startswith_endswith(self, compiler, connection):
     """A method to extend Django StartsWith, IStartsWith, EndsWith, and
-    IEndsWith classes.
+    IEndsWith classes. Compiled to `STARTS_WITH` or `ENDS_WITH`, which take the
+    value literally, so that a prefix search can be served by an index.
 
     :type self: :class:`~django.db.models.lookups.StartsWith` or
                 :class:`~django.db.models.lookups.IStartsWith` or
@@ -169,45 +229,23 @@ def startswith_endswith(self, compiler, connection):
     :rtype: tuple[str, str]
     :returns: A tuple of the SQL request and parameters.
     """
-    lhs_sql, params = self.process_lhs(compiler, connection)
-    rhs_sql, rhs_params = self.process_rhs(compiler, connection)
-    params.extend(rhs_params)
-    is_startswith = "startswith" in self.lookup_name
     is_endswith = "endswith" in self.lookup_name
     is_insensitive = self.lookup_name.startswith("i")
-    # Chop the leading (endswith) or trailing (startswith) percent sign that
-    # Django adds to the param since this isn't a LIKE query as Django expects.
-    if self.rhs_is_direct_value() and params and not self.bilateral_transforms:
-        rhs_sql = self.get_rhs_op(connection, rhs_sql)
-        if is_endswith:
-            params[0] = str(params[0][1:]) + "$"
-        else:
-            params[0] = "^" + str(params[0][:-1])
-        # Add the case insensitive flag for istartswith or iendswith.
-        if is_insensitive:
-            params[0] = "(?i)" + params[0]
-        # rhs_sql is REGEXP_CONTAINS(%s, %%s), and lhs_sql is the column name.
-        return rhs_sql % lhs_sql, params
-    else:
-        # rhs_sql is the expression/column to use as the base of the regular
-        # expression.
-        sql = "CONCAT('"
-        if is_startswith:
-            sql += "^"
-        if is_insensitive:
-            sql += "(?i)"
-        sql += "', " + rhs_sql
-        if is_endswith:
-            sql += ", '$'"
-        sql += ")"
-        return (
-            "REGEXP_CONTAINS(%s, %s)"
-            % (lhs_sql, connection.pattern_esc.format(sql)),
-            params,
-        )
+    lhs_sql, params = _process_text_lhs(
+        self, compiler, connection, lower=is_insensitive
+    )
+    rhs_sql, rhs_params = _process_text_rhs(self, compiler, connection)
+    params.extend(rhs_params)
+    if is_insensitive:
+        rhs_sql = "LOWER(%s)" % rhs_sql
+    return (
+        "%s(%s, %s)"
+        % ("ENDS_WITH" if is_endswith else "STARTS_WITH", lhs_sql, rhs_sql),
+        params,
+    )
 
 
-def cast_param_to_float(self, compiler, connection):
+def cast_param_to_int(self, compiler, connection):
     """A method to extend Django Exact, GreaterThan, GreaterThanOrEqual,
     LessThan, and LessThanOrEqual classes.
 
@@ -229,17 +267,12 @@ def cast_param_to_float(self, compiler, connection):
                        query.
 
     :rtype: tuple[str, str]
-    :returns: A tuple of the SQL request and float parameters.
+    :returns: A tuple of the SQL request and parameters.
     """
     sql, params = self.as_sql(compiler, connection)
     if params:
-        # Cast to DecimaField lookup values to float because
-        # google.cloud.spanner_v1._helpers._make_value_pb() doesn't serialize
-        # decimal.Decimal.
-        if isinstance(self.lhs.output_field, DecimalField):
-            params[0] = float(params[0])
         # Cast remote field lookups that must be integer but come in as string.
-        elif hasattr(self.lhs.output_field, "get_path_info"):
+        if hasattr(self.lhs.output_field, "get_path_info"):
             for i, field in enumerate(
                 self.lhs.output_field.get_path_info()[-1].target_fields
             ):
@@ -250,19 +283,253 @@ def cast_param_to_float(self, compiler, connection):
     return sql, params
 
 
+# The lengths of the periods that datetimes can be truncated to, which don't
+# depend on the time zone.
+FIXED_PERIODS = {
+    "hour": datetime.timedelta(hours=1),
+    "minute": datetime.timedelta(minutes=1),
+    "second": datetime.timedelta(seconds=1),
+}
+PERIOD_MONTHS = {"year": 12, "quarter": 3, "month": 1}
+
+
+def _truncate(value, kind):
+    """Truncate a naive datetime to the start of a period.
+
+    :type value: :class:`datetime.datetime`
+    :param value: A naive datetime.
+
+    :type kind: str
+    :param kind: The period: year, quarter, month, week, day, hour, minute
+                 or second.
+
+    :rtype: :class:`datetime.datetime`
+    :returns: The start of the period that contains `value`.
+    """
+    if kind == "second":
+        return value.replace(microsecond=0)
+    if kind == "minute":
+        return value.replace(second=0, microsecond=0)
+    if kind == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if kind == "week":
+        return value - datetime.timedelta(days=value.weekday())
+    if kind in PERIOD_MONTHS:
+        months = PERIOD_MONTHS[kind]
+        month = (value.month - 1) // months * months + 1
+        return value.replace(month=month, day=1)
+    return value
+
+
+def _period_bounds(lookup):
+    """Return the half-open range of the source of a truncated or extracted
+    date or datetime that is equal to the right-hand side of the lookup.
+
+    :type lookup: :class:`~django.db.models.lookups.Lookup`
+    :param lookup: A comparison with a constant.
+
+    :rtype: tuple
+    :returns: The (start, end) values of the source expression, or None if
+              the lookup can't be rewritten.
+    """
+    lhs, value = lookup.lhs, lookup.rhs
+    if isinstance(lhs, TruncDate):
+        kind = "day"
+    elif isinstance(lhs, TruncBase) and isinstance(
+        lhs.output_field, (DateTimeField, DateField)
+    ):
+        kind = lhs.kind
+    elif isinstance(lhs, Extract) and lhs.lookup_name == "year":
+        kind = "year"
+        value = datetime.datetime(int(value), 1, 1)
+    else:
+        return None
+    source_field = lhs.lhs.output_field
+    if isinstance(source_field, DateTimeField):
+        if not isinstance(lhs.output_field, DateTimeField) and not isinstance(
+            lhs, (TruncDate, Extract)
+        ):
+            # Spanner casts TIMESTAMP to DATE in its default time zone.
+            return None
+        tzinfo = None
+        if settings.USE_TZ:
+            tzinfo = timezone.get_current_timezone()
+            if lhs.tzinfo is not None and not isinstance(lhs, TruncDate):
+                tzinfo = lhs.tzinfo
+    elif isinstance(source_field, DateField):
+        if kind in FIXED_PERIODS:
+            return None
+        tzinfo = None
+    else:
+        return None
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value, tzinfo or timezone.utc)
+    elif isinstance(value, datetime.date):
+        value = datetime.datetime.combine(value, datetime.time())
+    else:
+        return None
+    start = _truncate(value, kind)
+    if start != value:
+        # The truncated values are never equal to the constant.
+        return None
+    if kind in PERIOD_MONTHS:
+        months = start.month - 1 + PERIOD_MONTHS[kind]
+        end = start.replace(
+            year=start.year + months // 12, month=months % 12 + 1
+        )
+    elif kind == "week":
+        end = start + datetime.timedelta(days=7)
+    else:
+        end = start + FIXED_PERIODS.get(kind, datetime.timedelta(days=1))
+    if not isinstance(source_field, DateTimeField):
+        return start.date(), end.date()
+    if tzinfo is not None:
+        try:
+            start = timezone.make_aware(start, tzinfo)
+            if kind in FIXED_PERIODS:
+                end = start + FIXED_PERIODS[kind]
+            else:
+                end = timezone.make_aware(end, tzinfo)
+        except pytz.InvalidTimeError:
+            # The bound doesn't exist or is ambiguous in the time zone.
+            return None
+    return start, end
+
+
+def comparison(self, compiler, connection):
+    """A method to extend Django Exact, GreaterThan, GreaterThanOrEqual,
+    LessThan, and LessThanOrEqual classes, and the Year* lookups of `__year`.
+
+    Comparisons of a truncated date or datetime (`__date`, `Trunc()`) or of
+    an extracted year (`__year`) with a constant are rewritten to a half-open
+    range of the source column, which an index on the column can serve. The
+    range is computed in the time zone the SQL functions would use. Other
+    comparisons are compiled by :func:`cast_param_to_int`.
+
+    :type self: :class:`~django.db.models.lookups.Exact` or
+                :class:`~django.db.models.lookups.GreaterThan` or
+                :class:`~django.db.models.lookups.GreaterThanOrEqual` or
+                :class:`~django.db.models.lookups.LessThan` or
+                :class:`~django.db.models.lookups.LessThanOrEqual`
+    :param self: the instance of the class that owns this method.
+
+    :type compiler: :class:`~django_spanner.compiler.SQLCompilerst`
+    :param compiler: The query compiler responsible for generating the query.
+                     Must have a compile method, returning a (sql, [params])
+                     tuple. Calling compiler(value) will return a quoted
+                     `value`.
+
+    :type connection: :class:`~google.cloud.spanner_dbapi.connection.Connection`
+    :param connection: The Spanner database connection used for the current
+                       query.
+
+    :rtype: tuple[str, str]
+    :returns: A tuple of the SQL request and parameters.
+    """
+    bounds = None
+    if (
+        self.rhs_is_direct_value()
+        and self.rhs is not None
+        and not self.bilateral_transforms
+    ):
+        try:
+            bounds = _period_bounds(self)
+        except (OverflowError, ValueError):
+            # The range is outside of the supported dates.
+            pass
+    if bounds is None:
+        return cast_param_to_int(self, compiler, connection)
+    source = self.lhs.lhs
+    lhs_sql, lhs_params = compiler.compile(source)
+    start, end = (
+        source.output_field.get_db_prep_value(bound, connection)
+        for bound in bounds
+    )
+    if self.lookup_name == "exact":
+        return (
+            "(%s >= %%s AND %s < %%s)" % (lhs_sql, lhs_sql),
+            [*lhs_params, start, *lhs_params, end],
+        )
+    operator, bound = {
+        "gt": (">=", end),
+        "gte": (">=", start),
+        "lt": ("<", start),
+        "lte": ("<", end),
+    }[self.lookup_name]
+    return "%s %s %%s" % (lhs_sql, operator), [*lhs_params, bound]
+
+
+def in_list(self, compiler, connection):
+    """A method to extend Django In class.
+
+    A list of values is padded to the next power of two by repeating its
+    last value, which doesn't change the result. Lists of similar lengths
+    then compile to the same SQL, so Spanner can reuse the statement's query
+    plan: 3 to 4 values share `IN (%s, %s, %s, %s)`.
+
+    Lists aren't padded beyond the connection's `max_query_params`, or when
+    the compiler disables padding because the padded statement would exceed
+    it; see :meth:`~django_spanner.compiler.SQLCompiler.as_sql`.
+
+    :type self: :class:`~django.db.models.lookups.In`
+    :param self: the instance of the class that owns this method.
+
+    :type compiler: :class:`~django_spanner.compiler.SQLCompilerst`
+    :param compiler: The query compiler responsible for generating the query.
+                     Must have a compile method, returning a (sql, [params])
+                     tuple. Calling compiler(value) will return a quoted
+                     `value`.
+
+    :type connection: :class:`~google.cloud.spanner_dbapi.connection.Connection`
+    :param connection: The Spanner database connection used for the current
+                       query.
+
+    :rtype: tuple[str, str]
+    :returns: A tuple of the SQL request and parameters.
+    """
+    sql, params = self.as_sql(compiler, connection)
+    if not self.rhs_is_direct_value() or not compiler.pad_in_lists:
+        return sql, params
+    try:
+        count = len(OrderedSet(self.rhs))
+    except TypeError:  # Unhashable items in self.rhs
+        count = len(self.rhs)
+    size = 1 << (count - 1).bit_length()
+    placeholder = "(%s)" % ", ".join(["%s"] * count)
+    # Values that are expressions have placeholders of their own. The
+    # padding counts against the limit together with the lookup's other
+    # parameters.
+    if (
+        size == count
+        or size + len(params) - count > connection.features.max_query_params
+        or not (sql.endswith(placeholder) and len(params) >= count)
+    ):
+        return sql, params
+    compiler.in_list_padding += size - count
+    sql = sql[: -len(placeholder)] + "(%s)" % ", ".join(["%s"] * size)
+    return sql, [*params, *[params[-1]] * (size - count)]
+
+
 def register_lookups():
     """Registers the above methods with the corersponding Django classes."""
     Contains.as_spanner = contains
     IContains.as_spanner = contains
     IExact.as_spanner = iexact
+    In.as_spanner = in_list
     Regex.as_spanner = regex
     IRegex.as_spanner = regex
     EndsWith.as_spanner = startswith_endswith
     IEndsWith.as_spanner = startswith_endswith
     StartsWith.as_spanner = startswith_endswith
     IStartsWith.as_spanner = startswith_endswith
-    Exact.as_spanner = cast_param_to_float
-    GreaterThan.as_spanner = cast_param_to_float
-    GreaterThanOrEqual.as_spanner = cast_param_to_float
-    LessThan.as_spanner = cast_param_to_float
-    LessThanOrEqual.as_spanner = cast_param_to_float
+    Exact.as_spanner = comparison
+    GreaterThan.as_spanner = comparison
+    GreaterThanOrEqual.as_spanner = comparison
+    LessThan.as_spanner = comparison
+    LessThanOrEqual.as_spanner = comparison
+    YearGt.as_spanner = comparison
+    YearGte.as_spanner = comparison
+    YearLt.as_spanner = comparison
+    YearLte.as_spanner = comparison
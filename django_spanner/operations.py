@@ -5,22 +5,26 @@
 # https://developers.google.com/open-source/licenses/bsd
 
 import os
-import re
-from base64 import b64decode
-from datetime import datetime, time
+from binascii import a2b_base64
+from datetime import date, datetime, time
 from decimal import Decimal
 from uuid import UUID
 
 from django.conf import settings
 from django.db.backends.base.operations import BaseDatabaseOperations
+from django.db.backends.utils import format_number
 from django.db.utils import DatabaseError
 from django.utils import timezone
 from django.utils.duration import duration_microseconds
-from google.cloud.spanner_dbapi.parse_utils import (
-    DateStr,
-    TimestampStr,
-    escape_name,
-)
+from google.cloud.spanner_dbapi.parse_utils import escape_name
+
+# Set by the Travis build script or by a developer running the Django tests,
+# before the backend is loaded.
+RUNNING_BACKEND_TESTS = os.environ.get("RUNNING_SPANNER_BACKEND_TESTS") == "1"
+
+# Quoted table and column names, by name. The set of names is finite, so the
+# cache isn't bounded.
+_quoted_names = {}
 
 
 class DatabaseOperations(BaseDatabaseOperations):
@@ -64,15 +68,25 @@ class DatabaseOperations(BaseDatabaseOperations):
 
         See: https://github.com/googleapis/python-spanner-django/issues/204
 
+        The quoted names are cached for the whole process, which also serves
+        the schema editor and introspection since they quote names with this
+        method.
+
         :type name: str
         :param name: The Quota name.
 
         :rtype: :class:`str`
         :returns: Name escaped if it has to be escaped.
         """
-        if os.environ.get("RUNNING_SPANNER_BACKEND_TESTS") == "1":
-            name = name.replace(" ", "_").replace("-", "_")
-        return escape_name(name)
+        try:
+            return _quoted_names[name]
+        except KeyError:
+            pass
+        quoted = name
+        if RUNNING_BACKEND_TESTS:
+            quoted = quoted.replace(" ", "_").replace("-", "_")
+        quoted = _quoted_names[name] = escape_name(quoted)
+        return quoted
 
     def bulk_batch_size(self, fields, objs):
         """
@@ -108,6 +122,49 @@ class DatabaseOperations(BaseDatabaseOperations):
         values_sql = ", ".join("(%s)" % sql for sql in placeholder_rows_sql)
         return "VALUES " + values_sql
 
+    def explain_query_prefix(self, format=None, **options):
+        """
+        Override the base class method. Spanner explains a query by running
+        it in a query mode instead of a prefix, so only the format and the
+        options are checked. The `analyze` option selects the PROFILE mode.
+
+        :type format: str
+        :param format: (Optional) The format of the output.
+
+        :raises: :class:`ValueError` if the format or an option is unknown.
+
+        :rtype: str
+        :returns: An empty prefix.
+        """
+        options.pop("analyze", None)
+        super().explain_query_prefix(format, **options)
+        return ""
+
+    def insert_statement(self, ignore_conflicts=False):
+        """
+        Override the base class method. Rows that would collide with an
+        existing primary key are skipped when `ignore_conflicts` is set.
+
+        :type ignore_conflicts: bool
+        :param ignore_conflicts: (Optional) Skip rows that already exist.
+
+        :rtype: str
+        :returns: The leading keywords of an `INSERT` statement.
+        """
+        if ignore_conflicts:
+            return "INSERT OR IGNORE INTO"
+        return super().insert_statement(ignore_conflicts=ignore_conflicts)
+
+    def upsert_statement(self):
+        """
+        Return the leading keywords of an `INSERT` statement that overwrites
+        the columns of rows which already exist with the same primary key.
+
+        :rtype: str
+        :returns: The leading keywords of an `INSERT OR UPDATE` statement.
+        """
+        return "INSERT OR UPDATE INTO"
+
     def sql_flush(self, style, tables, reset_sequences=False, allow_cascade=False):
         """
         Override the base class method. Returns a list of SQL statements
@@ -146,25 +203,31 @@ class DatabaseOperations(BaseDatabaseOperations):
             return []
 
     def adapt_datefield_value(self, value):
-        """Cast date argument into Spanner DB API DateStr format.
+        """Cast date argument into a date, which Spanner DB API sends as a
+        `DATE` parameter.
 
         :type value: object
         :param value: A date argument.
 
-        :rtype: :class:`~google.cloud.spanner_dbapi.types.DateStr`
+        :rtype: :class:`datetime.date`
         :returns: Formatted Date.
         """
         if value is None:
             return None
-        return DateStr(str(value))
+        # Spanner DB API only infers the type of instances of date itself,
+        # not of subclasses such as datetime.
+        if isinstance(value, date) and type(value) is not date:
+            value = date(value.year, value.month, value.day)
+        return value
 
     def adapt_datetimefield_value(self, value):
-        """Reformat time argument into Cloud Spanner.
+        """Reformat time argument into a naive datetime, which Spanner DB
+        API sends as a `TIMESTAMP` parameter.
 
         :type value: object
         :param value: A time argument.
 
-        :rtype: :class:`~google.cloud.spanner_dbapi.types.TimestampStr`
+        :rtype: :class:`datetime.datetime`
         :returns: Formatted Time.
         """
         if value is None:
@@ -181,16 +244,20 @@ class DatabaseOperations(BaseDatabaseOperations):
                     "The Cloud Spanner backend does not support "
                     "timezone-aware datetimes when USE_TZ is False."
                 )
-        return TimestampStr(value.isoformat(timespec="microseconds") + "Z")
+        # Likewise for subclasses of datetime such as DatetimeWithNanoseconds.
+        if type(value) is not datetime:
+            value = _naive_datetime(value)
+        return value
 
     def adapt_decimalfield_value(
         self, value, max_digits=None, decimal_places=None
     ):
         """
-        Convert value from decimal.Decimal into float, for a direct mapping
-        and correct serialization with RPCs to Cloud Spanner.
+        Round a decimal value to the field's decimal places and pass it to
+        the driver as a decimal.Decimal, which it sends as a `NUMERIC`
+        parameter.
 
-        :type value: :class:`~google.cloud.spanner_v1.types.Numeric`
+        :type value: :class:`Decimal`
         :param value: A decimal field value.
 
         :type max_digits: int
@@ -200,22 +267,24 @@ class DatabaseOperations(BaseDatabaseOperations):
         :param decimal_places: (Optional) The number of decimal places to store
                                with the number.
 
-        :rtype: float
+        :rtype: :class:`Decimal`
         :returns: Formatted value.
         """
         if value is None:
             return None
-        return float(value)
+        return Decimal(
+            format_number(_decimal(value), max_digits, decimal_places)
+        )
 
     def adapt_timefield_value(self, value):
         """
         Transform a time value to an object compatible with what is expected
         by the backend driver for time columns.
 
-        :type value: `datetime.datetime`
+        :type value: `datetime.time`
         :param value: A time field value.
 
-        :rtype: :class:`~google.cloud.spanner_dbapi.types.TimestampStr`
+        :rtype: :class:`datetime.datetime`
         :returns: Formatted Time.
         """
         if value is None:
@@ -224,9 +293,7 @@ class DatabaseOperations(BaseDatabaseOperations):
         if hasattr(value, "resolve_expression"):
             return value
         # Column is TIMESTAMP, so prefix a dummy date to the datetime.time.
-        return TimestampStr(
-            "0001-01-01T" + value.isoformat(timespec="microseconds") + "Z"
-        )
+        return datetime.combine(date.min, value.replace(tzinfo=None))
 
     def get_db_converters(self, expression):
         """Get a list of functions needed to convert field data.
@@ -246,11 +313,62 @@ class DatabaseOperations(BaseDatabaseOperations):
         elif internal_type == "TimeField":
             converters.append(self.convert_timefield_value)
         elif internal_type == "BinaryField":
-            converters.append(self.convert_binaryfield_value)
+            # LazyBinaryField decodes its values when they're used.
+            if not getattr(expression.output_field, "lazy_decoding", False):
+                converters.append(self.convert_binaryfield_value)
         elif internal_type == "UUIDField":
             converters.append(self.convert_uuidfield_value)
         return converters
 
+    def get_value_converter(self, converter):
+        """Return a one-argument version of a converter of
+        :meth:`get_db_converters`, which looks up settings once.
+
+        The returned function must not be called with None, which all of
+        these converters return unchanged.
+
+        :type converter: callable
+        :param converter: A converter returned by :meth:`get_db_converters`.
+
+        :rtype: callable
+        :returns: A function converting a value, or None if the converter
+                  isn't one of this class.
+        """
+        function = getattr(converter, "__func__", None)
+        if function is DatabaseOperations.convert_datetimefield_value:
+            if not settings.USE_TZ:
+                return _naive_datetime
+            tz = self.connection.timezone
+            if tz is timezone.utc:
+
+                def convert_datetime(value):
+                    return datetime(
+                        value.year,
+                        value.month,
+                        value.day,
+                        value.hour,
+                        value.minute,
+                        value.second,
+                        value.microsecond,
+                        tz,
+                    )
+
+                return convert_datetime
+
+            def convert_datetime(value):
+                return timezone.make_aware(_naive_datetime(value), tz)
+
+            return convert_datetime
+        if function is DatabaseOperations.convert_decimalfield_value:
+            return _decimal
+        if function is DatabaseOperations.convert_timefield_value:
+            return _time
+        if function is DatabaseOperations.convert_binaryfield_value:
+            return a2b_base64
+        if function is DatabaseOperations.convert_uuidfield_value:
+            return UUID
+        return None
+
     def convert_binaryfield_value(self, value, expression, connection):
         """Convert Spanner BinaryField value for Django.
 
@@ -268,8 +386,9 @@ class DatabaseOperations(BaseDatabaseOperations):
         """
         if value is None:
             return value
-        # Cloud Spanner stores bytes base64 encoded.
-        return b64decode(value)
+        # Cloud Spanner stores bytes base64 encoded. Unlike b64decode(),
+        # a2b_base64() decodes bytes and memoryviews without copying them.
+        return a2b_base64(value)
 
     def convert_datetimefield_value(self, value, expression, connection):
         """Convert Spanner DateTimeField value for Django.
@@ -293,15 +412,7 @@ class DatabaseOperations(BaseDatabaseOperations):
         # of datetime with tzinfo=UTC (which should be replaced with the
         # connection's timezone). Django doesn't support nanoseconds so that
         # part is ignored.
-        dt = datetime(
-            value.year,
-            value.month,
-            value.day,
-            value.hour,
-            value.minute,
-            value.second,
-            value.microsecond,
-        )
+        dt = _naive_datetime(value)
         return (
             timezone.make_aware(dt, self.connection.timezone)
             if settings.USE_TZ
@@ -311,7 +422,7 @@ class DatabaseOperations(BaseDatabaseOperations):
     def convert_decimalfield_value(self, value, expression, connection):
         """Convert Spanner DecimalField value for Django.
 
-        :type value: float
+        :type value: :class:`Decimal` or float
         :param value: A decimal field.
 
         :type expression: :class:`django.db.models.expressions.BaseExpression`
@@ -325,8 +436,7 @@ class DatabaseOperations(BaseDatabaseOperations):
         """
         if value is None:
             return value
-        # Cloud Spanner returns a float.
-        return Decimal(str(value))
+        return _decimal(value)
 
     def convert_timefield_value(self, value, expression, connection):
         """Convert Spanner TimeField value for Django.
@@ -345,8 +455,7 @@ class DatabaseOperations(BaseDatabaseOperations):
         """
         if value is None:
             return value
-        # Convert DatetimeWithNanoseconds to time.
-        return time(value.hour, value.minute, value.second, value.microsecond)
+        return _time(value)
 
     def convert_uuidfield_value(self, value, expression, connection):
         """Convert a UUID field to Cloud Spanner.
@@ -636,19 +745,6 @@ class DatabaseOperations(BaseDatabaseOperations):
             return "CAST(%s AS STRING)"
         return "%s"
 
-    def prep_for_like_query(self, x):
-        """Lookups that use this method use REGEXP_CONTAINS instead of LIKE.
-
-        :type x: str
-        :param x: A query to prepare.
-
-        :rtype: str
-        :returns: A prepared query.
-        """
-        return re.escape(str(x))
-
-    prep_for_iexact_query = prep_for_like_query
-
     def no_limit_value(self):
         """The largest INT64: (2**63) - 1
 
@@ -657,10 +753,56 @@ class DatabaseOperations(BaseDatabaseOperations):
         """
         return 9223372036854775807
 
+    def limit_offset_sql(self, low_mark, high_mark):
+        """Return LIMIT/OFFSET SQL clause with placeholders, so that slices
+        of a query share the statement's query plan. The compiler adds the
+        values to the parameters.
+
+        :type low_mark: int
+        :param low_mark: The index of the first row.
+
+        :type high_mark: int
+        :param high_mark: The index after the last row, or None.
+
+        :rtype: str
+        :returns: The LIMIT/OFFSET SQL clause.
+        """
+        limit, offset = self._get_limit_offset_params(low_mark, high_mark)
+        return "%s%s" % (
+            " LIMIT %s" if limit else "",
+            " OFFSET %s" if offset else "",
+        )
+
     def _get_limit_offset_params(self, low_mark, high_mark):
         limit, offset = super()._get_limit_offset_params(low_mark, high_mark)
-        if offset and limit == self.connection.ops.no_limit_value():
+        if offset and limit == self.no_limit_value():
             # Subtract offset from the limit to avoid an INT64 overflow error
             # from Cloud Spanner.
             limit -= offset
         return limit, offset
+
+
+def _naive_datetime(value):
+    """Convert a DatetimeWithNanoseconds to a naive datetime."""
+    return datetime(
+        value.year,
+        value.month,
+        value.day,
+        value.hour,
+        value.minute,
+        value.second,
+        value.microsecond,
+    )
+
+
+def _decimal(value):
+    # NUMERIC columns are read as Decimal, FLOAT64 columns created before
+    # DecimalField was mapped to NUMERIC, and FLOAT64 expressions, as float.
+    if type(value) is Decimal:
+        return value
+    return Decimal(str(value))
+
+
+def _time(value):
+    # Convert DatetimeWithNanoseconds to time.
+    return time(value.hour, value.minute, value.second, value.microsecond)
@@ -0,0 +1,596 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+"""Spanner-specific extensions of Django's QuerySet and Model saving."""
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import NotSupportedError, connections, router
+from django.db.models import Model, sql
+from django.db.models.manager import BaseManager
+from django.db.models.query import QuerySet
+from django.db.models.sql.where import AND
+
+from .utils import (
+    GeneratedKey,
+    check_key_fields_not_updated,
+    estimate_mutations,
+    get_primary_key_fields,
+)
+
+_bulk_create = QuerySet.bulk_create
+_bulk_update = QuerySet.bulk_update
+_model_from_db = Model.from_db.__func__
+_model_save = Model.save
+_model_save_table = Model._save_table
+_model_do_insert = Model._do_insert
+_model_do_update = Model._do_update
+
+# The attnames of the key columns of each model other than its primary key.
+_key_attnames = {}
+
+# The value of `FORCE_INDEX` that reads the table instead of an index.
+BASE_TABLE_INDEX = "_BASE_TABLE"
+JOIN_METHODS = (
+    "HASH_JOIN",
+    "APPLY_JOIN",
+    "MERGE_JOIN",
+    "PUSH_BROADCAST_HASH_JOIN",
+)
+
+
+class KeyIn:
+    """
+    A WHERE clause node that matches rows whose key columns are equal to one
+    of the given key tuples: `(col1, col2) IN ((%s, %s), (%s, %s))`.
+
+    :type cols: list
+    :param cols: The :class:`~django.db.models.expressions.Col` of each key
+                 column.
+
+    :type keys: list
+    :param keys: Tuples of key values, in the order of `cols`.
+    """
+
+    contains_aggregate = False
+    contains_over_clause = False
+
+    def __init__(self, cols, keys):
+        self.cols = cols
+        self.keys = keys
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(
+            [col.relabeled_clone(change_map) for col in self.cols], self.keys
+        )
+
+    def as_sql(self, compiler, connection):
+        if not self.keys:
+            raise EmptyResultSet
+        columns = [compiler.compile(col)[0] for col in self.cols]
+        params = []
+        for key in self.keys:
+            params.extend(
+                col.target.get_db_prep_value(value, connection)
+                for col, value in zip(self.cols, key)
+            )
+        row = "(%s)" % ", ".join(["%s"] * len(columns))
+        return (
+            "(%s) IN (%s)"
+            % (", ".join(columns), ", ".join([row] * len(self.keys))),
+            params,
+        )
+
+
+def filter_keys(self, keys, fields=None):
+    """
+    A method to extend Django QuerySet class. Filters the rows whose key
+    matches one of the given key tuples, which Spanner serves by reading
+    ranges of the table's primary key.
+
+    :type self: :class:`~django.db.models.query.QuerySet`
+    :param self: the instance of the class that owns this method.
+
+    :type keys: list
+    :param keys: Tuples of key values.
+
+    :type fields: list
+    :param fields: (Optional) The names of the key fields. Defaults to the
+                   fields of the table's primary key.
+
+    :raises: :class:`ValueError` if a key doesn't have a value per field.
+
+    :rtype: :class:`~django.db.models.query.QuerySet`
+    :returns: A filtered QuerySet.
+    """
+    if fields is None:
+        key_fields = get_primary_key_fields(self.model)
+    else:
+        key_fields = [self.model._meta.get_field(name) for name in fields]
+    keys = [tuple(key) for key in keys]
+    for key in keys:
+        if len(key) != len(key_fields):
+            raise ValueError(
+                "Key %r doesn't have a value for each of %s."
+                % (key, ", ".join(field.name for field in key_fields))
+            )
+    clone = self._chain()
+    alias = clone.query.get_initial_alias()
+    clone.query.where.add(
+        KeyIn([field.get_col(alias) for field in key_fields], keys), AND
+    )
+    return clone
+
+
+def spanner_hints(self, force_index=None, join_method=None, parallelism=None):
+    """
+    A method to extend Django QuerySet class. Adds Spanner hints to the
+    query, which steer the optimizer's plan:
+
+    * `force_index` reads the QuerySet's table through the given secondary
+      index, or `_BASE_TABLE` for the table itself, with a table hint
+      `FROM table@{FORCE_INDEX=index}`,
+    * `join_method` adds a join hint `JOIN@{JOIN_METHOD=method}` to each
+      join of the query,
+    * `parallelism` adds the statement hint
+      `@{USE_ADDITIONAL_PARALLELISM=TRUE}`.
+
+    Hints of an earlier call are kept unless they're given again.
+
+    :type self: :class:`~django.db.models.query.QuerySet`
+    :param self: the instance of the class that owns this method.
+
+    :type force_index: str
+    :param force_index: (Optional) The name of the index to read.
+
+    :type join_method: str
+    :param join_method: (Optional) One of `HASH_JOIN`, `APPLY_JOIN`,
+                        `MERGE_JOIN` or `PUSH_BROADCAST_HASH_JOIN`.
+
+    :type parallelism: bool
+    :param parallelism: (Optional) Whether to use additional parallelism.
+
+    :raises: :class:`ValueError` if the join method is unknown or if the
+             table doesn't have the index.
+
+    :rtype: :class:`~django.db.models.query.QuerySet`
+    :returns: A QuerySet with the hints.
+    """
+    hints = {}
+    if force_index is not None:
+        table_name = self.model._meta.db_table
+        if force_index != BASE_TABLE_INDEX and not connections[
+            self.db
+        ].introspection.index_exists(table_name, force_index):
+            raise ValueError(
+                "Table %s doesn't have an index named %s."
+                % (table_name, force_index)
+            )
+        hints["FORCE_INDEX"] = force_index
+    if join_method is not None:
+        join_method = join_method.upper()
+        if join_method not in JOIN_METHODS:
+            raise ValueError(
+                "join_method must be one of %s." % ", ".join(JOIN_METHODS)
+            )
+        hints["JOIN_METHOD"] = join_method
+    if parallelism is not None:
+        hints["USE_ADDITIONAL_PARALLELISM"] = (
+            "TRUE" if parallelism else "FALSE"
+        )
+    clone = self._chain()
+    clone.query.spanner_hints = {
+        **getattr(clone.query, "spanner_hints", {}),
+        **hints,
+    }
+    return clone
+
+
+def _split_by_mutations(queryset, objs, field_names):
+    """
+    Split objects to write into chunks that each fit into a transaction with
+    the `SPANNER_AUTO_CHUNK_MUTATIONS` setting, in autocommit mode. Otherwise
+    check and count the mutations of all of them up front, see
+    :meth:`~django_spanner.base.DatabaseWrapper.add_mutations`. The
+    statements of the returned QuerySet aren't counted again.
+
+    :type queryset: :class:`~django.db.models.query.QuerySet`
+    :param queryset: The QuerySet writing the objects.
+
+    :type objs: list
+    :param objs: Model instances to write.
+
+    :type field_names: list
+    :param field_names: The names of the fields written.
+
+    :rtype: tuple
+    :returns: A clone of the QuerySet to write with, and lists of model
+              instances.
+    """
+    connection = connections[queryset.db]
+    per_row = estimate_mutations(queryset.model, field_names)
+    clone = queryset._chain()
+    # Copied to the queries of the writes, see SQLInsertCompiler and
+    # SQLUpdateCompiler.
+    clone.query.mutations_counted = True
+    if (
+        getattr(settings, "SPANNER_AUTO_CHUNK_MUTATIONS", False)
+        and connection.get_autocommit()
+    ):
+        size = max(connection.mutation_limit // per_row, 1)
+        return clone, [objs[i : i + size] for i in range(0, len(objs), size)]
+    connection.add_mutations(len(objs) * per_row)
+    return clone, [objs]
+
+
+def bulk_create(
+    self, objs, batch_size=None, ignore_conflicts=False, update_conflicts=False
+):
+    """
+    A method to extend Django QuerySet class. Adds an upsert mode to
+    `bulk_create()`.
+
+    With `ignore_conflicts=True` rows whose primary key already exists are
+    skipped (`INSERT OR IGNORE`), with `update_conflicts=True` they are
+    overwritten with the given values (`INSERT OR UPDATE`). Spanner only
+    detects conflicts on the primary key; unique index violations still
+    raise an error.
+
+    :type self: :class:`~django.db.models.query.QuerySet`
+    :param self: the instance of the class that owns this method.
+
+    :type objs: list
+    :param objs: Model instances to insert.
+
+    :type batch_size: int
+    :param batch_size: (Optional) The number of objects to insert per query.
+
+    :type ignore_conflicts: bool
+    :param ignore_conflicts: (Optional) Skip rows that already exist.
+
+    :type update_conflicts: bool
+    :param update_conflicts: (Optional) Overwrite rows that already exist.
+
+    :raises: :class:`ValueError` if both conflict modes are requested,
+             :class:`~django.db.utils.NotSupportedError` if the database
+             doesn't support upserts.
+
+    :rtype: list
+    :returns: The inserted model instances.
+    """
+    self._for_write = True
+    objs = list(objs)
+    if connections[self.db].vendor != "spanner":
+        return _bulk_create_upsert(
+            self, objs, batch_size, ignore_conflicts, update_conflicts
+        )
+    field_names = [field.name for field in self.model._meta.concrete_fields]
+    queryset, chunks = _split_by_mutations(self, objs, field_names)
+    if len(chunks) > 1:
+        # Every chunk is committed on its own.
+        return [
+            obj
+            for chunk in chunks
+            for obj in _bulk_create_upsert(
+                queryset, chunk, batch_size, ignore_conflicts, update_conflicts
+            )
+        ]
+    return _bulk_create_upsert(
+        queryset, objs, batch_size, ignore_conflicts, update_conflicts
+    )
+
+
+def _bulk_create_upsert(
+    self, objs, batch_size, ignore_conflicts, update_conflicts
+):
+    """Insert the objects with `bulk_create()`, as upserts if requested."""
+    if not update_conflicts:
+        return _bulk_create(
+            self,
+            objs,
+            batch_size=batch_size,
+            ignore_conflicts=ignore_conflicts,
+        )
+    if ignore_conflicts:
+        raise ValueError(
+            "ignore_conflicts and update_conflicts are mutually exclusive."
+        )
+    if not getattr(
+        connections[self.db].features, "supports_update_conflicts", False
+    ):
+        raise NotSupportedError(
+            "This database backend does not support updating conflicts."
+        )
+    # bulk_create() sends every batch through _insert() of the same QuerySet.
+    clone = self._chain()
+    clone._upsert = True
+    return _bulk_create(clone, objs, batch_size=batch_size)
+
+
+def bulk_update(self, objs, fields, batch_size=None):
+    """
+    A method to extend Django QuerySet class. Checks the mutations of the
+    updated rows before they're sent and, with the
+    `SPANNER_AUTO_CHUNK_MUTATIONS` setting, commits them in chunks that fit
+    into a transaction in autocommit mode.
+
+    :type self: :class:`~django.db.models.query.QuerySet`
+    :param self: the instance of the class that owns this method.
+
+    :type objs: list
+    :param objs: Model instances to update.
+
+    :type fields: list
+    :param fields: The names of the fields to update.
+
+    :type batch_size: int
+    :param batch_size: (Optional) The number of objects to update per query.
+
+    :raises: :class:`~django.db.utils.NotSupportedError` if a field is part
+             of the primary key of a Spanner table.
+    """
+    self._for_write = True
+    if connections[self.db].vendor != "spanner":
+        return _bulk_update(self, objs, fields, batch_size=batch_size)
+    check_key_fields_not_updated(
+        self.model, [self.model._meta.get_field(name) for name in fields]
+    )
+    objs = tuple(objs)
+    queryset, chunks = _split_by_mutations(self, objs, fields)
+    for chunk in chunks:
+        _bulk_update(queryset, chunk, fields, batch_size=batch_size)
+
+
+bulk_update.alters_data = True
+
+
+def _insert(
+    self,
+    objs,
+    fields,
+    return_id=False,
+    raw=False,
+    using=None,
+    ignore_conflicts=False,
+):
+    """
+    A method to extend Django QuerySet class. Copied from the base class
+    except for flagging the query as an upsert, which makes
+    :class:`~django_spanner.compiler.SQLInsertCompiler` emit
+    `INSERT OR UPDATE`, and leaving out generated columns, which can't be
+    written.
+    """
+    fields = [
+        field for field in fields if not getattr(field, "generated", False)
+    ]
+    self._for_write = True
+    if using is None:
+        using = self.db
+    query = sql.InsertQuery(self.model, ignore_conflicts=ignore_conflicts)
+    query.upsert = getattr(self, "_upsert", False)
+    query.mutations_counted = getattr(self.query, "mutations_counted", False)
+    query.insert_values(fields, objs, raw=raw)
+    return query.get_compiler(using=using).execute_sql(return_id)
+
+
+_insert.alters_data = True
+_insert.queryset_only = False
+
+
+def _get_key_attnames(model):
+    """Return the attnames of the model's key fields, except its primary
+    key, which Django doesn't write in an UPDATE anyway."""
+    try:
+        return _key_attnames[model]
+    except KeyError:
+        attnames = _key_attnames[model] = [
+            field.attname
+            for field in get_primary_key_fields(model)
+            if field is not model._meta.pk
+        ]
+        return attnames
+
+
+def _store_key_values(instance):
+    """Remember the loaded values of the instance's key fields, to tell if
+    they're changed before the next save."""
+    attnames = _get_key_attnames(instance.__class__)
+    if attnames:
+        instance._state.key_values = {
+            name: instance.__dict__[name]
+            for name in attnames
+            if name in instance.__dict__
+        }
+
+
+def from_db(cls, db, field_names, values):
+    """
+    A method to extend Django Model class. Remembers the values of the key
+    fields of a Spanner table that aren't the model's primary key, see
+    :func:`_do_update`.
+    """
+    instance = _model_from_db(cls, db, field_names, values)
+    if connections[db].vendor == "spanner":
+        _store_key_values(instance)
+    return instance
+
+
+def save(
+    self,
+    force_insert=False,
+    force_update=False,
+    using=None,
+    update_fields=None,
+    upsert=False,
+):
+    """
+    A method to extend Django Model class. Adds a blind-write mode to
+    `save()`: with `upsert=True` the row is written with a single
+    `INSERT OR UPDATE` whether or not it already exists.
+
+    An upsert writes every column of the row, including fields that are
+    deferred, which Django would otherwise leave out of the save.
+
+    :type self: :class:`~django.db.models.Model`
+    :param self: the instance of the class that owns this method.
+
+    :type upsert: bool
+    :param upsert: (Optional) Write the row without checking if it exists.
+
+    :raises: :class:`ValueError` if an upsert is combined with
+             `force_update` or `update_fields`,
+             :class:`~django.db.utils.NotSupportedError` if `update_fields`
+             includes a field of the primary key of a Spanner table.
+    """
+    if update_fields:
+        using = using or router.db_for_write(self.__class__, instance=self)
+        if connections[using].vendor == "spanner":
+            check_key_fields_not_updated(
+                self.__class__,
+                [self._meta.get_field(name) for name in update_fields],
+            )
+    if not upsert:
+        return _model_save(
+            self, force_insert, force_update, using, update_fields
+        )
+    if force_update or update_fields is not None:
+        raise ValueError("Cannot force an update in save() with upsert=True.")
+    self._state.upsert = True
+    try:
+        # With force_insert Django doesn't narrow the save down to the
+        # loaded fields of an instance with deferred fields.
+        return _model_save(self, force_insert=True, using=using)
+    finally:
+        del self._state.upsert
+
+
+save.alters_data = True
+
+
+def _save_table(
+    self,
+    raw=False,
+    cls=None,
+    force_insert=False,
+    force_update=False,
+    using=None,
+    update_fields=None,
+):
+    """
+    A method to extend Django Model class. Skips the UPDATE that Django
+    tries before an INSERT when it can't match any row: for upserts, and for
+    new instances whose primary key was generated by
+    :func:`django_spanner.gen_rand_int64`. Defers generated columns once the
+    row is saved.
+    """
+    meta = cls._meta
+    if getattr(self._state, "upsert", False):
+        force_insert = True
+    elif not (raw or force_insert or force_update or update_fields):
+        pk_val = self._get_pk_val(meta)
+        if pk_val is None:
+            pk_val = meta.pk.get_pk_value_on_save(self)
+            setattr(self, meta.pk.attname, pk_val)
+        if self._state.adding and isinstance(pk_val, GeneratedKey):
+            force_insert = True
+            # Store a plain int like the values loaded from the database.
+            setattr(self, meta.pk.attname, int(pk_val))
+    updated = _model_save_table(
+        self, raw, cls, force_insert, force_update, using, update_fields
+    )
+    # Generated columns are computed by the database. Defer them so that
+    # they're loaded on next access.
+    for field in meta.local_concrete_fields:
+        if getattr(field, "generated", False):
+            self.__dict__.pop(field.attname, None)
+    if connections[using].vendor == "spanner":
+        _store_key_values(self)
+    return updated
+
+
+def _do_update(
+    self, base_qs, using, pk_val, values, update_fields, forced_update
+):
+    """
+    A method to extend Django Model class. Leaves generated columns and the
+    columns of the table's primary key, which can't be written, out of the
+    UPDATE.
+
+    :raises: :class:`~django.db.utils.NotSupportedError` if a key field
+             differs from the value loaded from the database or last saved.
+    """
+    if connections[using].vendor == "spanner":
+        key_fields = get_primary_key_fields(self.__class__)
+        key_values = getattr(self._state, "key_values", {})
+        check_key_fields_not_updated(
+            self.__class__,
+            [
+                field
+                for field in key_fields
+                if field.attname in key_values
+                and getattr(self, field.attname) != key_values[field.attname]
+            ],
+        )
+    else:
+        key_fields = ()
+    values = [
+        value
+        for value in values
+        if not getattr(value[0], "generated", False)
+        and value[0] not in key_fields
+    ]
+    return _model_do_update(
+        self, base_qs, using, pk_val, values, update_fields, forced_update
+    )
+
+
+def _do_insert(self, manager, using, fields, update_pk, raw):
+    """
+    A method to extend Django Model class. Sends the INSERT of
+    `save(upsert=True)` as an `INSERT OR UPDATE`.
+    """
+    if not getattr(self._state, "upsert", False):
+        return _model_do_insert(self, manager, using, fields, update_pk, raw)
+    if not getattr(
+        connections[using].features, "supports_update_conflicts", False
+    ):
+        raise NotSupportedError(
+            "This database backend does not support updating conflicts."
+        )
+    queryset = manager.get_queryset()
+    queryset._upsert = True
+    return queryset._insert(
+        [self], fields=fields, return_id=update_pk, using=using, raw=raw
+    )
+
+
+def _manager_method(name):
+    """Proxy a QuerySet method added after the Manager class was built."""
+
+    def manager_method(self, *args, **kwargs):
+        return getattr(self.get_queryset(), name)(*args, **kwargs)
+
+    manager_method.__name__ = name
+    return manager_method
+
+
+def register_query():
+    """
+    Register the above methods with the Django QuerySet, Manager and Model
+    classes.
+    """
+    QuerySet.filter_keys = filter_keys
+    BaseManager.filter_keys = _manager_method("filter_keys")
+    QuerySet.spanner_hints = spanner_hints
+    BaseManager.spanner_hints = _manager_method("spanner_hints")
+    QuerySet.bulk_create = bulk_create
+    QuerySet.bulk_update = bulk_update
+    QuerySet._insert = _insert
+    Model.from_db = classmethod(from_db)
+    Model.save = save
+    Model._save_table = _save_table
+    Model._do_insert = _do_insert
+    Model._do_update = _do_update
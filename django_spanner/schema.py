@@ -4,8 +4,40 @@
 # license that can be found in the LICENSE file or at
 # https://developers.google.com/open-source/licenses/bsd
 
+import math
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
 from django.db import NotSupportedError
 from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.models import CASCADE, DO_NOTHING
+from django.db.models.expressions import Col, RawSQL
+from django.db.models.sql import Query
+
+from .utils import get_interleave_parent_field, get_primary_key_fields
+
+# Characters of string literals with a short escape sequence.
+STRING_ESCAPES = {
+    "\\": "\\\\",
+    '"': '\\"',
+    "\n": "\\n",
+    "\r": "\\r",
+    "\t": "\\t",
+}
+
+
+def _escape_char(char):
+    """Escape a character of a string literal if it isn't printable."""
+    if char in STRING_ESCAPES:
+        return STRING_ESCAPES[char]
+    if char.isprintable():
+        return char
+    code = ord(char)
+    if code < 0x100:
+        return "\\x%02x" % code
+    if code < 0x10000:
+        return "\\u%04x" % code
+    return "\\U%08x" % code
 
 
 class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
@@ -21,12 +53,20 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
     # Spanner doesn't support partial indexes. This string omits the
     # %(condition)s placeholder so that partial indexes are ignored.
     sql_create_index = (
-        "CREATE INDEX %(name)s ON %(table)s%(using)s (%(columns)s)%(extra)s"
+        "CREATE INDEX %(name)s ON %(table)s%(using)s (%(columns)s)%(storing)s"
+        "%(extra)s"
+    )
+    sql_create_null_filtered_index = (
+        "CREATE NULL_FILTERED INDEX %(name)s ON %(table)s%(using)s "
+        "(%(columns)s)%(storing)s%(extra)s"
     )
+    sql_index_storing = " STORING (%(columns)s)"
     sql_create_unique = (
         "CREATE UNIQUE NULL_FILTERED INDEX %(name)s ON %(table)s (%(columns)s)"
     )
     sql_delete_unique = "DROP INDEX %(name)s"
+    sql_interleave = " INTERLEAVE IN PARENT %(parent)s ON DELETE %(on_delete)s"
+    sql_generated_column = "AS (%(expression)s) STORED"
 
     # Cloud Spanner requires when changing if a column is NULLABLE,
     # that it should get redefined with its type and size.
@@ -101,6 +141,7 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
             for constraint in model._meta.constraints
         ]
         # Make the table
+        key_fields = get_primary_key_fields(model)
         sql = self.sql_create_table % {
             "table": self.quote_name(model._meta.db_table),
             "definition": ", ".join(
@@ -108,8 +149,26 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
                 for constraint in (*column_sqls, *constraints)
                 if constraint
             ),
-            "primary_key": self.quote_name(model._meta.pk.column),
+            "primary_key": ", ".join(
+                self.quote_name(field.column) for field in key_fields
+            ),
         }
+        parent_field = get_interleave_parent_field(model)
+        if parent_field is not None:
+            sql += self.sql_interleave % {
+                "parent": self.quote_name(
+                    parent_field.remote_field.model._meta.db_table
+                ),
+                "on_delete": "CASCADE"
+                if parent_field.remote_field.on_delete in (CASCADE, DO_NOTHING)
+                else "NO ACTION",
+            }
+        if key_fields[0] is not model._meta.pk:
+            # The table is keyed by other columns first, so lookups by the
+            # model's own primary key need an index.
+            self.deferred_sql.append(
+                self._create_unique_sql(model, [model._meta.pk.column])
+            )
         if model._meta.db_tablespace:
             tablespace_sql = self.connection.ops.tablespace_sql(
                 model._meta.db_tablespace
@@ -168,9 +227,12 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
             and field.remote_field.through._meta.auto_created
         ):
             return self.create_model(field.remote_field.through)
+        # Generated columns are filled in by Spanner so they can be created
+        # NOT NULL right away.
+        generated = getattr(field, "generated", False)
         # Get the column's definition
         definition, params = self.column_sql(
-            model, field, exclude_not_null=True
+            model, field, exclude_not_null=not generated
         )
         # It might not actually have a column behind it
         if definition is None:
@@ -179,6 +241,10 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
         db_params = field.db_parameters(connection=self.connection)
         if db_params["check"]:
             definition += " " + self.sql_check_constraint % db_params
+        # Column options, such as allow_commit_timestamp
+        col_type_suffix = field.db_type_suffix(connection=self.connection)
+        if col_type_suffix:
+            definition += " %s" % col_type_suffix
         # Build the SQL and run it
         sql = self.sql_create_column % {
             "table": self.quote_name(model._meta.db_table),
@@ -189,7 +255,7 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
         # Set defaults values on existing rows. (Django usually uses-database
         # defaults for this but Spanner doesn't support them.)
         effective_default = self.effective_default(field)
-        if effective_default is not None:
+        if effective_default is not None and not generated:
             self.execute(
                 "UPDATE %(table)s SET %(column)s=%%s"
                 % {
@@ -199,7 +265,7 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
                 (effective_default,),
             )
         # Spanner doesn't support adding NOT NULL columns to existing tables.
-        if not field.null:
+        if not field.null and not generated:
             self.execute(
                 self.sql_alter_column
                 % {
@@ -248,6 +314,17 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
         # Spanner requires dropping a column's indexes before dropping the
         # column.
         index_names = self._constraint_names(model, [field.column], index=True)
+        # That includes indexes that only store the column.
+        with self.connection.cursor() as cursor:
+            constraints = self.connection.introspection.get_constraints(
+                cursor, model._meta.db_table
+            )
+        index_names.extend(
+            name
+            for name, infodict in constraints.items()
+            if field.column in infodict.get("storing", ())
+            and name not in index_names
+        )
         for index_name in index_names:
             self.execute(self._delete_index_sql(model, index_name))
         super().remove_field(model, field)
@@ -290,6 +367,10 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
             null = True
         if not null and not exclude_not_null:
             sql += " NOT NULL"
+        if getattr(field, "generated", False):
+            sql += " " + self.sql_generated_column % {
+                "expression": self._generated_expression_sql(model, field)
+            }
         # Optionally add the tablespace if it's an implicitly indexed column
         tablespace = field.db_tablespace or model._meta.db_tablespace
         if (
@@ -321,9 +402,129 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
         ]
         super().add_index(model, index)
 
+    def _create_index_sql(
+        self, model, fields, *, storing=(), null_filtered=False, **kwargs
+    ):
+        """Add Spanner's STORING and NULL_FILTERED options to the index
+        created by the base class.
+
+        :type storing: list
+        :param storing: (Optional) The non-key fields to store in the index.
+
+        :type null_filtered: bool
+        :param null_filtered: (Optional) Leave rows with a NULL key column out
+                              of the index.
+        """
+        if null_filtered:
+            kwargs["sql"] = self.sql_create_null_filtered_index
+        statement = super()._create_index_sql(model, fields, **kwargs)
+        statement.parts["storing"] = (
+            self.sql_index_storing
+            % {
+                "columns": ", ".join(
+                    self.quote_name(field.column) for field in storing
+                )
+            }
+            if storing
+            else ""
+        )
+        return statement
+
+    def _field_should_be_indexed(self, model, field):
+        # The primary key already serves lookups by its leading column, such
+        # as the foreign key to the parent of an interleaved table.
+        if field is get_primary_key_fields(model)[0]:
+            return False
+        return super()._field_should_be_indexed(model, field)
+
+    def _generated_expression_sql(self, model, field):
+        """Compile the expression of a generated column.
+
+        :type model: :class:`~django.db.migrations.operations.models.ModelOperation`
+        :param model: A model for creating a table.
+
+        :type field: :class:`~django_spanner.fields.GeneratedField`
+        :param field: The generated field.
+
+        :rtype: str
+        :returns: The expression's SQL, with unqualified column names.
+        """
+        query = Query(model)
+        expression = self._unqualify_columns(
+            field.expression.resolve_expression(query, allow_joins=False)
+        )
+        compiler = query.get_compiler(connection=self.connection)
+        # Don't compile the expression to the column it defines.
+        compiler.use_generated_columns = False
+        sql, params = compiler.compile(expression)
+        return sql % tuple(self.quote_value(param) for param in params)
+
+    def _unqualify_columns(self, expression):
+        # Generated column expressions can't qualify column names with the
+        # table name.
+        if isinstance(expression, Col):
+            return RawSQL(
+                self.quote_name(expression.target.column),
+                (),
+                expression.output_field,
+            )
+        if not hasattr(expression, "get_source_expressions"):
+            return expression
+        expression = expression.copy()
+        expression.set_source_expressions(
+            [
+                source if source is None else self._unqualify_columns(source)
+                for source in expression.get_source_expressions()
+            ]
+        )
+        return expression
+
     def quote_value(self, value):
-        # A more complete implementation isn't currently required.
-        return str(value)
+        """Quote a literal of a generated column expression.
+
+        :type value: object
+        :param value: A parameter of the compiled expression.
+
+        :raises: :class:`~django.db.utils.NotSupportedError` if the type of
+                 the value has no literal.
+
+        :rtype: str
+        :returns: The value as a typed SQL literal.
+        """
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, int):
+            return str(value)
+        if isinstance(value, float):
+            if math.isfinite(value):
+                return repr(value)
+            return 'CAST("%s" AS FLOAT64)' % value
+        if isinstance(value, Decimal):
+            return "NUMERIC '%s'" % value
+        if isinstance(value, str):
+            return '"%s"' % "".join(_escape_char(char) for char in value)
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return 'b"%s"' % "".join(
+                chr(byte)
+                if 0x20 <= byte < 0x7F and byte not in b'"\\'
+                else "\\x%02x" % byte
+                for byte in bytes(value)
+            )
+        if isinstance(value, datetime):
+            # Naive datetimes are in UTC, as for query parameters.
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            else:
+                value = value.astimezone(timezone.utc)
+            return "TIMESTAMP '%s'" % value.isoformat(sep=" ")
+        if isinstance(value, date):
+            return "DATE '%s'" % value.isoformat()
+        raise NotSupportedError(
+            "Cannot quote a value of type %s in a generated column "
+            "expression." % type(value).__name__
+        )
 
     def _alter_field(
         self,
@@ -4,9 +4,13 @@
 # license that can be found in the LICENSE file or at
 # https://developers.google.com/open-source/licenses/bsd
 
+import re
+import threading
+from collections import Counter, OrderedDict, namedtuple
+
 import django
-import sqlparse
 from django.core.exceptions import ImproperlyConfigured
+from django.db import NotSupportedError
 from django.utils.version import get_version_tuple
 
 
@@ -27,6 +31,321 @@ def check_django_compatability():
         )
 
 
+class GeneratedKey(int):
+    """
+    A primary key value generated by django_spanner rather than given by the
+    user. A freshly generated key can't exist in the database yet, so saving
+    an instance that carries one can go straight to an INSERT.
+    """
+
+    __slots__ = ()
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class LRUCache:
+    """
+    A thread-safe mapping that keeps up to `maxsize` of the most recently
+    used entries and counts the lookups that found an entry or not.
+
+    :type maxsize: int
+    :param maxsize: The maximum number of entries.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the entry of a key and mark it as the most recently used.
+
+        :type key: object
+        :param key: A hashable key.
+
+        :type default: object
+        :param default: (Optional) The value returned if there's no entry.
+
+        :rtype: object
+        :returns: The entry, or the default.
+        """
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._entries[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Remove all the entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def cache_info(self):
+        """Return the counters and the size of the cache.
+
+        :rtype: :class:`CacheInfo`
+        :returns: The hits, misses, maximum and current size.
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+
+class StatementCounter:
+    """
+    A database execute wrapper that counts the executions of each distinct
+    statement. Spanner caches a query plan per statement text, so the number
+    of distinct statements that a view or a task executes is the number of
+    plans it needs:
+
+    .. code:: python
+
+        counter = StatementCounter()
+        with connection.execute_wrapper(counter):
+            ...
+        print(counter.cardinality)
+    """
+
+    def __init__(self):
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.statements[sql] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def cardinality(self):
+        """The number of distinct statements executed."""
+        return len(self.statements)
+
+
+def get_interleave_parent_field(model):
+    """
+    Return the foreign key named by the model's `Meta.interleave_in_parent`
+    option, or None if the model's table isn't interleaved.
+
+    :type model: :class:`~django.db.models.Model`
+    :param model: A model.
+
+    :rtype: :class:`~django.db.models.ForeignKey`
+    :returns: The foreign key to the parent model.
+
+    :raises: :class:`~django.db.utils.NotSupportedError` if the option
+             doesn't name a foreign key.
+    """
+    field_name = getattr(model._meta, "interleave_in_parent", None)
+    if field_name is None:
+        return None
+    field = model._meta.get_field(field_name)
+    if not field.many_to_one:
+        raise NotSupportedError(
+            "%s.Meta.interleave_in_parent must name a ForeignKey."
+            % model._meta.object_name
+        )
+    return field
+
+
+def get_primary_key_fields(model):
+    """
+    Return the fields that make up the primary key of the model's table, in
+    key order.
+
+    That's the model's primary key unless `Meta.primary_key_fields` names a
+    composite key, which must include the model's primary key. The key of an
+    interleaved table starts with the key columns of its parent table, which
+    must also be columns of the model.
+
+    :type model: :class:`~django.db.models.Model`
+    :param model: A model.
+
+    :rtype: list
+    :returns: The primary key fields.
+
+    :raises: :class:`~django.db.utils.NotSupportedError` if the key can't be
+             built from the model's fields.
+    """
+    opts = model._meta
+    field_names = getattr(opts, "primary_key_fields", None)
+    if field_names:
+        fields = [opts.get_field(name) for name in field_names]
+        if opts.pk not in fields:
+            raise NotSupportedError(
+                "%s.Meta.primary_key_fields must include the primary key %s."
+                % (opts.object_name, opts.pk.name)
+            )
+    else:
+        fields = [opts.pk]
+    parent_field = get_interleave_parent_field(model)
+    if parent_field is None:
+        return fields
+    parent_opts = parent_field.remote_field.model._meta
+    parent_columns = [
+        field.column
+        for field in get_primary_key_fields(parent_field.remote_field.model)
+    ]
+    fields_by_column = {field.column: field for field in opts.concrete_fields}
+    if parent_field.column != parent_opts.pk.column or not all(
+        column in fields_by_column for column in parent_columns
+    ):
+        raise NotSupportedError(
+            "%s is interleaved in %s so it must have columns named %s. Use "
+            "db_column to match the names of the primary key columns."
+            % (
+                opts.object_name,
+                parent_opts.object_name,
+                ", ".join(parent_columns),
+            )
+        )
+    prefix = [fields_by_column[column] for column in parent_columns]
+    return prefix + [field for field in fields if field not in prefix]
+
+
+def check_key_fields_not_updated(model, fields):
+    """
+    Check that none of the updated fields is a column of the primary key of
+    the model's table, which Spanner doesn't allow to update.
+
+    :type model: :class:`~django.db.models.Model`
+    :param model: A model.
+
+    :type fields: list
+    :param fields: The updated fields.
+
+    :raises: :class:`~django.db.utils.NotSupportedError` if a field is part
+             of the primary key.
+    """
+    key_fields = get_primary_key_fields(model)
+    key_names = [field.name for field in fields if field in key_fields]
+    if key_names:
+        raise NotSupportedError(
+            "Cloud Spanner doesn't support updating the primary key columns "
+            "of %s: %s." % (model._meta.object_name, ", ".join(key_names))
+        )
+
+
+def get_index_field_names(model):
+    """
+    Return the names of the fields in each secondary index of the model's
+    table, including the fields that the index stores.
+
+    :type model: :class:`~django.db.models.Model`
+    :param model: A model.
+
+    :rtype: list
+    :returns: A set of field names per index.
+    """
+    opts = model._meta
+    indexes = [
+        {field.name}
+        for field in opts.local_concrete_fields
+        if (field.db_index or field.unique) and not field.primary_key
+    ]
+    for index in opts.indexes:
+        names = {field_name for field_name, _ in index.fields_orders}
+        indexes.append(names.union(getattr(index, "storing", ())))
+    indexes.extend(set(names) for names in opts.index_together)
+    indexes.extend(set(names) for names in opts.unique_together)
+    return indexes
+
+
+def estimate_mutations(model, field_names=None):
+    """
+    Estimate the number of mutations that writing a row of the model's table
+    counts towards Spanner's limit per commit: one per column written and
+    one per secondary index entry written. Deleting a row counts one for the
+    row and one per index entry.
+
+    :type model: :class:`~django.db.models.Model`
+    :param model: A model.
+
+    :type field_names: list
+    :param field_names: (Optional) The names of the fields written. Leave it
+                        out for a deleted row.
+
+    :rtype: int
+    :returns: The estimated number of mutations per row.
+    """
+    indexes = get_index_field_names(model)
+    if field_names is None:
+        return 1 + len(indexes)
+    field_names = set(field_names)
+    return len(field_names) + sum(
+        1 for names in indexes if names.intersection(field_names)
+    )
+
+
+# The tokens that can hide or nest a WHERE keyword, and the keyword itself.
+_WHERE_TOKENS_RE = re.compile(
+    r"""
+    '''.*?''' | \"\"\".*?\"\"\"    # triple-quoted strings
+    | '(?:[^'\\\n]|\\.)*' | "(?:[^"\\\n]|\\.)*"    # strings
+    | `(?:[^`\\]|\\.)*`    # quoted identifiers
+    | (?:--|\#)[^\n]* | /\*.*?\*/    # comments
+    | [()]
+    | \bWHERE\b
+    """,
+    re.IGNORECASE | re.DOTALL | re.VERBOSE,
+)
+
+# Whether a statement has a WHERE clause, by statement.
+_where_clauses = LRUCache(maxsize=256)
+
+
+def has_where_clause(sql):
+    """
+    Return whether a statement has a WHERE clause outside of parentheses,
+    strings and comments. The results are cached.
+
+    :type sql: str
+    :param sql: A SQL statement.
+
+    :rtype: bool
+    :returns: True if the statement has a WHERE clause.
+    """
+    found = _where_clauses.get(sql)
+    if found is None:
+        found = _where_clauses[sql] = _find_where_clause(sql)
+    return found
+
+
+def _find_where_clause(sql):
+    """Scan a statement for a WHERE keyword outside of parentheses.
+
+    :type sql: str
+    :param sql: A SQL statement.
+
+    :rtype: bool
+    :returns: True if the statement has a WHERE clause.
+    """
+    depth = 0
+    for match in _WHERE_TOKENS_RE.finditer(sql):
+        token = match.group()
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and token.upper() == "WHERE":
+            return True
+    return False
+
+
 def add_dummy_where(sql):
     """
     Cloud Spanner requires a WHERE clause on UPDATE and DELETE statements.
@@ -38,10 +357,7 @@ def add_dummy_where(sql):
     :rtype: str
     :returns: A SQL statement with dummy WHERE clause.
     """
-    if any(
-        isinstance(token, sqlparse.sql.Where)
-        for token in sqlparse.parse(sql)[0]
-    ):
+    if has_where_clause(sql):
         return sql
 
     return sql + " WHERE 1=1"
@@ -4,6 +4,10 @@ from django.core import checks
 from django.db.backends.base.validation import BaseDatabaseValidation
 from django.db.models import DecimalField
 
+# The precision of Spanner's NUMERIC type.
+NUMERIC_MAX_SCALE = 9
+NUMERIC_MAX_INTEGER_DIGITS = 29
+
 
 class DatabaseValidation(BaseDatabaseValidation):
     def check_field_type(self, field, field_type):
@@ -23,11 +27,39 @@ class DatabaseValidation(BaseDatabaseValidation):
         if os.environ.get(
             "RUNNING_SPANNER_BACKEND_TESTS"
         ) != "1" and isinstance(field, DecimalField):
-            errors.append(
+            errors.extend(self._check_decimal_field(field))
+        return errors
+
+    def _check_decimal_field(self, field):
+        """Check that the values of a DecimalField fit in a NUMERIC column.
+
+        :type field: :class:`~django.db.models.DecimalField`
+        :param field: The field of the table.
+
+        :rtype: list
+        :return: A list of errors.
+        """
+        # DecimalField checks that these are set and valid itself.
+        if field.max_digits is None or field.decimal_places is None:
+            return []
+        if field.decimal_places > NUMERIC_MAX_SCALE:
+            return [
                 checks.Error(
-                    "DecimalField is not yet supported by Spanner.",
+                    "Spanner's NUMERIC type doesn't support more than %d "
+                    "decimal places." % NUMERIC_MAX_SCALE,
                     obj=field,
                     id="spanner.E001",
                 )
-            )
-        return errors
+            ]
+        integer_digits = field.max_digits - field.decimal_places
+        if integer_digits > NUMERIC_MAX_INTEGER_DIGITS:
+            return [
+                checks.Error(
+                    "Spanner's NUMERIC type doesn't support more than %d "
+                    "digits before the decimal point."
+                    % NUMERIC_MAX_INTEGER_DIGITS,
+                    obj=field,
+                    id="spanner.E002",
+                )
+            ]
+        return []
@@ -81,6 +81,14 @@ def default(session):
     )
 
 
+@nox.session(python="3.8")
+def benchmarks(session):
+    """Run the micro-benchmarks."""
+    session.install("django~=2.2")
+    session.install("-e", ".")
+    session.run("python", os.path.join("benchmarks", "where_clause.py"))
+
+
 @nox.session(python="3.8")
 def docs(session):
     """Build the docs for this library."""
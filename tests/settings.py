@@ -0,0 +1,25 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+# Django settings for the unit tests. No connection to Spanner is made.
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django_spanner",
+        "INSTANCE": "instance_id",
+        "NAME": "database_id",
+        "OPTIONS": {},
+    },
+    "other": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+}
+
+INSTALLED_APPS = ["django_spanner"]
+
+SECRET_KEY = "spanner_tests_secret_key"
+
+USE_TZ = True
+
+TIME_ZONE = "America/New_York"
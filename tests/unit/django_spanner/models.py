@@ -0,0 +1,105 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+"""Models used by the unit tests. Their tables are never created."""
+
+from django.db import models
+from django.db.models.functions import Lower
+
+from django_spanner.fields import GeneratedField
+from django_spanner.functions import IsNull
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=20)
+    email = models.CharField(max_length=50, null=True)
+    num = models.IntegerField(default=0)
+    created = models.DateTimeField(null=True)
+    birth_date = models.DateField(null=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    email_lower = GeneratedField(
+        expression=Lower("email"),
+        output_field=models.CharField(max_length=50),
+        null=True,
+    )
+    created_is_null = GeneratedField(
+        expression=IsNull("created"), output_field=models.BooleanField()
+    )
+
+    class Meta:
+        app_label = "django_spanner"
+
+
+class Book(models.Model):
+    author = models.ForeignKey(Author, models.CASCADE, null=True)
+    title = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = "django_spanner"
+
+
+class Singer(models.Model):
+    id = models.AutoField(primary_key=True, db_column="singer_id")
+    name = models.CharField(max_length=20)
+
+    class Meta:
+        app_label = "django_spanner"
+
+
+class Album(models.Model):
+    singer = models.ForeignKey(
+        Singer, models.DO_NOTHING, db_column="singer_id"
+    )
+    title = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = "django_spanner"
+        interleave_in_parent = "singer"
+
+
+class Tenant(models.Model):
+    name = models.CharField(max_length=20)
+
+    class Meta:
+        app_label = "django_spanner"
+
+
+class Event(models.Model):
+    tenant = models.ForeignKey(Tenant, models.CASCADE)
+    created_at = models.DateTimeField()
+    name = models.CharField(max_length=20)
+
+    class Meta:
+        app_label = "django_spanner"
+        primary_key_fields = ("tenant", "created_at", "id")
+
+
+class Song(models.Model):
+    # Invalid: lacks the singer_id key column of the parent table.
+    album = models.ForeignKey(Album, models.CASCADE)
+
+    class Meta:
+        app_label = "django_spanner"
+        interleave_in_parent = "album"
+
+
+class Review(models.Model):
+    # Invalid: interleave_in_parent doesn't name a ForeignKey.
+    title = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = "django_spanner"
+        interleave_in_parent = "title"
+
+
+class Visit(models.Model):
+    # Invalid: primary_key_fields doesn't include the primary key.
+    tenant = models.ForeignKey(Tenant, models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        app_label = "django_spanner"
+        primary_key_fields = ("tenant", "created_at")
@@ -106,3 +106,41 @@ class TestBase(unittest.TestCase):
 
         mock_connection.cursor = mock.MagicMock(side_effect=Error)
         self.assertFalse(db_wrapper.is_usable())
+
+    def test_add_mutations(self):
+        db_wrapper = self._make_one(self.settings_dict)
+        db_wrapper.autocommit = False
+        mock_settings = mock.Mock(
+            SPANNER_MUTATION_LIMIT=10, SPANNER_MUTATION_LIMIT_EXCEEDED="warn"
+        )
+        with mock.patch("django_spanner.base.settings", mock_settings):
+            db_wrapper.add_mutations(6)
+            with self.assertWarns(RuntimeWarning):
+                db_wrapper.add_mutations(6)
+            self.assertEqual(db_wrapper.mutation_count, 12)
+            db_wrapper._reset_mutation_count()
+            db_wrapper.add_mutations(6)
+            self.assertEqual(db_wrapper.mutation_count, 6)
+
+    def test_add_mutations_raises(self):
+        from django.db.utils import DatabaseError
+
+        db_wrapper = self._make_one(self.settings_dict)
+        db_wrapper.autocommit = False
+        mock_settings = mock.Mock(
+            SPANNER_MUTATION_LIMIT=10, SPANNER_MUTATION_LIMIT_EXCEEDED="raise"
+        )
+        with mock.patch("django_spanner.base.settings", mock_settings):
+            db_wrapper.add_mutations(6)
+            with self.assertRaises(DatabaseError):
+                db_wrapper.add_mutations(6)
+            self.assertEqual(db_wrapper.mutation_count, 6)
+
+    def test_add_mutations_autocommit(self):
+        db_wrapper = self._make_one(self.settings_dict)
+        db_wrapper.autocommit = True
+        mock_settings = mock.Mock(SPANNER_MUTATION_LIMIT=10)
+        with mock.patch("django_spanner.base.settings", mock_settings):
+            db_wrapper.add_mutations(6)
+            db_wrapper.add_mutations(6)
+        self.assertEqual(db_wrapper.mutation_count, 0)
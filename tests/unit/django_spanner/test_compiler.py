@@ -0,0 +1,411 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import unittest
+
+import mock
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestFormatPlan(unittest.TestCase):
+    def _call_fut(self, stats):
+        from django_spanner.compiler import _format_plan
+
+        return _format_plan(stats)
+
+    def test_format_plan(self):
+        from google.cloud.spanner_v1 import PlanNode, QueryPlan, ResultSetStats
+
+        link = PlanNode.ChildLink
+        nodes = [
+            PlanNode(
+                index=0,
+                kind=PlanNode.Kind.RELATIONAL,
+                display_name="Distributed Union",
+                child_links=[link(child_index=1), link(child_index=2)],
+                execution_stats={
+                    "rows": {"total": "2", "unit": "rows"},
+                    "latency": {"total": "1.2", "unit": "msecs"},
+                },
+            ),
+            PlanNode(
+                index=1,
+                kind=PlanNode.Kind.RELATIONAL,
+                display_name="Scan",
+                metadata={"scan_target": "book"},
+                execution_stats={
+                    "scanned_rows": {"total": "10", "unit": "rows"}
+                },
+            ),
+            PlanNode(
+                index=2, kind=PlanNode.Kind.SCALAR, display_name="Function"
+            ),
+        ]
+        stats = ResultSetStats(
+            query_plan=QueryPlan(plan_nodes=nodes),
+            query_stats={"rows_returned": "2", "elapsed_time": "3 msecs"},
+        )
+        self.assertEqual(
+            self._call_fut(stats),
+            [
+                "Distributed Union (rows: 2, latency: 1.2 msecs)",
+                "  Scan: book (scanned rows: 10)",
+                "elapsed_time: 3 msecs",
+                "rows_returned: 2",
+            ],
+        )
+
+    def test_format_plan_without_stats(self):
+        from google.cloud.spanner_v1 import PlanNode, QueryPlan, ResultSetStats
+
+        stats = ResultSetStats(
+            query_plan=QueryPlan(
+                plan_nodes=[PlanNode(index=0, display_name="Serialize Result")]
+            )
+        )
+        self.assertEqual(self._call_fut(stats), ["Serialize Result"])
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestSpannerHints(unittest.TestCase):
+    def _books(self):
+        from tests.unit.django_spanner.models import Book
+
+        return Book.objects.only("id")
+
+    def _sql(self, queryset):
+        return queryset.query.sql_with_params()
+
+    def test_parallelism(self):
+        queryset = self._books().spanner_hints(parallelism=True)
+        self.assertEqual(
+            self._sql(queryset.filter(title="Emma")),
+            (
+                "@{USE_ADDITIONAL_PARALLELISM=TRUE} SELECT "
+                "django_spanner_book.id FROM django_spanner_book "
+                "WHERE django_spanner_book.title = %s",
+                ("Emma",),
+            ),
+        )
+
+    def test_parallelism_subquery(self):
+        from tests.unit.django_spanner.models import Author, Book
+
+        authors = Author.objects.spanner_hints(parallelism=True).values("id")
+        sql, _ = self._sql(Book.objects.filter(author__in=authors))
+        self.assertNotIn("@{", sql)
+
+    def test_parallelism_compound(self):
+        queryset = self._books().spanner_hints(parallelism=False)
+        sql, _ = self._sql(queryset.union(self._books()))
+        self.assertTrue(sql.startswith("@{USE_ADDITIONAL_PARALLELISM=FALSE} "))
+        self.assertEqual(sql.count("@{"), 1)
+
+    def test_force_index_and_join_method(self):
+        queryset = self._books().spanner_hints(
+            force_index="_BASE_TABLE", join_method="hash_join"
+        )
+        self.assertEqual(
+            self._sql(queryset.filter(author__name="Ada")),
+            (
+                "SELECT django_spanner_book.id FROM "
+                "django_spanner_book@{FORCE_INDEX=_BASE_TABLE} "
+                "INNER JOIN@{JOIN_METHOD=HASH_JOIN} django_spanner_author "
+                "ON (django_spanner_book.author_id = "
+                "django_spanner_author.id) "
+                "WHERE django_spanner_author.name = %s",
+                ("Ada",),
+            ),
+        )
+
+    def test_force_index(self):
+        from django.db import connection
+
+        with mock.patch.object(
+            connection.introspection, "index_exists", return_value=True
+        ) as index_exists:
+            queryset = self._books().spanner_hints(force_index="book_title")
+        index_exists.assert_called_once_with(
+            "django_spanner_book", "book_title"
+        )
+        sql, _ = self._sql(queryset)
+        self.assertTrue(
+            sql.endswith("FROM django_spanner_book@{FORCE_INDEX=book_title}")
+        )
+
+    def test_force_index_unknown(self):
+        from django.db import connection
+
+        with mock.patch.object(
+            connection.introspection, "index_exists", return_value=False
+        ):
+            with self.assertRaises(ValueError):
+                self._books().spanner_hints(force_index="book_title")
+
+    def test_join_method_unknown(self):
+        with self.assertRaises(ValueError):
+            self._books().spanner_hints(join_method="NESTED_LOOP")
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestExecuteStatementHint(unittest.TestCase):
+    def setUp(self):
+        from django.db import connection
+
+        self.connection = connection
+        self.dbapi_connection = mock.Mock(read_only=False)
+        self.read_only = []
+        cursor = mock.MagicMock()
+        cursor.execute.side_effect = lambda *args: self.read_only.append(
+            self.dbapi_connection.read_only
+        )
+        cursor.fetchmany.return_value = []
+        for name, value in (
+            ("connection", self.dbapi_connection),
+            ("cursor", mock.Mock(return_value=cursor)),
+            ("get_autocommit", mock.Mock(return_value=True)),
+        ):
+            patcher = mock.patch.object(connection, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _books(self):
+        from tests.unit.django_spanner.models import Book
+
+        return Book.objects.only("id")
+
+    def test_autocommit_reads_snapshot(self):
+        list(self._books().spanner_hints(parallelism=True))
+        self.assertEqual(self.read_only, [True])
+        self.assertFalse(self.dbapi_connection.read_only)
+
+    def test_without_hint(self):
+        list(self._books())
+        self.assertEqual(self.read_only, [False])
+
+    def test_transaction(self):
+        self.connection.get_autocommit.return_value = False
+        list(self._books().spanner_hints(parallelism=True))
+        self.assertEqual(self.read_only, [False])
+
+    def test_transaction_partitioned_dml(self):
+        from django.db import NotSupportedError
+
+        self.connection.get_autocommit.return_value = False
+        self.dbapi_connection.autocommit_dml_mode = mock.Mock()
+        self.dbapi_connection.autocommit_dml_mode.name = (
+            "PARTITIONED_NON_ATOMIC"
+        )
+        with self.assertRaises(NotSupportedError):
+            list(self._books().spanner_hints(parallelism=True))
+        self.assertEqual(self.read_only, [])
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestSQLCache(unittest.TestCase):
+    def setUp(self):
+        from django_spanner.compiler import reset_sql_cache
+
+        reset_sql_cache()
+        self.addCleanup(reset_sql_cache)
+
+    def _compile(self, queryset):
+        compiler = queryset.query.get_compiler("default")
+        return compiler, compiler.as_sql()
+
+    def _cache_info(self):
+        from django_spanner.compiler import get_sql_cache
+
+        return get_sql_cache().cache_info()
+
+    def _authors(self):
+        from tests.unit.django_spanner.models import Author
+
+        return Author.objects.all()
+
+    def test_hit(self):
+        _, (sql, params) = self._compile(self._authors().filter(name="Ada"))
+        self.assertEqual(params, ("Ada",))
+        _, (cached_sql, cached_params) = self._compile(
+            self._authors().filter(name="Grace")
+        )
+        self.assertEqual(cached_sql, sql)
+        self.assertEqual(cached_params, ("Grace",))
+        hits, misses, _, size = self._cache_info()
+        self.assertEqual((hits, misses, size), (1, 1, 1))
+
+    def test_hit_limit_offset(self):
+        queryset = self._authors().filter(num__gt=1).order_by("name")
+        _, (sql, params) = self._compile(queryset[10:20])
+        self.assertEqual(params, (1, 10, 10))
+        _, (cached_sql, cached_params) = self._compile(queryset[5:30])
+        self.assertEqual(cached_sql, sql)
+        self.assertEqual(cached_params, (1, 25, 5))
+        # Without an offset, the SQL is different.
+        _, (_, params) = self._compile(queryset[:20])
+        self.assertEqual(params, (1, 20))
+        hits, misses, _, size = self._cache_info()
+        self.assertEqual((hits, misses, size), (1, 2, 2))
+
+    def _count_compiled_lookups(self, queryset):
+        from django.db.models import Lookup
+        from django.db.models.sql.compiler import SQLCompiler
+
+        compile_ = SQLCompiler.compile
+        with mock.patch.object(
+            SQLCompiler, "compile", autospec=True, side_effect=compile_
+        ) as compile_mock:
+            self._compile(queryset)
+        return sum(
+            isinstance(call[0][1], Lookup)
+            for call in compile_mock.call_args_list
+        )
+
+    def test_compiles_lookups_once(self):
+        queryset = self._authors().filter(name="Ada", num__gt=1)
+        # Miss.
+        self.assertEqual(self._count_compiled_lookups(queryset), 2)
+        # Hit.
+        self.assertEqual(self._count_compiled_lookups(queryset), 2)
+        hits, misses, _, _ = self._cache_info()
+        self.assertEqual((hits, misses), (1, 1))
+
+    def test_different_shapes(self):
+        self._compile(self._authors().filter(name="Ada"))
+        self._compile(self._authors().filter(email="Ada"))
+        self._compile(self._authors().exclude(name="Ada"))
+        self._compile(self._authors().filter(name__in=["Ada", "Grace"]))
+        hits, misses, _, size = self._cache_info()
+        self.assertEqual((hits, misses, size), (0, 4, 4))
+
+    def test_not_cached(self):
+        from django.db.models import F, IntegerField, Value
+        from tests.unit.django_spanner.models import Book
+
+        querysets = {
+            "join": Book.objects.filter(author__name="Ada"),
+            "annotation": self._authors().annotate(
+                one=Value(1, IntegerField())
+            ),
+            "subquery": Book.objects.filter(
+                author__in=self._authors().filter(name="Ada")
+            ),
+            "expression": self._authors().filter(num=F("num")),
+            "extra": self._authors().extra(where=["num > 1"]),
+        }
+        for name, queryset in querysets.items():
+            with self.subTest(name=name):
+                self._compile(queryset)
+                self._compile(queryset)
+                hits, _, _, size = self._cache_info()
+                self.assertEqual((hits, size), (0, 0))
+
+    def test_hit_restores_select(self):
+        queryset = self._authors().only("name").filter(name="Ada")
+        compiler, _ = self._compile(queryset)
+        cached_compiler, _ = self._compile(
+            self._authors().only("name").filter(name="Grace")
+        )
+        self.assertEqual(self._cache_info()[0], 1)
+        self.assertEqual(cached_compiler.select, compiler.select)
+        self.assertEqual(cached_compiler.col_count, 2)
+        self.assertIs(
+            cached_compiler.klass_info["model"], compiler.klass_info["model"]
+        )
+        self.assertEqual(cached_compiler.klass_info["select_fields"], [0, 1])
+
+    def test_hit_values(self):
+        from tests.unit.django_spanner.models import Author
+
+        self._compile(self._authors().values_list("name").filter(num=1))
+        compiler, (sql, params) = self._compile(
+            Author.objects.values_list("name").filter(num=2)
+        )
+        self.assertEqual(self._cache_info()[0], 1)
+        self.assertEqual(
+            sql,
+            "SELECT django_spanner_author.name FROM django_spanner_author "
+            "WHERE django_spanner_author.num = %s",
+        )
+        self.assertEqual(params, (2,))
+        self.assertEqual(compiler.klass_info["select_fields"], [0])
+        self.assertEqual(compiler.col_count, 1)
+
+    def test_disabled(self):
+        from django.test import override_settings
+        from django_spanner.compiler import get_sql_cache
+
+        with override_settings(SPANNER_SQL_CACHE_SIZE=0):
+            self.assertIsNone(get_sql_cache())
+            _, (_, params) = self._compile(self._authors().filter(num=1))
+        self.assertEqual(params, (1,))
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestGeneratedColumns(unittest.TestCase):
+    def _compile(self, queryset, function):
+        from django.db.models.sql.compiler import SQLCompiler
+
+        compile_ = SQLCompiler.compile
+        with mock.patch.object(
+            SQLCompiler, "compile", autospec=True, side_effect=compile_
+        ) as compile_mock:
+            sql, _ = queryset.query.sql_with_params()
+        compiled = [
+            call[0][1]
+            for call in compile_mock.call_args_list
+            if type(call[0][1]) is function
+        ]
+        return sql, len(compiled)
+
+    def test_generated_column(self):
+        from django.db.models.functions import Lower
+        from tests.unit.django_spanner.models import Author
+
+        sql, _ = self._compile(
+            Author.objects.values_list(Lower("email")), Lower
+        )
+        self.assertEqual(
+            sql,
+            "SELECT django_spanner_author.email_lower AS lower1 "
+            "FROM django_spanner_author",
+        )
+
+    def test_compiles_expression_once(self):
+        from django.db.models.functions import Lower
+        from tests.unit.django_spanner.models import Author
+
+        sql, count = self._compile(
+            Author.objects.values_list(Lower("name")), Lower
+        )
+        self.assertEqual(
+            sql,
+            "SELECT LOWER(django_spanner_author.name) AS lower1 "
+            "FROM django_spanner_author",
+        )
+        # The expression, and the one of Author.email_lower to compare.
+        self.assertEqual(count, 2)
+
+    def test_model_without_generated_fields(self):
+        from django.db.models.functions import Lower
+        from django_spanner.compiler import _get_generated_fields
+        from tests.unit.django_spanner.models import Book
+
+        _, count = self._compile(
+            Book.objects.values_list(Lower("title")), Lower
+        )
+        self.assertEqual(count, 1)
+        self.assertEqual(_get_generated_fields(Book), [])
+        self.assertIs(
+            _get_generated_fields(Book), _get_generated_fields(Book)
+        )
@@ -0,0 +1,100 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import unittest
+
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestOrderBy(unittest.TestCase):
+    def _order_by(self, queryset, *ordering):
+        sql, params = queryset.order_by(*ordering).query.sql_with_params()
+        return sql.split(" ORDER BY ", 1)[1]
+
+    def _authors(self):
+        from tests.unit.django_spanner.models import Author
+
+        return Author.objects.only("id")
+
+    def test_native_nulls_order(self):
+        from django.db.models import F
+
+        self.assertEqual(
+            self._order_by(
+                self._authors(), F("email").asc(nulls_first=True)
+            ),
+            "django_spanner_author.email ASC",
+        )
+        self.assertEqual(
+            self._order_by(
+                self._authors(), F("email").desc(nulls_last=True)
+            ),
+            "django_spanner_author.email DESC",
+        )
+
+    def test_nulls_last(self):
+        from django.db.models import F
+
+        self.assertEqual(
+            self._order_by(self._authors(), F("email").asc(nulls_last=True)),
+            "django_spanner_author.email IS NULL ASC, "
+            "django_spanner_author.email ASC",
+        )
+
+    def test_nulls_first_descending(self):
+        from django.db.models import F
+
+        self.assertEqual(
+            self._order_by(
+                self._authors(), F("email").desc(nulls_first=True)
+            ),
+            "django_spanner_author.email IS NULL DESC, "
+            "django_spanner_author.email DESC",
+        )
+
+    def test_not_null_column(self):
+        from django.db.models import F
+
+        self.assertEqual(
+            self._order_by(self._authors(), F("name").asc(nulls_last=True)),
+            "django_spanner_author.name ASC",
+        )
+
+    def test_outer_join(self):
+        from django.db.models import F
+        from tests.unit.django_spanner.models import Book
+
+        # Book.author is nullable, so the author's NOT NULL name is NULL for
+        # books without an author.
+        self.assertEqual(
+            self._order_by(
+                Book.objects.all(), F("author__name").asc(nulls_last=True)
+            ),
+            "django_spanner_author.name IS NULL ASC, "
+            "django_spanner_author.name ASC",
+        )
+        self.assertEqual(
+            self._order_by(
+                Book.objects.filter(author__name="Ada"),
+                F("author__name").asc(nulls_last=True),
+            ),
+            "django_spanner_author.name ASC",
+        )
+
+    def test_generated_is_null_column(self):
+        from django.db.models import F
+
+        # Author.created_is_null stores IsNull("created").
+        self.assertEqual(
+            self._order_by(
+                self._authors(), F("created").asc(nulls_last=True)
+            ),
+            "django_spanner_author.created_is_null ASC, "
+            "django_spanner_author.created ASC",
+        )
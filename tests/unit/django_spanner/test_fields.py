@@ -0,0 +1,254 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import types
+import unittest
+
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestCommitTimestampField(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.fields import CommitTimestampField
+
+        return CommitTimestampField
+
+    def _make_one(self, *args, **kwargs):
+        field = self._get_target_class()(*args, **kwargs)
+        field.set_attributes_from_name("updated")
+        return field
+
+    def test_db_type_suffix(self):
+        field = self._make_one()
+        self.assertEqual(
+            field.db_type_suffix(connection=None),
+            "OPTIONS (allow_commit_timestamp=true)",
+        )
+
+    def test_pre_save_auto_now(self):
+        from django_spanner.functions import PendingCommitTimestamp
+
+        field = self._make_one(auto_now=True)
+        instance = types.SimpleNamespace(updated=None)
+        for add in (True, False):
+            value = field.pre_save(instance, add)
+            self.assertIsInstance(value, PendingCommitTimestamp)
+            self.assertIs(instance.updated, value)
+
+    def test_pre_save_auto_now_add(self):
+        from django_spanner.functions import PendingCommitTimestamp
+
+        field = self._make_one(auto_now_add=True)
+        instance = types.SimpleNamespace(updated=None)
+        value = field.pre_save(instance, True)
+        self.assertIsInstance(value, PendingCommitTimestamp)
+        self.assertFalse(hasattr(instance, "updated"))
+
+        instance.updated = "2020-01-01"
+        self.assertEqual(field.pre_save(instance, False), "2020-01-01")
+
+    def test_pre_save_without_auto_now(self):
+        field = self._make_one()
+        instance = types.SimpleNamespace(updated="2020-01-01")
+        self.assertEqual(field.pre_save(instance, True), "2020-01-01")
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestGeneratedField(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.fields import GeneratedField
+
+        return GeneratedField
+
+    def _make_one(self, *args, **kwargs):
+        field = self._get_target_class()(*args, **kwargs)
+        field.set_attributes_from_name("email_lower")
+        return field
+
+    def test_read_only(self):
+        from django.db.models import CharField
+        from django.db.models.functions import Lower
+
+        field = self._make_one(
+            expression=Lower("email"), output_field=CharField(max_length=50)
+        )
+        self.assertTrue(field.generated)
+        self.assertFalse(field.editable)
+        self.assertEqual(field.get_internal_type(), "CharField")
+
+    def test_deconstruct(self):
+        from django.db.models import CharField
+        from django.db.models.functions import Lower
+
+        expression = Lower("email")
+        output_field = CharField(max_length=50)
+        field = self._make_one(
+            expression=expression, output_field=output_field, db_index=True
+        )
+        name, path, args, kwargs = field.deconstruct()
+        self.assertEqual(name, "email_lower")
+        self.assertEqual(path, "django_spanner.fields.GeneratedField")
+        self.assertEqual(args, [])
+        self.assertEqual(
+            kwargs,
+            {
+                "db_index": True,
+                "expression": expression,
+                "output_field": output_field,
+            },
+        )
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestLazyBytes(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.fields import LazyBytes
+
+        return LazyBytes
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_decode_on_access(self):
+        value = self._make_one(b"c3Bhbm5lcg==")
+        self.assertFalse(value.decoded)
+        self.assertEqual(bytes(value), b"spanner")
+        self.assertTrue(value.decoded)
+        self.assertIsNone(value.encoded)
+        self.assertEqual(len(value), 7)
+        self.assertEqual(value[:4], b"span")
+
+    def test_eq(self):
+        self.assertEqual(self._make_one(b"c3Bhbm5lcg=="), b"spanner")
+        self.assertEqual(
+            self._make_one(b"c3Bhbm5lcg=="), self._make_one(b"c3Bhbm5lcg==")
+        )
+        self.assertNotEqual(self._make_one(b"c3Bhbm5lcg=="), b"span")
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestLazyBinaryField(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.fields import LazyBinaryField
+
+        return LazyBinaryField
+
+    def _make_one(self, *args, **kwargs):
+        field = self._get_target_class()(*args, **kwargs)
+        field.set_attributes_from_name("thumbnail")
+        return field
+
+    def test_from_db_value(self):
+        from django_spanner.fields import LazyBytes
+
+        field = self._make_one(null=True)
+        self.assertIsNone(field.from_db_value(None, None, None))
+        value = field.from_db_value(b"c3Bhbm5lcg==", None, None)
+        self.assertIsInstance(value, LazyBytes)
+        self.assertFalse(value.decoded)
+
+    def test_get_db_prep_value_not_decoded(self):
+        from django_spanner.fields import LazyBytes
+
+        field = self._make_one()
+        value = LazyBytes(b"c3Bhbm5lcg==")
+        self.assertEqual(
+            field.get_db_prep_value(value, connection=None), b"c3Bhbm5lcg=="
+        )
+        self.assertFalse(value.decoded)
+
+    def test_value_to_string(self):
+        from django_spanner.fields import LazyBytes
+
+        field = self._make_one()
+        instance = types.SimpleNamespace(thumbnail=LazyBytes(b"c3Bhbm5lcg=="))
+        self.assertEqual(field.value_to_string(instance), "c3Bhbm5lcg==")
+        bytes(instance.thumbnail)
+        self.assertEqual(field.value_to_string(instance), "c3Bhbm5lcg==")
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestCompactUUIDField(unittest.TestCase):
+    VALUE = "12345678123456781234567812345678"
+
+    def _get_target_class(self):
+        from django_spanner.fields import CompactUUIDField
+
+        return CompactUUIDField
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def _make_connection(self):
+        from base64 import b64encode
+
+        return types.SimpleNamespace(
+            Database=types.SimpleNamespace(Binary=b64encode)
+        )
+
+    def test_db_type(self):
+        field = self._make_one()
+        self.assertEqual(field.db_type(connection=None), "BYTES(16)")
+
+    def test_get_db_prep_value(self):
+        from base64 import b64encode
+        from uuid import UUID
+
+        field = self._make_one()
+        connection = self._make_connection()
+        expected = b64encode(UUID(self.VALUE).bytes)
+        self.assertEqual(
+            field.get_db_prep_value(UUID(self.VALUE), connection), expected
+        )
+        self.assertEqual(
+            field.get_db_prep_value(self.VALUE, connection), expected
+        )
+        self.assertIsNone(field.get_db_prep_value(None, connection))
+
+    def test_from_db_value(self):
+        from uuid import UUID
+
+        field = self._make_one()
+        self.assertEqual(
+            field.from_db_value(UUID(self.VALUE).bytes, None, None),
+            UUID(self.VALUE),
+        )
+        self.assertIsNone(field.from_db_value(None, None, None))
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestCompactGenericIPAddressField(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.fields import CompactGenericIPAddressField
+
+        return CompactGenericIPAddressField
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_round_trip(self):
+        from base64 import b64decode, b64encode
+
+        field = self._make_one(null=True)
+        connection = types.SimpleNamespace(
+            Database=types.SimpleNamespace(Binary=b64encode)
+        )
+        for value in ("192.0.2.1", "2001:db8::1", "::1"):
+            with self.subTest(value=value):
+                stored = b64decode(field.get_db_prep_value(value, connection))
+                self.assertEqual(len(stored), 16)
+                self.assertEqual(
+                    field.from_db_value(stored, None, None), value
+                )
+        self.assertIsNone(field.get_db_prep_value("", connection))
@@ -0,0 +1,60 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import unittest
+
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestSpannerIndex(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.indexes import SpannerIndex
+
+        return SpannerIndex
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_deconstruct(self):
+        index = self._make_one(
+            fields=["-year"], name="book_year_idx", storing=["title"]
+        )
+        path, args, kwargs = index.deconstruct()
+        self.assertEqual(path, "django_spanner.indexes.SpannerIndex")
+        self.assertEqual(args, ())
+        self.assertEqual(
+            kwargs,
+            {"fields": ["-year"], "name": "book_year_idx", "storing": ["title"]},
+        )
+        self.assertEqual(index.clone(), index)
+
+    def test_deconstruct_without_storing(self):
+        index = self._make_one(fields=["year"], name="book_year_idx")
+        _, _, kwargs = index.deconstruct()
+        self.assertNotIn("storing", kwargs)
+        self.assertNotIn("null_filtered", kwargs)
+
+    def test_deconstruct_null_filtered(self):
+        index = self._make_one(
+            fields=["deleted_at"], name="deleted_idx", null_filtered=True
+        )
+        _, _, kwargs = index.deconstruct()
+        self.assertIs(kwargs["null_filtered"], True)
+        self.assertEqual(index.clone(), index)
+        self.assertNotEqual(
+            index, self._make_one(fields=["deleted_at"], name="deleted_idx")
+        )
+
+    def test_storing_must_be_a_sequence(self):
+        with self.assertRaises(ValueError):
+            self._make_one(fields=["year"], name="idx", storing="title")
+
+    def test_storing_key_field(self):
+        with self.assertRaises(ValueError):
+            self._make_one(fields=["-year"], name="idx", storing=["year"])
@@ -0,0 +1,38 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import unittest
+from unittest import mock
+
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestIntrospection(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.introspection import DatabaseIntrospection
+
+        return DatabaseIntrospection
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_index_exists(self):
+        connection = mock.MagicMock()
+        connection.ops.quote_name = lambda name: name
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.run_sql_in_snapshot.return_value = [["book_title_idx"]]
+        introspection = self._make_one(connection)
+
+        self.assertTrue(introspection.index_exists("book", "book_title_idx"))
+        self.assertTrue(introspection.index_exists("book", "book_title_idx"))
+        # Indexes that were found aren't looked up again.
+        self.assertEqual(cursor.run_sql_in_snapshot.call_count, 1)
+
+        self.assertFalse(introspection.index_exists("book", "book_year_idx"))
+        self.assertEqual(cursor.run_sql_in_snapshot.call_count, 2)
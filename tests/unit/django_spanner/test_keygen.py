@@ -0,0 +1,146 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import threading
+import unittest
+
+import mock
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestRandomKeyGenerator(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.keygen import RandomKeyGenerator
+
+        return RandomKeyGenerator
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_next_key(self):
+        from django_spanner.keygen import KEY_MASK
+        from django_spanner.utils import GeneratedKey
+
+        generator = self._make_one(block_size=8)
+        keys = {generator.next_key() for _ in range(100)}
+        self.assertEqual(len(keys), 100)
+        for key in keys:
+            self.assertIsInstance(key, GeneratedKey)
+            self.assertTrue(0 <= key <= KEY_MASK)
+
+    def test_allocate_urandom(self):
+        from django_spanner.keygen import KEY_MASK
+
+        generator = self._make_one()
+        block = bytes(range(8)) + b"\xff" * 8
+        with mock.patch(
+            "django_spanner.keygen.os.urandom", return_value=block
+        ) as urandom:
+            keys = generator.allocate(2)
+        urandom.assert_called_once_with(16)
+        self.assertEqual(
+            keys, [int.from_bytes(bytes(range(8)), "little"), KEY_MASK]
+        )
+
+    def test_invalid_block_size(self):
+        with self.assertRaises(ValueError):
+            self._make_one(block_size=0)
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestGetKeyGenerator(unittest.TestCase):
+    def _call_fut(self):
+        from django_spanner.keygen import get_key_generator
+
+        return get_key_generator()
+
+    def setUp(self):
+        from django_spanner.keygen import reset_key_generator
+
+        reset_key_generator()
+        self.addCleanup(reset_key_generator)
+
+    def test_default(self):
+        from django_spanner.keygen import RandomKeyGenerator
+
+        generator = self._call_fut()
+        self.assertIsInstance(generator, RandomKeyGenerator)
+        self.assertIs(self._call_fut(), generator)
+
+    def test_concurrent_init(self):
+        from django_spanner.keygen import RandomKeyGenerator
+
+        created = []
+
+        class SlowKeyGenerator(RandomKeyGenerator):
+            def __init__(self, **kwargs):
+                created.append(self)
+                # Give the other threads a chance to race.
+                threading.Event().wait(0.01)
+                super().__init__(**kwargs)
+
+        generators = []
+        with mock.patch(
+            "django_spanner.keygen.import_string",
+            return_value=SlowKeyGenerator,
+        ):
+            threads = [
+                threading.Thread(
+                    target=lambda: generators.append(self._call_fut())
+                )
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(created), 1)
+        self.assertEqual(generators, created * 8)
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestBitReversedKeyGenerator(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.keygen import BitReversedKeyGenerator
+
+        return BitReversedKeyGenerator
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_allocate(self):
+        generator = self._make_one(node_id=5, node_bits=8)
+        keys = generator.allocate(256)
+        self.assertEqual(len(set(keys)), 256)
+        # The node id ends up in the least significant bits...
+        for key in keys:
+            self.assertEqual(int(format(key, "063b")[-8:][::-1], 2), 5)
+        # ...while consecutive keys spread over the most significant bits.
+        self.assertEqual(len({key >> 55 for key in keys}), 256)
+
+    def test_allocate_reverses_bits(self):
+        generator = self._make_one(node_id=5, node_bits=8)
+        generator._counter = iter([0, 1, 2, (1 << 55) - 1])
+        self.assertEqual(
+            generator.allocate(4),
+            [
+                int(format(5 << 55 | counter, "063b")[::-1], 2)
+                for counter in (0, 1, 2, (1 << 55) - 1)
+            ],
+        )
+
+    def test_invalid_node_id(self):
+        with self.assertRaises(ValueError):
+            self._make_one(node_id=256, node_bits=8)
+
+    def test_invalid_node_bits(self):
+        with self.assertRaises(ValueError):
+            self._make_one(node_bits=63)
@@ -0,0 +1,518 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import datetime
+import sys
+import unittest
+
+from mock_import import mock_import
+
+
+def _where(queryset):
+    """Return the WHERE clause of the queryset's SQL and the parameters."""
+    sql, params = queryset.query.sql_with_params()
+    return sql.split(" WHERE ", 1)[1], params
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestTruncate(unittest.TestCase):
+    VALUE = datetime.datetime(2020, 8, 13, 14, 15, 16, 170000)
+
+    def _call_fut(self, value, kind):
+        from django_spanner.lookups import _truncate
+
+        return _truncate(value, kind)
+
+    def test_truncate(self):
+        expected = {
+            "year": datetime.datetime(2020, 1, 1),
+            "quarter": datetime.datetime(2020, 7, 1),
+            "month": datetime.datetime(2020, 8, 1),
+            "week": datetime.datetime(2020, 8, 10),
+            "day": datetime.datetime(2020, 8, 13),
+            "hour": datetime.datetime(2020, 8, 13, 14),
+            "minute": datetime.datetime(2020, 8, 13, 14, 15),
+            "second": datetime.datetime(2020, 8, 13, 14, 15, 16),
+        }
+        for kind, value in expected.items():
+            with self.subTest(kind=kind):
+                self.assertEqual(self._call_fut(self.VALUE, kind), value)
+
+    def test_truncate_start_of_period(self):
+        value = datetime.datetime(2020, 10, 1)
+        for kind in ("year", "quarter", "month"):
+            with self.subTest(kind=kind):
+                truncated = self._call_fut(value, kind)
+                self.assertEqual(truncated == value, kind != "year")
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestIExact(unittest.TestCase):
+    def _filter(self, **kwargs):
+        from tests.unit.django_spanner.models import Author
+
+        return _where(Author.objects.filter(**kwargs))
+
+    def test_iexact(self):
+        self.assertEqual(
+            self._filter(name__iexact="Ada"),
+            ("LOWER(django_spanner_author.name) = LOWER(%s)", ("Ada",)),
+        )
+
+    def test_iexact_not_string(self):
+        self.assertEqual(
+            self._filter(num__iexact=1),
+            (
+                "LOWER(CAST(django_spanner_author.num AS STRING)) = "
+                "LOWER(%s)",
+                ("1",),
+            ),
+        )
+
+    def test_iexact_expression(self):
+        from django.db.models import F
+
+        self.assertEqual(
+            self._filter(name__iexact=F("email")),
+            (
+                "LOWER(django_spanner_author.name) = "
+                "LOWER((django_spanner_author.email))",
+                (),
+            ),
+        )
+
+    def test_iexact_none(self):
+        self.assertEqual(
+            self._filter(email__iexact=None),
+            ("django_spanner_author.email IS NULL", ()),
+        )
+
+    def test_iexact_generated_column(self):
+        # Author.email_lower stores LOWER(email).
+        self.assertEqual(
+            self._filter(email__iexact="Ada@example.com"),
+            (
+                "django_spanner_author.email_lower = LOWER(%s)",
+                ("Ada@example.com",),
+            ),
+        )
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestProcessText(unittest.TestCase):
+    def _make_lookup(self, lookup_name, field_name, value):
+        from django.db.models.sql import Query
+        from tests.unit.django_spanner.models import Author
+
+        query = Query(Author)
+        lookup = query.build_lookup(
+            [lookup_name],
+            query.resolve_ref(field_name),
+            value,
+        )
+        return lookup, query.get_compiler("default")
+
+    def test_process_text_lhs_string(self):
+        from django_spanner.lookups import _process_text_lhs
+
+        lookup, compiler = self._make_lookup("iexact", "name", "Ada")
+        self.assertEqual(
+            _process_text_lhs(lookup, compiler, compiler.connection),
+            ("django_spanner_author.name", []),
+        )
+        self.assertEqual(
+            _process_text_lhs(
+                lookup, compiler, compiler.connection, lower=True
+            ),
+            ("LOWER(django_spanner_author.name)", []),
+        )
+
+    def test_process_text_lhs_cast(self):
+        from django_spanner.lookups import _process_text_lhs
+
+        lookup, compiler = self._make_lookup("iexact", "num", 1)
+        self.assertEqual(
+            _process_text_lhs(
+                lookup, compiler, compiler.connection, lower=True
+            ),
+            ("LOWER(CAST(django_spanner_author.num AS STRING))", []),
+        )
+
+    def test_process_text_rhs(self):
+        from django_spanner.lookups import _process_text_rhs
+
+        lookup, compiler = self._make_lookup("startswith", "name", "a%_")
+        # The value isn't escaped for LIKE.
+        self.assertEqual(
+            _process_text_rhs(lookup, compiler, compiler.connection),
+            ("%s", ["a%_"]),
+        )
+
+    def test_process_text_rhs_not_string(self):
+        from django_spanner.lookups import _process_text_rhs
+
+        lookup, compiler = self._make_lookup("startswith", "num", 12)
+        self.assertEqual(
+            _process_text_rhs(lookup, compiler, compiler.connection),
+            ("%s", ["12"]),
+        )
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestContains(unittest.TestCase):
+    # The pattern escaping of an F() right-hand side, done by the database.
+    ESCAPED_EMAIL = (
+        'REPLACE(REPLACE(REPLACE((django_spanner_author.email), "\\\\", '
+        '"\\\\\\\\"), "%%", r"\\%%"), "_", r"\\_")'
+    )
+
+    def _filter(self, **kwargs):
+        from tests.unit.django_spanner.models import Author
+
+        return _where(Author.objects.filter(**kwargs))
+
+    def test_contains(self):
+        self.assertEqual(
+            self._filter(name__contains="a%b_c"),
+            ("django_spanner_author.name LIKE %s", ("%a\\%b\\_c%",)),
+        )
+
+    def test_icontains(self):
+        self.assertEqual(
+            self._filter(name__icontains="a%b_c"),
+            (
+                "LOWER(django_spanner_author.name) LIKE LOWER(%s)",
+                ("%a\\%b\\_c%",),
+            ),
+        )
+
+    def test_contains_not_string(self):
+        self.assertEqual(
+            self._filter(num__contains=1),
+            (
+                "CAST(django_spanner_author.num AS STRING) LIKE %s",
+                ("%1%",),
+            ),
+        )
+
+    def test_contains_expression(self):
+        from django.db.models import F
+
+        self.assertEqual(
+            self._filter(name__contains=F("email")),
+            (
+                "django_spanner_author.name LIKE CONCAT('%%', "
+                + self.ESCAPED_EMAIL
+                + ", '%%')",
+                (),
+            ),
+        )
+
+    def test_icontains_expression(self):
+        from django.db.models import F
+
+        self.assertEqual(
+            self._filter(name__icontains=F("email")),
+            (
+                "LOWER(django_spanner_author.name) LIKE LOWER(CONCAT('%%', "
+                + self.ESCAPED_EMAIL
+                + ", '%%'))",
+                (),
+            ),
+        )
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestStartsWithEndsWith(unittest.TestCase):
+    def _filter(self, **kwargs):
+        from tests.unit.django_spanner.models import Author
+
+        return _where(Author.objects.filter(**kwargs))
+
+    def test_startswith(self):
+        # STARTS_WITH takes the value literally, so it isn't escaped.
+        self.assertEqual(
+            self._filter(name__startswith="a%b_"),
+            ("STARTS_WITH(django_spanner_author.name, %s)", ("a%b_",)),
+        )
+
+    def test_istartswith(self):
+        self.assertEqual(
+            self._filter(name__istartswith="Ab"),
+            (
+                "STARTS_WITH(LOWER(django_spanner_author.name), LOWER(%s))",
+                ("Ab",),
+            ),
+        )
+
+    def test_endswith(self):
+        self.assertEqual(
+            self._filter(name__endswith="x"),
+            ("ENDS_WITH(django_spanner_author.name, %s)", ("x",)),
+        )
+
+    def test_iendswith_expression(self):
+        from django.db.models import F
+
+        self.assertEqual(
+            self._filter(name__iendswith=F("email")),
+            (
+                "ENDS_WITH(LOWER(django_spanner_author.name), "
+                "LOWER((django_spanner_author.email)))",
+                (),
+            ),
+        )
+
+    def test_startswith_not_string(self):
+        self.assertEqual(
+            self._filter(num__startswith=12),
+            (
+                "STARTS_WITH(CAST(django_spanner_author.num AS STRING), %s)",
+                ("12",),
+            ),
+        )
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestComparison(unittest.TestCase):
+    # The tests run in the America/New_York time zone.
+    UTC = datetime.timezone.utc
+    RANGE = (
+        "(django_spanner_author.created >= %s AND "
+        "django_spanner_author.created < %s)"
+    )
+
+    def _filter(self, queryset=None, **kwargs):
+        from tests.unit.django_spanner.models import Author
+
+        if queryset is None:
+            queryset = Author.objects.all()
+        return _where(queryset.filter(**kwargs))
+
+    def _trunc(self, kind, **kwargs):
+        from django.db.models.functions import Trunc
+        from tests.unit.django_spanner.models import Author
+
+        return Author.objects.annotate(
+            truncated=Trunc("created", kind, **kwargs)
+        )
+
+    def test_date(self):
+        self.assertEqual(
+            self._filter(created__date=datetime.date(2020, 8, 13)),
+            (
+                self.RANGE,
+                (
+                    datetime.datetime(2020, 8, 13, 4),
+                    datetime.datetime(2020, 8, 14, 4),
+                ),
+            ),
+        )
+
+    def test_date_bounds(self):
+        day = datetime.date(2020, 8, 13)
+        start = datetime.datetime(2020, 8, 13, 4)
+        end = datetime.datetime(2020, 8, 14, 4)
+        expected = {
+            "gt": (">=", end),
+            "gte": (">=", start),
+            "lt": ("<", start),
+            "lte": ("<", end),
+        }
+        for lookup_name, (operator, bound) in expected.items():
+            with self.subTest(lookup_name=lookup_name):
+                self.assertEqual(
+                    self._filter(**{"created__date__" + lookup_name: day}),
+                    (
+                        "django_spanner_author.created %s %%s" % operator,
+                        (bound,),
+                    ),
+                )
+
+    def test_date_dst_transition(self):
+        # Clocks were set forward on 2020-03-08, a day of 23 hours.
+        self.assertEqual(
+            self._filter(created__date=datetime.date(2020, 3, 8)),
+            (
+                self.RANGE,
+                (
+                    datetime.datetime(2020, 3, 8, 5),
+                    datetime.datetime(2020, 3, 9, 4),
+                ),
+            ),
+        )
+
+    def test_year(self):
+        self.assertEqual(
+            self._filter(created__year=2020),
+            (
+                self.RANGE,
+                (
+                    datetime.datetime(2020, 1, 1, 5),
+                    datetime.datetime(2021, 1, 1, 5),
+                ),
+            ),
+        )
+
+    def test_year_date_field(self):
+        self.assertEqual(
+            self._filter(birth_date__year__lte=2020),
+            (
+                "django_spanner_author.birth_date < %s",
+                (datetime.date(2021, 1, 1),),
+            ),
+        )
+
+    def test_trunc_month(self):
+        start = datetime.datetime(2020, 3, 1, 5, tzinfo=self.UTC)
+        self.assertEqual(
+            self._filter(self._trunc("month"), truncated=start),
+            (
+                self.RANGE,
+                (
+                    datetime.datetime(2020, 3, 1, 5),
+                    datetime.datetime(2020, 4, 1, 4),
+                ),
+            ),
+        )
+
+    def test_trunc_tzinfo(self):
+        import pytz
+
+        queryset = self._trunc("day", tzinfo=pytz.timezone("Asia/Tokyo"))
+        start = datetime.datetime(2020, 3, 7, 15, tzinfo=self.UTC)
+        self.assertEqual(
+            self._filter(queryset, truncated=start),
+            (
+                self.RANGE,
+                (
+                    datetime.datetime(2020, 3, 7, 15),
+                    datetime.datetime(2020, 3, 8, 15),
+                ),
+            ),
+        )
+
+    def test_trunc_not_period_start(self):
+        # No truncated value equals the constant, so the lookup is compiled
+        # as is.
+        value = datetime.datetime(2020, 3, 2, 5, tzinfo=self.UTC)
+        self.assertEqual(
+            self._filter(self._trunc("month"), truncated=value),
+            (
+                'TIMESTAMP_TRUNC(django_spanner_author.created, month, '
+                '"America/New_York") = %s',
+                (datetime.datetime(2020, 3, 2, 5),),
+            ),
+        )
+
+    def test_trunc_ambiguous_bound(self):
+        # 01:00 happened twice when clocks were set back on 2020-11-01.
+        value = datetime.datetime(2020, 11, 1, 5, tzinfo=self.UTC)
+        self.assertEqual(
+            self._filter(self._trunc("hour"), truncated=value),
+            (
+                'TIMESTAMP_TRUNC(django_spanner_author.created, hour, '
+                '"America/New_York") = %s',
+                (datetime.datetime(2020, 11, 1, 5),),
+            ),
+        )
+
+    def test_fallback(self):
+        from django.db.models import F
+
+        self.assertEqual(
+            self._filter(created__month=3),
+            (
+                "EXTRACT(month FROM django_spanner_author.created "
+                'AT TIME ZONE "America/New_York") = %s',
+                (3,),
+            ),
+        )
+        self.assertEqual(
+            self._filter(created__date=F("birth_date")),
+            (
+                'DATE(django_spanner_author.created, "America/New_York") = '
+                "(django_spanner_author.birth_date)",
+                (),
+            ),
+        )
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestInList(unittest.TestCase):
+    def _filter(self, *args, **kwargs):
+        from tests.unit.django_spanner.models import Author
+
+        return _where(Author.objects.filter(*args, **kwargs))
+
+    def test_padding(self):
+        self.assertEqual(
+            self._filter(num__in=[1, 2, 3]),
+            (
+                "django_spanner_author.num IN (%s, %s, %s, %s)",
+                (1, 2, 3, 3),
+            ),
+        )
+
+    def test_padding_sizes(self):
+        expected = {1: 1, 2: 2, 3: 4, 5: 8, 8: 8, 9: 16, 100: 128, 300: 512}
+        for count, size in expected.items():
+            with self.subTest(count=count):
+                sql, params = self._filter(num__in=range(count))
+                self.assertEqual(sql.count("%s"), size)
+                padding = [count - 1] * (size - count)
+                self.assertEqual(params, (*range(count), *padding))
+
+    def test_duplicate_values(self):
+        self.assertEqual(
+            self._filter(num__in=[1, 2, 1]),
+            ("django_spanner_author.num IN (%s, %s)", (1, 2)),
+        )
+
+    def test_expression_values(self):
+        from django.db.models import F
+
+        sql, params = self._filter(num__in=[1, F("id"), 2])
+        self.assertEqual(sql.count("%s"), 2)
+        self.assertEqual(params, (1, 2))
+
+    def test_max_query_params(self):
+        # 1024 values would be more than the 900 parameters a statement can
+        # have.
+        sql, params = self._filter(num__in=range(600))
+        self.assertEqual(len(params), 600)
+        self.assertEqual(sql.count("%s"), 600)
+
+    def test_max_query_params_query(self):
+        from django.db.models import Q
+
+        # Padded to 512 values each, the lists would need 1024 parameters.
+        condition = Q(num__in=range(500)) | Q(id__in=range(300))
+        sql, params = self._filter(condition)
+        self.assertEqual(len(params), 800)
+        self.assertEqual(sql.count("%s"), 800)
+        # The other parameters leave room for the padding.
+        sql, params = self._filter(Q(num__in=range(400)), name="Ada")
+        self.assertEqual(len(params), 513)
+
+    def test_max_query_params_cached(self):
+        from django.db.models import Q
+        from django_spanner.compiler import get_sql_cache, reset_sql_cache
+
+        reset_sql_cache()
+        self.addCleanup(reset_sql_cache)
+        condition = Q(num__in=range(500)) | Q(id__in=range(300))
+        for _ in range(2):
+            sql, params = self._filter(condition)
+            self.assertEqual(len(params), 800)
+        self.assertEqual(len(get_sql_cache()), 0)
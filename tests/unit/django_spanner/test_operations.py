@@ -0,0 +1,144 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import unittest
+from unittest import mock
+
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestOperations(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.operations import DatabaseOperations
+
+        return DatabaseOperations
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_insert_statement(self):
+        db_ops = self._make_one(connection=None)
+        self.assertEqual(db_ops.insert_statement(), "INSERT INTO")
+        self.assertEqual(
+            db_ops.insert_statement(ignore_conflicts=True),
+            "INSERT OR IGNORE INTO",
+        )
+
+    def test_upsert_statement(self):
+        db_ops = self._make_one(connection=None)
+        self.assertEqual(db_ops.upsert_statement(), "INSERT OR UPDATE INTO")
+
+    def test_quote_name(self):
+        db_ops = self._make_one(connection=None)
+        self.assertEqual(db_ops.quote_name("book"), "book")
+        self.assertEqual(db_ops.quote_name("select"), "`select`")
+        self.assertEqual(db_ops.quote_name("book title"), "`book title`")
+
+    def test_quote_name_is_cached(self):
+        from django_spanner import operations
+
+        db_ops = self._make_one(connection=None)
+        db_ops.quote_name("book_author")
+        self.assertEqual(
+            operations._quoted_names["book_author"], "book_author"
+        )
+        with mock.patch.object(operations, "escape_name") as escape_name:
+            self.assertEqual(db_ops.quote_name("book_author"), "book_author")
+        escape_name.assert_not_called()
+
+    def test_get_value_converter(self):
+        from decimal import Decimal
+        from uuid import UUID
+
+        db_ops = self._make_one(connection=None)
+        convert = db_ops.get_value_converter(db_ops.convert_decimalfield_value)
+        self.assertEqual(convert(1.5), Decimal("1.5"))
+        value = Decimal("1.10")
+        self.assertIs(convert(value), value)
+        convert = db_ops.get_value_converter(db_ops.convert_uuidfield_value)
+        value = "12345678123456781234567812345678"
+        self.assertEqual(convert(value), UUID(value))
+
+    def test_adapt_decimalfield_value(self):
+        from decimal import Decimal
+
+        db_ops = self._make_one(connection=None)
+        value = db_ops.adapt_decimalfield_value(Decimal("0.1"), 5, 2)
+        self.assertIs(type(value), Decimal)
+        self.assertEqual(str(value), "0.10")
+        self.assertEqual(db_ops.adapt_decimalfield_value(2), Decimal(2))
+        self.assertIsNone(db_ops.adapt_decimalfield_value(None))
+
+    def test_adapt_decimalfield_value_quantize(self):
+        from decimal import Decimal, InvalidOperation
+
+        db_ops = self._make_one(connection=None)
+        # A third has 28 decimal places, more than NUMERIC's 9.
+        value = db_ops.adapt_decimalfield_value(Decimal(1) / 3, 10, 2)
+        self.assertEqual(str(value), "0.33")
+        value = db_ops.adapt_decimalfield_value(2.675, 10, 2)
+        self.assertEqual(str(value), "2.68")
+        value = db_ops.adapt_decimalfield_value(Decimal("-0.125"), 10, 2)
+        self.assertEqual(str(value), "-0.12")
+        with self.assertRaises(InvalidOperation):
+            db_ops.adapt_decimalfield_value(Decimal("12345.6"), 5, 2)
+
+    def test_adapt_datefield_value(self):
+        import datetime
+        from google.cloud.spanner_dbapi.parse_utils import get_param_types
+        from google.cloud.spanner_v1 import param_types
+
+        db_ops = self._make_one(connection=None)
+        value = db_ops.adapt_datefield_value(
+            datetime.datetime(2020, 8, 13, 14, 15)
+        )
+        self.assertEqual(value, datetime.date(2020, 8, 13))
+        self.assertEqual(
+            get_param_types({"a0": value}), {"a0": param_types.DATE}
+        )
+        self.assertIsNone(db_ops.adapt_datefield_value(None))
+
+    def test_adapt_datetimefield_value(self):
+        import datetime
+        from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+        from google.cloud.spanner_dbapi.parse_utils import get_param_types
+        from google.cloud.spanner_v1 import param_types
+
+        db_ops = self._make_one(connection=None)
+        value = db_ops.adapt_datetimefield_value(
+            DatetimeWithNanoseconds(2020, 8, 13, 14, 15, 16, 170000)
+        )
+        self.assertIs(type(value), datetime.datetime)
+        self.assertEqual(
+            value, datetime.datetime(2020, 8, 13, 14, 15, 16, 170000)
+        )
+        self.assertEqual(
+            get_param_types({"a0": value}), {"a0": param_types.TIMESTAMP}
+        )
+
+    def test_adapt_timefield_value(self):
+        import datetime
+
+        db_ops = self._make_one(connection=None)
+        self.assertEqual(
+            db_ops.adapt_timefield_value(datetime.time(14, 15, 16, 170000)),
+            datetime.datetime(1, 1, 1, 14, 15, 16, 170000),
+        )
+
+    def test_limit_offset_sql(self):
+        db_ops = self._make_one(connection=None)
+        self.assertEqual(db_ops.limit_offset_sql(0, 10), " LIMIT %s")
+        self.assertEqual(
+            db_ops.limit_offset_sql(10, 20), " LIMIT %s OFFSET %s"
+        )
+        self.assertEqual(db_ops.limit_offset_sql(0, None), "")
+
+    def test_get_value_converter_unknown(self):
+        db_ops = self._make_one(connection=None)
+        self.assertIsNone(db_ops.get_value_converter(lambda *args: None))
@@ -0,0 +1,524 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import unittest
+
+import mock
+from mock_import import mock_import
+
+
+def _mock_cursor(connection):
+    """
+    Patch the connection to hand out a cursor that records the statements
+    instead of sending them. Every statement changes one row.
+    """
+    cursor = mock.MagicMock(rowcount=1)
+    cursor.__enter__.return_value = cursor
+    return mock.patch.object(connection, "cursor", return_value=cursor)
+
+
+def _statements(cursor):
+    return [call[0][0] for call in cursor.execute.call_args_list]
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestSave(unittest.TestCase):
+    def setUp(self):
+        from django.db import connection
+
+        self.connection = connection
+        patcher = _mock_cursor(connection)
+        self.cursor = patcher.start()()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection._reset_mutation_count)
+
+    def _make_author(self, **kwargs):
+        from tests.unit.django_spanner.models import Author
+
+        return Author(name="Ada", **kwargs)
+
+    def test_save_generated_key_inserts(self):
+        author = self._make_author()
+        author.save()
+        statements = _statements(self.cursor)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(
+            statements[0].startswith("INSERT INTO django_spanner_author")
+        )
+
+    def test_save_generated_key_stores_int(self):
+        from django_spanner.utils import GeneratedKey
+
+        author = self._make_author()
+        author.save()
+        self.assertIs(type(author.pk), int)
+        self.assertNotIsInstance(author.pk, GeneratedKey)
+        params = self.cursor.execute.call_args[0][1]
+        self.assertIs(type(params[0]), int)
+        self.assertEqual(params[0], author.pk)
+
+    def test_save_loaded_instance_updates(self):
+        author = self._make_author(id=42)
+        author._state.adding = False
+        author.save()
+        statements = _statements(self.cursor)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(
+            statements[0].startswith("UPDATE django_spanner_author SET")
+        )
+        self.assertEqual(self.cursor.execute.call_args[0][1][-1], 42)
+
+    def test_save_saved_instance_updates(self):
+        author = self._make_author()
+        author.save()
+        author.name = "Grace"
+        author.save()
+        statements = _statements(self.cursor)
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[1].startswith("UPDATE"))
+
+    def test_save_upsert(self):
+        author = self._make_author(id=42)
+        author._state.adding = False
+        author.save(upsert=True)
+        statements = _statements(self.cursor)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(
+            statements[0].startswith(
+                "INSERT OR UPDATE INTO django_spanner_author"
+            )
+        )
+        self.assertFalse(hasattr(author._state, "upsert"))
+
+    def test_save_upsert_force_update(self):
+        author = self._make_author(id=42)
+        with self.assertRaises(ValueError):
+            author.save(upsert=True, force_update=True)
+        self.assertEqual(_statements(self.cursor), [])
+        self.assertFalse(hasattr(author._state, "upsert"))
+
+    def test_save_upsert_update_fields(self):
+        author = self._make_author(id=42)
+        author._state.adding = False
+        with self.assertRaises(ValueError):
+            author.save(upsert=True, update_fields=["name"])
+        self.assertEqual(_statements(self.cursor), [])
+
+    def test_save_upsert_twice(self):
+        author = self._make_author(id=42)
+        author.save(upsert=True)
+        author.name = "Grace"
+        author.save(upsert=True)
+        statements = _statements(self.cursor)
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[1].startswith("INSERT OR UPDATE"))
+        self.assertIn("name", statements[1])
+        self.assertIn("Grace", self.cursor.execute.call_args[0][1])
+
+    def test_save_upsert_not_supported(self):
+        from django.db import NotSupportedError
+
+        author = self._make_author(id=42)
+        with mock.patch.object(
+            self.connection.features, "supports_update_conflicts", False
+        ):
+            with self.assertRaises(NotSupportedError):
+                author.save(upsert=True)
+        self.assertEqual(_statements(self.cursor), [])
+
+    def test_save_rounds_decimal(self):
+        from decimal import Decimal
+
+        author = self._make_author(price=Decimal(1) / 3)
+        author.save()
+        params = self.cursor.execute.call_args[0][1]
+        self.assertIn(Decimal("0.33"), params)
+        self.assertNotIn(Decimal(1) / 3, params)
+
+    def test_save_leaves_out_generated_columns(self):
+        author = self._make_author(id=42)
+        author._state.adding = False
+        author.save()
+        self.assertNotIn("email_lower", _statements(self.cursor)[0])
+        self.assertNotIn("email_lower", author.__dict__)
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestUpdateKeyFields(unittest.TestCase):
+    def setUp(self):
+        from django.db import connection
+
+        patcher = _mock_cursor(connection)
+        self.cursor = patcher.start()()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection._reset_mutation_count)
+
+    def test_save_leaves_out_key_fields(self):
+        from tests.unit.django_spanner.models import Album
+
+        album = Album(id=3, singer_id=2, title="Blue")
+        album._state.adding = False
+        album.save()
+        self.assertEqual(
+            self.cursor.execute.call_args[0],
+            (
+                "UPDATE django_spanner_album SET title = %s "
+                "WHERE django_spanner_album.id = %s",
+                ("Blue", 3),
+            ),
+        )
+
+    def test_save_changed_key_field(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Album
+
+        album = Album.from_db(
+            "default", ["id", "singer_id", "title"], [3, 2, "Blue"]
+        )
+        album.singer_id = 4
+        with self.assertRaises(NotSupportedError):
+            album.save()
+        self.cursor.execute.assert_not_called()
+
+    def test_save_changed_key_field_after_save(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Album
+
+        album = Album(id=3, singer_id=2, title="Blue")
+        album.save()
+        album.singer_id = 4
+        with self.assertRaises(NotSupportedError):
+            album.save()
+        self.assertEqual(self.cursor.execute.call_count, 1)
+
+    def test_save_changed_composite_key_field(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Event
+
+        event = Event.from_db(
+            "default",
+            ["id", "tenant_id", "created_at", "name"],
+            [3, 2, None, "launch"],
+        )
+        event.tenant_id = 5
+        with self.assertRaises(NotSupportedError):
+            event.save()
+        self.cursor.execute.assert_not_called()
+
+    def test_save_update_fields_key_field(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Album
+
+        album = Album(id=3, singer_id=2, title="Blue")
+        album._state.adding = False
+        with self.assertRaises(NotSupportedError):
+            album.save(update_fields=["singer", "title"])
+        self.cursor.execute.assert_not_called()
+
+    def test_update_key_field(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Album
+
+        with self.assertRaises(NotSupportedError):
+            Album.objects.filter(title="Blue").update(singer_id=4)
+        self.cursor.execute.assert_not_called()
+
+    def test_bulk_update_key_field(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Album
+
+        album = Album(id=3, singer_id=2, title="Blue")
+        with self.assertRaises(NotSupportedError):
+            Album.objects.bulk_update([album], ["singer", "title"])
+        self.cursor.execute.assert_not_called()
+
+    def test_save_leaves_out_composite_key_fields(self):
+        from tests.unit.django_spanner.models import Event
+
+        event = Event(id=3, tenant_id=2, created_at=None, name="launch")
+        event._state.adding = False
+        event.save()
+        self.assertEqual(
+            self.cursor.execute.call_args[0],
+            (
+                "UPDATE django_spanner_event SET name = %s "
+                "WHERE django_spanner_event.id = %s",
+                ("launch", 3),
+            ),
+        )
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestFilterKeys(unittest.TestCase):
+    def _get_model(self):
+        from tests.unit.django_spanner.models import Event
+
+        return Event
+
+    def test_filter_keys(self):
+        from datetime import datetime, timezone
+
+        created = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        queryset = self._get_model().objects.filter_keys(
+            [(1, created, 3), [2, created, 4]]
+        )
+        sql, params = queryset.query.sql_with_params()
+        self.assertTrue(
+            sql.endswith(
+                "WHERE (django_spanner_event.tenant_id, "
+                "django_spanner_event.created_at, django_spanner_event.id) "
+                "IN ((%s, %s, %s), (%s, %s, %s))"
+            )
+        )
+        naive = datetime(2020, 1, 1)
+        self.assertEqual(params, (1, naive, 3, 2, naive, 4))
+
+    def test_filter_keys_fields(self):
+        queryset = self._get_model().objects.filter(name="launch")
+        sql, params = queryset.filter_keys(
+            [(1,)], fields=["tenant"]
+        ).query.sql_with_params()
+        self.assertTrue(
+            sql.endswith(
+                "WHERE (django_spanner_event.name = %s AND "
+                "(django_spanner_event.tenant_id) IN ((%s)))"
+            )
+        )
+        self.assertEqual(params, ("launch", 1))
+
+    def test_filter_keys_wrong_length(self):
+        with self.assertRaisesRegex(ValueError, "tenant, created_at, id"):
+            self._get_model().objects.filter_keys([(1, 2)])
+
+    def test_filter_keys_empty(self):
+        from django.core.exceptions import EmptyResultSet
+
+        queryset = self._get_model().objects.filter_keys([])
+        with self.assertRaises(EmptyResultSet):
+            queryset.query.sql_with_params()
+
+    def test_filter_keys_subquery(self):
+        from tests.unit.django_spanner.models import Author, Book
+
+        authors = Author.objects.filter_keys([(1,), (2,)])
+        sql, params = Book.objects.filter(
+            author__in=authors
+        ).query.sql_with_params()
+        self.assertIn(
+            "IN (SELECT U0.id FROM django_spanner_author U0 "
+            "WHERE (U0.id) IN ((%s), (%s)))",
+            sql,
+        )
+        self.assertEqual(params, (1, 2))
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestBulkMutations(unittest.TestCase):
+    def setUp(self):
+        from django.db import connection
+
+        patcher = _mock_cursor(connection)
+        self.cursor = patcher.start()()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection._reset_mutation_count)
+
+    def _make_books(self, count):
+        from tests.unit.django_spanner.models import Book
+
+        return [Book(id=i + 1, title="Book %d" % i) for i in range(count)]
+
+    def _per_row(self):
+        from django_spanner.utils import estimate_mutations
+        from tests.unit.django_spanner.models import Book
+
+        return estimate_mutations(
+            Book, [field.name for field in Book._meta.concrete_fields]
+        )
+
+    def test_bulk_create_chunks_in_autocommit(self):
+        from django.db import connection
+        from django.test import override_settings
+        from tests.unit.django_spanner.models import Book
+
+        books = self._make_books(5)
+        limit = 2 * self._per_row()
+        with override_settings(
+            SPANNER_AUTO_CHUNK_MUTATIONS=True, SPANNER_MUTATION_LIMIT=limit
+        ), mock.patch.object(
+            connection, "get_autocommit", return_value=True
+        ), mock.patch(
+            "django_spanner.query._bulk_create",
+            side_effect=lambda qs, objs, **kwargs: objs,
+        ) as bulk_create:
+            created = Book.objects.bulk_create(books)
+        self.assertEqual(created, books)
+        self.assertEqual(
+            [call[0][1] for call in bulk_create.call_args_list],
+            [books[0:2], books[2:4], books[4:5]],
+        )
+
+    def test_bulk_create_not_chunked_in_transaction(self):
+        from django.db import connection
+        from django.test import override_settings
+        from tests.unit.django_spanner.models import Book
+
+        books = self._make_books(5)
+        with override_settings(
+            SPANNER_AUTO_CHUNK_MUTATIONS=True,
+            SPANNER_MUTATION_LIMIT=5 * self._per_row(),
+        ), mock.patch.object(
+            connection, "get_autocommit", return_value=False
+        ), mock.patch(
+            "django_spanner.query._bulk_create",
+            side_effect=lambda qs, objs, **kwargs: objs,
+        ) as bulk_create:
+            Book.objects.bulk_create(books)
+        bulk_create.assert_called_once()
+        self.assertEqual(bulk_create.call_args[0][1], books)
+
+    def test_bulk_create_exceeds_limit(self):
+        from django.db import DatabaseError
+        from django.test import override_settings
+        from tests.unit.django_spanner.models import Book
+
+        books = self._make_books(3)
+        with override_settings(
+            SPANNER_MUTATION_LIMIT=2 * self._per_row(),
+            SPANNER_MUTATION_LIMIT_EXCEEDED="raise",
+        ), mock.patch("django_spanner.query._bulk_create") as bulk_create:
+            with self.assertRaises(DatabaseError):
+                Book.objects.bulk_create(books)
+        bulk_create.assert_not_called()
+        self.cursor.execute.assert_not_called()
+
+    def test_bulk_update_chunks_in_autocommit(self):
+        from django.db import connection
+        from django.test import override_settings
+        from django_spanner.utils import estimate_mutations
+        from tests.unit.django_spanner.models import Book
+
+        books = self._make_books(3)
+        limit = estimate_mutations(Book, ["title"])
+        with override_settings(
+            SPANNER_AUTO_CHUNK_MUTATIONS=True, SPANNER_MUTATION_LIMIT=limit
+        ), mock.patch.object(
+            connection, "get_autocommit", return_value=True
+        ), mock.patch(
+            "django_spanner.query._bulk_update"
+        ) as bulk_update:
+            Book.objects.bulk_update(books, ["title"])
+        self.assertEqual(
+            [call[0][1] for call in bulk_update.call_args_list],
+            [(book,) for book in books],
+        )
+
+    def test_bulk_update_exceeds_limit(self):
+        from django.db import DatabaseError
+        from django.test import override_settings
+        from django_spanner.utils import estimate_mutations
+        from tests.unit.django_spanner.models import Book
+
+        books = self._make_books(3)
+        with override_settings(
+            SPANNER_MUTATION_LIMIT=estimate_mutations(Book, ["title"]),
+            SPANNER_MUTATION_LIMIT_EXCEEDED="raise",
+        ), mock.patch("django_spanner.query._bulk_update") as bulk_update:
+            with self.assertRaises(DatabaseError):
+                Book.objects.bulk_update(books, ["title"])
+        bulk_update.assert_not_called()
+        self.cursor.execute.assert_not_called()
+
+    def test_other_database(self):
+        from django.db import connections
+        from django.test import override_settings
+        from tests.unit.django_spanner.models import Book
+
+        books = self._make_books(3)
+        other = connections["other"]
+        with override_settings(
+            SPANNER_MUTATION_LIMIT=1, SPANNER_MUTATION_LIMIT_EXCEEDED="raise"
+        ), mock.patch(
+            "django_spanner.query._bulk_create", return_value=books
+        ) as bulk_create, mock.patch(
+            "django_spanner.query._bulk_update"
+        ) as bulk_update, mock.patch.object(
+            other, "get_autocommit", return_value=True
+        ) as get_autocommit:
+            Book.objects.using("other").bulk_create(books)
+            Book.objects.using("other").bulk_update(books, ["title"])
+        bulk_create.assert_called_once()
+        self.assertEqual(bulk_create.call_args[0][1], books)
+        bulk_update.assert_called_once()
+        get_autocommit.assert_not_called()
+
+    def test_update_not_checked_in_autocommit(self):
+        from django.db import connection
+        from django.test import override_settings
+        from tests.unit.django_spanner.models import Book
+
+        with override_settings(
+            SPANNER_MUTATION_LIMIT=0, SPANNER_MUTATION_LIMIT_EXCEEDED="raise"
+        ), mock.patch.object(connection, "autocommit", True):
+            Book.objects.filter(title="Blue").update(title="Red")
+            Book.objects.filter(title="Red")._raw_delete(connection.alias)
+        self.assertEqual(connection.mutation_count, 0)
+
+    def test_update_checked_in_transaction(self):
+        from django.db import DatabaseError, connection
+        from django.test import override_settings
+        from tests.unit.django_spanner.models import Book
+
+        with override_settings(
+            SPANNER_MUTATION_LIMIT=0, SPANNER_MUTATION_LIMIT_EXCEEDED="raise"
+        ), mock.patch.object(connection, "autocommit", False):
+            with self.assertRaises(DatabaseError):
+                Book.objects.filter(title="Blue").update(title="Red")
+
+    def test_bulk_create_counted_once(self):
+        import warnings
+
+        from django.db import connection
+        from django.test import override_settings
+        from tests.unit.django_spanner.models import Book
+
+        books = self._make_books(3)
+        fields = Book._meta.concrete_fields
+        with override_settings(
+            SPANNER_MUTATION_LIMIT=2 * self._per_row()
+        ), mock.patch.object(
+            connection, "autocommit", True
+        ), mock.patch(
+            "django_spanner.query._bulk_create",
+            side_effect=lambda qs, objs, **kwargs: qs._insert(objs, fields),
+        ), warnings.catch_warnings(
+            record=True
+        ) as caught:
+            warnings.simplefilter("always")
+            Book.objects.bulk_create(books)
+        self.assertEqual(len(_statements(self.cursor)), 1)
+        self.assertEqual(len(caught), 1)
+
+    def test_bulk_update_counted_once(self):
+        from django.db import connection
+        from django_spanner.utils import estimate_mutations
+        from tests.unit.django_spanner.models import Book
+
+        books = self._make_books(3)
+        with mock.patch.object(
+            connection, "get_autocommit", return_value=False
+        ), mock.patch.object(connection, "autocommit", False):
+            Book.objects.bulk_update(books, ["title"])
+        # The mocked cursor reports one updated row for the statement.
+        self.assertEqual(len(_statements(self.cursor)), 1)
+        self.assertEqual(
+            connection.mutation_count,
+            3 * estimate_mutations(Book, ["title"]),
+        )
@@ -0,0 +1,174 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import unittest
+
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestCreateModel(unittest.TestCase):
+    def _create_model(self, model):
+        from django.db import connection
+
+        with connection.schema_editor(
+            collect_sql=True, atomic=False
+        ) as editor:
+            editor.create_model(model)
+        return editor.collected_sql
+
+    def test_create_model(self):
+        from tests.unit.django_spanner.models import Singer
+
+        self.assertEqual(
+            self._create_model(Singer),
+            [
+                "CREATE TABLE django_spanner_singer ("
+                "singer_id INT64 NOT NULL, name STRING(20) NOT NULL) "
+                "PRIMARY KEY(singer_id);"
+            ],
+        )
+
+    def test_create_model_interleaved(self):
+        from tests.unit.django_spanner.models import Album
+
+        statements = self._create_model(Album)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(
+            statements[0],
+            "CREATE TABLE django_spanner_album (id INT64 NOT NULL, "
+            "singer_id INT64 NOT NULL, title STRING(50) NOT NULL) "
+            "PRIMARY KEY(singer_id, id) "
+            "INTERLEAVE IN PARENT django_spanner_singer ON DELETE CASCADE;",
+        )
+        # A unique index on the model's primary key, but none on the foreign
+        # key that leads the table's key.
+        self.assertRegex(
+            statements[1],
+            r"^CREATE UNIQUE NULL_FILTERED INDEX django_spanner_album_id_\w+ "
+            r"ON django_spanner_album \(id\);$",
+        )
+
+    def test_create_model_interleaved_no_action(self):
+        from django.db.models import PROTECT
+        from tests.unit.django_spanner.models import Album
+
+        field = Album._meta.get_field("singer")
+        on_delete = field.remote_field.on_delete
+        field.remote_field.on_delete = PROTECT
+        try:
+            statements = self._create_model(Album)
+        finally:
+            field.remote_field.on_delete = on_delete
+        self.assertTrue(
+            statements[0].endswith(
+                "INTERLEAVE IN PARENT django_spanner_singer "
+                "ON DELETE NO ACTION;"
+            )
+        )
+
+    def test_create_model_interleaved_missing_key_column(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Song
+
+        with self.assertRaises(NotSupportedError):
+            self._create_model(Song)
+
+    def test_create_model_composite_key(self):
+        from tests.unit.django_spanner.models import Event
+
+        statements = self._create_model(Event)
+        self.assertEqual(
+            statements[0],
+            "CREATE TABLE django_spanner_event (id INT64 NOT NULL, "
+            "tenant_id INT64 NOT NULL, created_at TIMESTAMP NOT NULL, "
+            "name STRING(20) NOT NULL) "
+            "PRIMARY KEY(tenant_id, created_at, id);",
+        )
+        self.assertEqual(len(statements), 2)
+        self.assertRegex(
+            statements[1],
+            r"^CREATE UNIQUE NULL_FILTERED INDEX django_spanner_event_id_\w+ "
+            r"ON django_spanner_event \(id\);$",
+        )
+
+    def test_create_model_composite_key_without_pk(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Visit
+
+        with self.assertRaises(NotSupportedError):
+            self._create_model(Visit)
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestQuoteValue(unittest.TestCase):
+    def _quote_value(self, value):
+        from django.db import connection
+
+        return connection.schema_editor().quote_value(value)
+
+    def test_quote_value(self):
+        from datetime import date, datetime, timedelta, timezone
+        from decimal import Decimal
+
+        cases = [
+            (None, "NULL"),
+            (True, "TRUE"),
+            (False, "FALSE"),
+            (3, "3"),
+            (1.5, "1.5"),
+            (float("-inf"), 'CAST("-inf" AS FLOAT64)'),
+            (Decimal("1.20"), "NUMERIC '1.20'"),
+            ('say "hi" \\o/', '"say \\"hi\\" \\\\o/"'),
+            ("a\nb\r\tc", '"a\\nb\\r\\tc"'),
+            ("\x00\x7f\u2028\U000e0001é", '"\\x00\\x7f\\u2028\\U000e0001é"'),
+            (b'a"\\\x00', 'b"a\\x22\\x5c\\x00"'),
+            (memoryview(b"ab"), 'b"ab"'),
+            (date(2020, 1, 2), "DATE '2020-01-02'"),
+            (
+                datetime(2020, 1, 2, 3, 4, 5, 6),
+                "TIMESTAMP '2020-01-02 03:04:05.000006+00:00'",
+            ),
+            (
+                datetime(2020, 1, 2, 3, tzinfo=timezone(timedelta(hours=2))),
+                "TIMESTAMP '2020-01-02 01:00:00+00:00'",
+            ),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(self._quote_value(value), expected)
+
+    def test_quote_value_not_supported(self):
+        from django.db import NotSupportedError
+
+        with self.assertRaises(NotSupportedError):
+            self._quote_value([1, 2])
+
+    def test_generated_column_literals(self):
+        from datetime import date
+
+        from django.db import connection
+        from django.db.models import DateField, Value
+        from django.db.models.functions import Coalesce
+        from django_spanner.fields import GeneratedField
+        from tests.unit.django_spanner.models import Author
+
+        field = GeneratedField(
+            expression=Coalesce(
+                "birth_date", Value(date(2000, 1, 1), DateField())
+            ),
+            output_field=DateField(),
+        )
+        field.set_attributes_from_name("known_birth_date")
+        field.model = Author
+        with connection.schema_editor() as editor:
+            self.assertEqual(
+                editor._generated_expression_sql(Author, field),
+                "COALESCE((birth_date), DATE '2000-01-01')",
+            )
@@ -0,0 +1,206 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import unittest
+
+import mock
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestLRUCache(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.utils import LRUCache
+
+        return LRUCache
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_get(self):
+        cache = self._make_one(maxsize=2)
+        self.assertIsNone(cache.get("a"))
+        cache["a"] = 1
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.cache_info(), (1, 1, 2, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = self._make_one(maxsize=2)
+        cache["a"] = 1
+        cache["b"] = 2
+        cache.get("a")
+        cache["c"] = 3
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_clear(self):
+        cache = self._make_one(maxsize=2)
+        cache["a"] = 1
+        cache.get("a")
+        cache.clear()
+        self.assertEqual(cache.cache_info(), (0, 0, 2, 0))
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestStatementCounter(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.utils import StatementCounter
+
+        return StatementCounter
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_call(self):
+        def execute(sql, params, many, context):
+            return sql
+
+        counter = self._make_one()
+        sql = "SELECT name FROM book WHERE id = %s"
+        for params in ((1,), (2,)):
+            self.assertEqual(counter(execute, sql, params, False, {}), sql)
+        counter(execute, "SELECT 1", (), False, {})
+        self.assertEqual(counter.statements[sql], 2)
+        self.assertEqual(counter.cardinality, 2)
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestAddDummyWhere(unittest.TestCase):
+    def _call_fut(self, sql):
+        from django_spanner.utils import add_dummy_where
+
+        return add_dummy_where(sql)
+
+    def test_without_where(self):
+        for sql in (
+            "DELETE FROM t",
+            "UPDATE t SET a = 'WHERE'",
+            "UPDATE t SET a = (SELECT b FROM u WHERE u.c = 1)",
+            "UPDATE `where` SET a = 1 -- WHERE",
+            "UPDATE t SET a = 1 /* WHERE */",
+        ):
+            with self.subTest(sql=sql):
+                self.assertEqual(self._call_fut(sql), sql + " WHERE 1=1")
+
+    def test_with_where(self):
+        for sql in (
+            "DELETE FROM t WHERE a = 1",
+            "update t set a = 1\nwhere (b = 2)",
+        ):
+            with self.subTest(sql=sql):
+                self.assertEqual(self._call_fut(sql), sql)
+
+    def test_dbapi_statements(self):
+        from google.cloud.spanner_dbapi import parse_utils
+
+        import django_spanner  # noqa: F401
+
+        with mock.patch(
+            "google.cloud.spanner_dbapi.parse_utils.sqlparse.parse"
+        ) as parse:
+            statement = parse_utils.classify_statement(
+                "UPDATE t SET a = (SELECT b FROM u WHERE u.c = 1)"
+            )
+        parse.assert_not_called()
+        self.assertEqual(
+            statement.statement.sql,
+            "UPDATE t SET a = (SELECT b FROM u WHERE u.c = 1) WHERE 1=1",
+        )
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestGetInterleaveParentField(unittest.TestCase):
+    def _call_fut(self, model):
+        from django_spanner.utils import get_interleave_parent_field
+
+        return get_interleave_parent_field(model)
+
+    def test_not_interleaved(self):
+        from tests.unit.django_spanner.models import Singer
+
+        self.assertIsNone(self._call_fut(Singer))
+
+    def test_interleaved(self):
+        from tests.unit.django_spanner.models import Album
+
+        self.assertIs(self._call_fut(Album), Album._meta.get_field("singer"))
+
+    def test_not_foreign_key(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Review
+
+        with self.assertRaisesRegex(NotSupportedError, "must name a Foreign"):
+            self._call_fut(Review)
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestGetPrimaryKeyFields(unittest.TestCase):
+    def _call_fut(self, model):
+        from django_spanner.utils import get_primary_key_fields
+
+        return get_primary_key_fields(model)
+
+    def _names(self, model):
+        return [field.name for field in self._call_fut(model)]
+
+    def test_primary_key(self):
+        from tests.unit.django_spanner.models import Singer
+
+        self.assertEqual(self._names(Singer), ["id"])
+
+    def test_interleaved(self):
+        from tests.unit.django_spanner.models import Album
+
+        self.assertEqual(self._names(Album), ["singer", "id"])
+
+    def test_composite_key(self):
+        from tests.unit.django_spanner.models import Event
+
+        self.assertEqual(self._names(Event), ["tenant", "created_at", "id"])
+
+    def test_composite_key_without_pk(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Visit
+
+        with self.assertRaisesRegex(NotSupportedError, "primary key id"):
+            self._call_fut(Visit)
+
+    def test_interleaved_missing_parent_column(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Song
+
+        with self.assertRaisesRegex(NotSupportedError, "singer_id, id"):
+            self._call_fut(Song)
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestCheckKeyFieldsNotUpdated(unittest.TestCase):
+    def _call_fut(self, model, fields):
+        from django_spanner.utils import check_key_fields_not_updated
+
+        return check_key_fields_not_updated(model, fields)
+
+    def test_not_key_field(self):
+        from tests.unit.django_spanner.models import Album
+
+        self._call_fut(Album, [Album._meta.get_field("title")])
+
+    def test_key_field(self):
+        from django.db import NotSupportedError
+        from tests.unit.django_spanner.models import Album
+
+        fields = [Album._meta.get_field(name) for name in ("title", "singer")]
+        with self.assertRaisesRegex(NotSupportedError, "of Album: singer."):
+            self._call_fut(Album, fields)
@@ -0,0 +1,44 @@
+# Copyright 2020 Google LLC
+#
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file or at
+# https://developers.google.com/open-source/licenses/bsd
+
+import sys
+import unittest
+
+from mock_import import mock_import
+
+
+@mock_import()
+@unittest.skipIf(sys.version_info < (3, 6), reason="Skipping Python 3.5")
+class TestDatabaseValidation(unittest.TestCase):
+    def _get_target_class(self):
+        from django_spanner.validation import DatabaseValidation
+
+        return DatabaseValidation
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def _check(self, **kwargs):
+        from django.db.models import DecimalField
+
+        validation = self._make_one(connection=None)
+        field = DecimalField(**kwargs)
+        return [
+            error.id for error in validation.check_field_type(field, "NUMERIC")
+        ]
+
+    def test_decimal_field(self):
+        self.assertEqual(self._check(max_digits=38, decimal_places=9), [])
+
+    def test_decimal_field_decimal_places(self):
+        self.assertEqual(
+            self._check(max_digits=12, decimal_places=10), ["spanner.E001"]
+        )
+
+    def test_decimal_field_max_digits(self):
+        self.assertEqual(
+            self._check(max_digits=32, decimal_places=2), ["spanner.E002"]
+        )